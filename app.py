@@ -1,24 +1,84 @@
-from flask import Flask, render_template, request, jsonify, send_file, make_response
+import time
+import importlib
+import sys
+
+INICIO_MODULO = time.perf_counter()
+
+# Tempo (s) da primeira importação de cada dependência, inclusive as carregadas sob demanda
+TEMPOS_IMPORTACAO = {}
+
+def importar_medindo(nome):
+    """Importa um módulo registrando o tempo da primeira importação em TEMPOS_IMPORTACAO"""
+    if nome in sys.modules:
+        return sys.modules[nome]
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nome)
+    TEMPOS_IMPORTACAO[nome] = round(time.perf_counter() - inicio, 4)
+    return modulo
+
+importar_medindo('flask')
+importar_medindo('flask_cors')
+importar_medindo('requests')
+
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 import os
 import threading
+import multiprocessing
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import logging
 import json
 import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError, ReadTimeoutError, ProtocolError
+from urllib3.util.request import ACCEPT_ENCODING
 import re
 import tempfile
-import io
+import atexit
+import socket
+import codecs
+
+# Motores pesados importados sob demanda (carregar_selenium / carregar_bs4): na Vercel
+# o Selenium nunca é usado e não deve pesar na inicialização a frio
+webdriver = Options = Service = WebDriverWait = EC = By = None
+TimeoutException = NoSuchElementException = None
+BeautifulSoup = None
+_carregamento_lock = threading.Lock()
+
+def carregar_selenium():
+    """Importa o Selenium na primeira vez que um driver for necessário"""
+    global webdriver, Options, Service, WebDriverWait, EC, By
+    global TimeoutException, NoSuchElementException
+    if By is not None:
+        return
+    with _carregamento_lock:
+        if By is not None:
+            return
+        for nome in ('selenium.webdriver', 'selenium.webdriver.chrome.options',
+                     'selenium.webdriver.chrome.service', 'selenium.webdriver.support.ui',
+                     'selenium.webdriver.support.expected_conditions',
+                     'selenium.common.exceptions', 'selenium.webdriver.common.by'):
+            importar_medindo(nome)
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException, NoSuchElementException
+        # By por último: é ele que indica que o carregamento terminou
+        from selenium.webdriver.common.by import By
+
+def carregar_bs4():
+    """Importa o BeautifulSoup na primeira extração pelo método requests"""
+    global BeautifulSoup
+    if BeautifulSoup is not None:
+        return
+    with _carregamento_lock:
+        if BeautifulSoup is None:
+            BeautifulSoup = importar_medindo('bs4').BeautifulSoup
 
 # Configuração do Flask
 app = Flask(__name__)
@@ -38,8 +98,8 @@ CORS(app, resources={
     }
 })
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO)
+# Configuração de logging (EXTRACTO_LOG_NIVEL=DEBUG mostra o detalhe de cada etapa)
+logging.basicConfig(level=getattr(logging, os.environ.get('EXTRACTO_LOG_NIVEL', 'INFO').upper(), logging.INFO))
 logger = logging.getLogger(__name__)
 
 # Diretório para salvar os resultados (usando temp para Vercel)
@@ -124,9 +184,54 @@ SELETORES_ELEMENTOS_INDESEJADOS = [
     '.hidden', '.invisible', '.sr-only'
 ]
 
+# Seletores de publicidade removidos antes da coleta de conteúdo
+SELETORES_ANUNCIOS = [
+    '.advertisement', '.ads', '.ad', '.banner-ad', '.google-ads',
+    '.adsense', '.sponsored', '.promo', '.promotion'
+]
+
+# Tags removidas com a subárvore antes da coleta (scripts e estilos não são conteúdo)
+SELETORES_CRITICOS = ['script', 'style', 'noscript']
+
+# Motor de extração do DOM no método requests (permite comparar as saídas):
+# 'estrategias' executa as estratégias sobrepostas originais,
+# 'passagem_unica' percorre a árvore uma única vez,
+# 'lxml' executa as estratégias direto sobre o lxml.html, sem BeautifulSoup
+MOTORES_DOM = ('estrategias', 'passagem_unica', 'lxml')
+MOTOR_DOM_PADRAO = os.environ.get('EXTRACTO_MOTOR_DOM', 'estrategias')
+
+# Tags tratadas como bloco pelo motor de passagem única e o tipo gerado por cada uma
+TIPOS_BLOCO_DOM = {
+    'h1': 'header', 'h2': 'header', 'h3': 'header',
+    'h4': 'header', 'h5': 'header', 'h6': 'header',
+    'p': 'paragrafo', 'blockquote': 'paragrafo', 'pre': 'paragrafo', 'figcaption': 'paragrafo',
+    'ul': 'lista', 'ol': 'lista', 'dl': 'lista',
+    'table': 'tabela',
+    'div': 'div_conteudo', 'section': 'div_conteudo', 'article': 'div_conteudo',
+    'main': 'div_conteudo', 'header': 'div_conteudo', 'footer': 'div_conteudo',
+    'nav': 'div_conteudo', 'aside': 'div_conteudo', 'form': 'div_conteudo'
+}
+
+# Tags inline que também geram blocos próprios (como as estratégias de spans e links);
+# o texto delas continua no bloco que as contém
+TIPOS_INLINE_DOM = {'span': 'span', 'a': 'link'}
+
+# Tamanho mínimo (exclusivo) do texto de cada tipo de bloco, igual às estratégias originais
+TAMANHO_MINIMO_BLOCO = {
+    'seletor_principal': 20,
+    'paragrafo': 10,
+    'div_conteudo': 15,
+    'header': 3,
+    'lista': 10,
+    'tabela': 10,
+    'span': 10,
+    'link': 5
+}
+
 def iniciar_driver():
     """Inicializa o driver do Chrome com configurações otimizadas"""
     logger.info("=== INICIANDO DIAGNÓSTICO DO CHROME WEBDRIVER ===")
+    carregar_selenium()
     
     chrome_options = Options()
     
@@ -176,7 +281,7 @@ def iniciar_driver():
             try:
                 # Primeira tentativa: usar ChromeDriverManager
                 logger.info("Importando ChromeDriverManager...")
-                from webdriver_manager.chrome import ChromeDriverManager
+                ChromeDriverManager = importar_medindo('webdriver_manager.chrome').ChromeDriverManager
                 
                 logger.info("Chamando ChromeDriverManager().install()...")
                 driver_path = ChromeDriverManager().install()
@@ -247,23 +352,123 @@ def iniciar_driver():
         logger.error(f"Traceback completo: {traceback.format_exc()}")
         raise Exception(f"Não foi possível inicializar o Chrome WebDriver: {e}")
 
-def tratar_popups_e_cookies(driver):
+# Limites (em segundos) das esperas por prontidão da página no fluxo Selenium
+ESPERA_READY_MAX = float(os.environ.get('EXTRACTO_ESPERA_READY_MAX', '15'))
+ESPERA_REDE_MAX = float(os.environ.get('EXTRACTO_ESPERA_REDE_MAX', '5'))
+ESPERA_DOM_MAX = float(os.environ.get('EXTRACTO_ESPERA_DOM_MAX', '5'))
+ESPERA_ROLAGEM_MAX = float(os.environ.get('EXTRACTO_ESPERA_ROLAGEM_MAX', '2'))
+ESPERA_ROLAGEM_GRADUAL_MAX = float(os.environ.get('EXTRACTO_ESPERA_ROLAGEM_GRADUAL_MAX', '5'))
+# Período sem requisições nem mutações no DOM para considerar a página estável
+ESPERA_SILENCIO_MS = int(os.environ.get('EXTRACTO_ESPERA_SILENCIO_MS', '500'))
+
+# Aguarda, dentro da página, rede ociosa (sem fetch/XHR pendentes nem novos recursos)
+# e DOM quieto (MutationObserver sem mutações) pelo período de silêncio.
+# arguments: silencioMs, limiteRedeMs, limiteDomMs, callback
+SCRIPT_AGUARDAR_ESTABILIDADE = """
+    var silencioMs = arguments[0], limiteRedeMs = arguments[1], limiteDomMs = arguments[2];
+    var callback = arguments[arguments.length - 1];
+
+    var estado = window.__extractoEspera;
+    if (!estado) {
+        estado = window.__extractoEspera = {
+            pendentes: 0,
+            recursos: performance.getEntriesByType('resource').length,
+            ultimaRede: Date.now(),
+            ultimaMutacao: Date.now()
+        };
+        new MutationObserver(function () {
+            estado.ultimaMutacao = Date.now();
+        }).observe(document, {childList: true, subtree: true, characterData: true, attributes: true});
+
+        function inicio() { estado.pendentes++; estado.ultimaRede = Date.now(); }
+        function fim() { estado.pendentes = Math.max(0, estado.pendentes - 1); estado.ultimaRede = Date.now(); }
+        if (window.fetch) {
+            var fetchOriginal = window.fetch;
+            window.fetch = function () {
+                inicio();
+                return fetchOriginal.apply(this, arguments).finally(fim);
+            };
+        }
+        var enviarOriginal = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function () {
+            inicio();
+            this.addEventListener('loadend', fim);
+            return enviarOriginal.apply(this, arguments);
+        };
+    }
+
+    var comeco = Date.now();
+    (function verificar() {
+        var agora = Date.now();
+        var recursos = performance.getEntriesByType('resource').length;
+        if (recursos !== estado.recursos) {
+            estado.recursos = recursos;
+            estado.ultimaRede = agora;
+        }
+        var decorrido = agora - comeco;
+        var redeOciosa = estado.pendentes === 0 && agora - estado.ultimaRede >= silencioMs;
+        var domQuieto = agora - estado.ultimaMutacao >= silencioMs;
+        var redeEncerrada = redeOciosa || decorrido >= limiteRedeMs;
+        var domEncerrado = domQuieto || decorrido >= limiteDomMs;
+        if (redeEncerrada && domEncerrado) {
+            callback({rede_ociosa: redeOciosa, dom_quieto: domQuieto, espera_ms: decorrido});
+            return;
+        }
+        setTimeout(verificar, 50);
+    })();
+"""
+
+def registrar_espera(esperas, etapa, segundos):
+    """Acumula o tempo de espera (s) de uma etapa no relatório da requisição"""
+    if esperas is not None:
+        esperas[etapa] = round(esperas.get(etapa, 0.0) + segundos, 3)
+
+def aguardar_documento_pronto(driver, esperas=None, etapa='document_ready'):
+    """Aguarda document.readyState == 'complete', limitado por ESPERA_READY_MAX"""
+    inicio = time.perf_counter()
+    try:
+        WebDriverWait(driver, ESPERA_READY_MAX, poll_frequency=0.1).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except TimeoutException:
+        logger.warning(f"document.readyState não ficou 'complete' em {ESPERA_READY_MAX}s")
+    registrar_espera(esperas, etapa, time.perf_counter() - inicio)
+
+def aguardar_pagina_estavel(driver, esperas=None, etapa='estabilidade',
+                            limite_rede=None, limite_dom=None):
+    """Aguarda rede ociosa e DOM quieto, cada condição com seu limite máximo (s)"""
+    limite_rede = ESPERA_REDE_MAX if limite_rede is None else limite_rede
+    limite_dom = ESPERA_DOM_MAX if limite_dom is None else limite_dom
+    inicio = time.perf_counter()
+    resultado = None
+    try:
+        driver.set_script_timeout(max(limite_rede, limite_dom) + 5)
+        resultado = driver.execute_async_script(
+            SCRIPT_AGUARDAR_ESTABILIDADE,
+            ESPERA_SILENCIO_MS, int(limite_rede * 1000), int(limite_dom * 1000)
+        )
+    except Exception as e:
+        logger.warning(f"Falha ao aguardar estabilidade da página: {e}")
+    registrar_espera(esperas, etapa, time.perf_counter() - inicio)
+    return resultado
+
+def tratar_popups_e_cookies(driver, esperas=None):
     """Remove pop-ups de cookies e consentimento"""
     try:
-        wait = WebDriverWait(driver, 3)
-        
-        # Tenta encontrar e fechar pop-ups de cookies
+        # A página já está estável: procura os pop-ups sem espera fixa por seletor
         for seletor in SELETORES_COOKIES_POPUP:
             try:
-                popup = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, seletor)))
+                popups = driver.find_elements(By.CSS_SELECTOR, seletor)
+                if not popups:
+                    continue
                 # Procura botão de aceitar/fechar
-                botoes = popup.find_elements(By.CSS_SELECTOR, 
+                botoes = popups[0].find_elements(By.CSS_SELECTOR, 
                     'button, .accept, .close, [onclick], a')
                 for botao in botoes:
                     texto = botao.text.lower()
                     if any(palavra in texto for palavra in ['accept', 'aceitar', 'ok', 'fechar', 'close']):
                         botao.click()
-                        time.sleep(1)
+                        aguardar_pagina_estavel(driver, esperas, 'popups', limite_rede=1, limite_dom=1)
                         break
                 break
             except:
@@ -271,7 +476,7 @@ def tratar_popups_e_cookies(driver):
     except:
         pass
 
-def rolar_pagina_inteligente(driver):
+def rolar_pagina_inteligente(driver, esperas=None):
     """Rola a página para carregar conteúdo dinâmico"""
     try:
         altura_anterior = 0
@@ -279,9 +484,10 @@ def rolar_pagina_inteligente(driver):
         max_tentativas = 5
         
         while tentativas < max_tentativas:
-            # Rola até o final da página
+            # Rola até o final da página e espera o conteúdo lazy-loaded estabilizar
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            aguardar_pagina_estavel(driver, esperas, 'rolagem',
+                                    limite_rede=ESPERA_ROLAGEM_MAX, limite_dom=ESPERA_ROLAGEM_MAX)
             
             # Verifica se a altura mudou
             nova_altura = driver.execute_script("return document.body.scrollHeight")
@@ -291,629 +497,3203 @@ def rolar_pagina_inteligente(driver):
             altura_anterior = nova_altura
             tentativas += 1
             
-        # Volta ao topo
+        # Volta ao topo (scrollTo é síncrono, não precisa de espera)
         driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(1)
         
     except Exception as e:
         logger.warning(f"Erro no scroll inteligente: {e}")
 
-def extrair_com_requests(url):
-    """Extrai conteúdo usando requests + BeautifulSoup (para Vercel) - VERSÃO ROBUSTA"""
-    import time
-    import random
-    
+# Configurações do pool de drivers Chrome
+POOL_DRIVERS_TAMANHO = int(os.environ.get('EXTRACTO_POOL_DRIVERS', '2'))
+POOL_DRIVERS_MAX_PAGINAS = int(os.environ.get('EXTRACTO_POOL_MAX_PAGINAS', '50'))
+POOL_DRIVERS_MAX_RSS_MB = int(os.environ.get('EXTRACTO_POOL_MAX_RSS_MB', '1024'))
+POOL_DRIVERS_TIMEOUT_ESPERA = float(os.environ.get('EXTRACTO_POOL_TIMEOUT_ESPERA', '120'))
+
+def medir_rss_driver_mb(driver):
+    """Mede a memória residente (MB) do chromedriver e dos processos Chrome filhos.
+
+    Usa psutil quando disponível; sem ele a medição é ignorada (retorna None).
+    """
     try:
-        logger.info("=== USANDO MÉTODO REQUESTS + BEAUTIFULSOUP ROBUSTO ===")
-        
-        # Múltiplos User-Agents para evitar bloqueios
-        user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0'
-        ]
-        
-        # Configurações de timeout progressivas
-        timeout_configs = [
-            (5, 10),   # (connect_timeout, read_timeout)
-            (10, 15),
-            (15, 25),
-            (20, 30)
-        ]
-        
-        logger.info(f"Fazendo requisição para: {url}")
-        
-        # Sistema de retry com backoff exponencial
-        max_retries = 4
-        base_delay = 1
-        
-        for attempt in range(max_retries):
-            try:
-                # Selecionar User-Agent aleatório
-                selected_ua = random.choice(user_agents)
-                connect_timeout, read_timeout = timeout_configs[min(attempt, len(timeout_configs)-1)]
-                
-                headers = {
-                    'User-Agent': selected_ua,
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8,es;q=0.7',
-                    'Accept-Encoding': 'identity',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                    'Cache-Control': 'no-cache',
-                    'DNT': '1',
-                    'Sec-Fetch-Dest': 'document',
-                    'Sec-Fetch-Mode': 'navigate',
-                    'Sec-Fetch-Site': 'none'
-                }
-                
-                logger.info(f"Tentativa {attempt + 1}/{max_retries} - Timeout: {connect_timeout}s/{read_timeout}s")
-                
-                # Configurar sessão com retry adapter
-                session = requests.Session()
-                session.headers.update(headers)
-                
-                # Fazer requisição com timeout específico
-                response = session.get(
-                    url, 
-                    timeout=(connect_timeout, read_timeout),
-                    allow_redirects=True,
-                    verify=True
-                )
-                response.raise_for_status()
-                
-                logger.info(f"✅ Sucesso na tentativa {attempt + 1}")
-                break
-                
-            except (requests.exceptions.ConnectTimeout, 
-                    requests.exceptions.ReadTimeout,
-                    requests.exceptions.Timeout) as e:
-                logger.warning(f"⏱️ Timeout na tentativa {attempt + 1}: {e}")
-                
-                if attempt < max_retries - 1:
-                    # Backoff exponencial com jitter
-                    delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                    logger.info(f"🔄 Aguardando {delay:.1f}s antes da próxima tentativa...")
-                    time.sleep(delay)
-                else:
-                    logger.error("❌ Todas as tentativas de conexão falharam")
-                    raise
-                    
-            except requests.exceptions.ConnectionError as e:
-                logger.warning(f"🔌 Erro de conexão na tentativa {attempt + 1}: {e}")
-                
-                if attempt < max_retries - 1:
-                    delay = base_delay * (2 ** attempt) + random.uniform(0, 2)
-                    logger.info(f"🔄 Aguardando {delay:.1f}s antes da próxima tentativa...")
-                    time.sleep(delay)
-                else:
-                    raise
-                    
-            except Exception as e:
-                logger.error(f"❌ Erro inesperado na tentativa {attempt + 1}: {e}")
-                if attempt == max_retries - 1:
-                    raise
-        
-        logger.info(f"Resposta recebida: {response.status_code}")
-        logger.info(f"Content-Type: {response.headers.get('content-type', 'N/A')}")
-        logger.info(f"Content-Length: {len(response.content)} bytes")
-        logger.info(f"Encoding detectado: {response.encoding}")
-        
-        # Tentar diferentes encodings se necessário
-        html_content = None
-        encodings_to_try = [response.encoding, 'utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-        
-        for encoding in encodings_to_try:
-            if encoding:
-                try:
-                    html_content = response.content.decode(encoding)
-                    logger.info(f"Sucesso com encoding: {encoding}")
-                    break
-                except (UnicodeDecodeError, LookupError):
-                    logger.warning(f"Falha com encoding: {encoding}")
-                    continue
-        
-        if not html_content:
-            # Fallback: usar response.text que faz detecção automática
-            html_content = response.text
-            logger.info("Usando response.text como fallback")
-        
-        # Tentar diferentes parsers
-        soup = None
-        parsers = ['html.parser', 'lxml', 'html5lib']
-        
-        for parser in parsers:
+        import psutil
+    except ImportError:
+        return None
+
+    try:
+        processo = psutil.Process(driver.service.process.pid)
+        processos = [processo] + processo.children(recursive=True)
+        total = 0
+        for p in processos:
             try:
-                soup = BeautifulSoup(html_content, parser)
-                logger.info(f"Parser usado com sucesso: {parser}")
-                break
-            except Exception as e:
-                logger.warning(f"Parser {parser} falhou: {e}")
+                total += p.memory_info().rss
+            except psutil.Error:
                 continue
-        
-        if not soup:
-            # Fallback final
-            soup = BeautifulSoup(html_content, 'html.parser')
-            logger.info("Usando html.parser como fallback final")
-        
-        # Extrai título
-        titulo = ""
-        if soup.title:
-            titulo = soup.title.get_text().strip()
-        
-        # Extrai metadados
-        metadados = {}
-        try:
-            desc_meta = soup.find('meta', attrs={'name': 'description'})
-            if desc_meta:
-                metadados['description'] = desc_meta.get('content', '')
-        except:
-            pass
-        
+        return total / (1024 * 1024)
+    except Exception:
+        return None
+
+class PoolDrivers:
+    """Pool limitado de drivers Chrome reaproveitados entre extrações.
+
+    Os drivers são criados sob demanda até `tamanho`, emprestados por extração e
+    limpos na devolução (cookies, storage, about:blank). Um driver é reciclado depois
+    de `max_paginas` extrações ou quando a memória passa de `max_rss_mb`, e é
+    substituído automaticamente se deixar de responder.
+    """
+
+    def __init__(self, tamanho, max_paginas, max_rss_mb, timeout_espera, fabrica=None):
+        self.tamanho = tamanho
+        self.max_paginas = max_paginas
+        self.max_rss_mb = max_rss_mb
+        self.timeout_espera = timeout_espera
+        self.fabrica = fabrica or iniciar_driver
+        self._condicao = threading.Condition()
+        self._livres = []          # lista de [driver, paginas_usadas]
+        self._total = 0            # drivers vivos (livres + emprestados)
+        self._encerrado = False
+        self._metricas = {
+            'emprestimos': 0,
+            'criados': 0,
+            'reciclados': 0,
+            'descartados': 0,
+            'espera_total_s': 0.0,
+            'espera_max_s': 0.0
+        }
+
+    def _driver_saudavel(self, driver):
         try:
-            keywords_meta = soup.find('meta', attrs={'name': 'keywords'})
-            if keywords_meta:
-                metadados['keywords'] = keywords_meta.get('content', '')
-        except:
-            pass
-        
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _encerrar_driver(self, driver):
         try:
-            author_meta = soup.find('meta', attrs={'name': 'author'})
-            if author_meta:
-                metadados['author'] = author_meta.get('content', '')
-        except:
-            pass
-        
-        # Remove apenas elementos críticos indesejados (mais seletivo)
-        elementos_criticos = ['script', 'style', 'noscript']
-        for tag in elementos_criticos:
-            for elemento in soup.find_all(tag):
-                elemento.decompose()
-        
-        # Remove elementos de publicidade e navegação
-        seletores_ads = ['.advertisement', '.ads', '.ad', '.banner-ad', '.google-ads', 
-                        '.adsense', '.sponsored', '.promo', '.promotion']
-        for seletor in seletores_ads:
-            for elemento in soup.select(seletor):
-                elemento.decompose()
-        
-        # Coletar TODOS os conteúdos possíveis (estratégia múltipla)
-        conteudos_extraidos = []
-        
-        # Estratégia 1: Seletores de conteúdo principal
-        logger.info("Extraindo por seletores principais...")
-        for seletor in SELETORES_CONTEUDO_PRINCIPAL:
-            try:
-                elementos = soup.select(seletor)
-                for elemento in elementos:
-                    texto = elemento.get_text(separator=' ', strip=True)
-                    if len(texto) > 20:  # Reduzido para capturar mais conteúdo
-                        conteudos_extraidos.append(('seletor_principal', texto))
-            except:
-                continue
-        
-        # Estratégia 2: TODOS os parágrafos
-        logger.info("Extraindo parágrafos...")
-        paragrafos = soup.find_all('p')
-        for p in paragrafos:
-            texto_p = p.get_text(strip=True)
-            if len(texto_p) > 10:  # Mais inclusivo
-                conteudos_extraidos.append(('paragrafo', texto_p))
-        
-        # Estratégia 3: TODAS as divs com texto significativo
-        logger.info("Extraindo divs...")
-        divs = soup.find_all('div')
-        for div in divs:
-            texto_div = div.get_text(strip=True)
-            if len(texto_div) > 15 and len(texto_div) < 2000:  # Evita divs muito grandes
-                # Verifica se não é só texto de elementos filhos já capturados
-                texto_direto = div.get_text(strip=True)
-                if texto_direto:
-                    conteudos_extraidos.append(('div_conteudo', texto_div))
-        
-        # Estratégia 4: Headers (h1, h2, h3, etc.)
-        logger.info("Extraindo headers...")
-        for i in range(1, 7):
-            headers = soup.find_all(f'h{i}')
-            for header in headers:
-                texto_header = header.get_text(strip=True)
-                if len(texto_header) > 3:
-                    conteudos_extraidos.append(('header', texto_header))
-        
-        # Estratégia 5: Spans com texto
-        logger.info("Extraindo spans...")
-        spans = soup.find_all('span')
-        for span in spans:
-            texto_span = span.get_text(strip=True)
-            if len(texto_span) > 10:
-                conteudos_extraidos.append(('span', texto_span))
-        
-        # Estratégia 6: Links com texto significativo
-        logger.info("Extraindo links...")
-        links = soup.find_all('a')
-        for link in links:
-            texto_link = link.get_text(strip=True)
-            if len(texto_link) > 5:
-                conteudos_extraidos.append(('link', texto_link))
-        
-        # Estratégia 7: Listas (ul, ol)
-        logger.info("Extraindo listas...")
-        listas = soup.find_all(['ul', 'ol'])
-        for lista in listas:
-            texto_lista = lista.get_text(separator=' ', strip=True)
-            if len(texto_lista) > 10:
-                conteudos_extraidos.append(('lista', texto_lista))
-        
-        # Estratégia 8: Tabelas
-        logger.info("Extraindo tabelas...")
-        tabelas = soup.find_all('table')
-        for tabela in tabelas:
-            texto_tabela = tabela.get_text(separator=' | ', strip=True)
-            if len(texto_tabela) > 10:
-                conteudos_extraidos.append(('tabela', texto_tabela))
-        
-        # Estratégia 9: Fallback para body completo se pouco conteúdo
-        if len(conteudos_extraidos) < 5:
-            logger.info("Poucos elementos encontrados, usando fallback do body...")
-            body = soup.find('body')
-            if body:
-                texto_body = body.get_text(separator=' ', strip=True)
-                conteudos_extraidos.append(('body_completo', texto_body))
-        
-        # Combinar TODOS os conteúdos únicos
-        logger.info(f"Total de elementos extraídos: {len(conteudos_extraidos)}")
-        textos_unicos = set()
-        conteudo_final_partes = []
-        
-        # Priorizar por tipo e adicionar conteúdos únicos
-        tipos_priorizados = ['header', 'seletor_principal', 'paragrafo', 'div_conteudo', 
-                           'lista', 'tabela', 'span', 'link', 'body_completo']
-        
-        for tipo in tipos_priorizados:
-            for tipo_atual, texto in conteudos_extraidos:
-                if tipo_atual == tipo and texto not in textos_unicos and len(texto.strip()) > 3:
-                    # Evita duplicatas muito similares
-                    texto_normalizado = re.sub(r'\s+', ' ', texto.strip().lower())
-                    if not any(texto_normalizado in existing.lower() or existing.lower() in texto_normalizado 
-                             for existing in textos_unicos if len(existing) > 50):
-                        textos_unicos.add(texto)
-                        conteudo_final_partes.append(texto)
-        
-        melhor_conteudo = '\n\n'.join(conteudo_final_partes)
-        
-        # Limpar e processar o texto final
-        if melhor_conteudo:
-            # Remover linhas vazias excessivas
-            linhas = melhor_conteudo.split('\n')
-            linhas_limpas = []
-            linha_vazia_anterior = False
-            
-            for linha in linhas:
-                linha = linha.strip()
-                if linha:
-                    # Filtrar linhas muito curtas que podem ser ruído
-                    if len(linha) > 3:
-                        # Remove múltiplos espaços
-                        linha = re.sub(r'\s+', ' ', linha)
-                        linhas_limpas.append(linha)
-                    linha_vazia_anterior = False
-                elif not linha_vazia_anterior and linhas_limpas:
-                    linhas_limpas.append('')
-                    linha_vazia_anterior = True
-            
-            # Remover linhas duplicadas consecutivas
-            linhas_finais = []
-            linha_anterior = ""
-            for linha in linhas_limpas:
-                if linha != linha_anterior:
-                    linhas_finais.append(linha)
-                linha_anterior = linha
-            
-            melhor_conteudo = '\n'.join(linhas_finais)
-        
-        # Montar conteúdo final com metadados
-        conteudo_final = f"=== EXTRAÇÃO AVANÇADA DE TEXTO by @valentelucass ===\n"
-        conteudo_final += f"TÍTULO: {titulo}\n"
-        conteudo_final += f"URL: {url}\n"
-        conteudo_final += f"DATA: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
-        conteudo_final += f"MÉTODO: Requests + BeautifulSoup (Vercel)\n"
-        
-        if metadados.get('description'):
-            conteudo_final += f"DESCRIÇÃO: {metadados['description']}\n"
-        if metadados.get('author'):
-            conteudo_final += f"AUTOR: {metadados['author']}\n"
-        if metadados.get('keywords'):
-            conteudo_final += f"PALAVRAS-CHAVE: {metadados['keywords']}\n"
-        
-        conteudo_final += "=" * 60 + "\n\n"
-        conteudo_final += melhor_conteudo if melhor_conteudo else "Nenhum conteúdo significativo encontrado."
-        
-        logger.info(f"Conteúdo extraído com sucesso: {len(conteudo_final)} caracteres")
-        return conteudo_final
-        
-    except Exception as e:
-        logger.error(f"Erro na extração com requests: {e}")
-        raise
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Erro ao encerrar driver do pool: {e}")
 
-def processar_url(url, nome_arquivo=None):
-    """Processa uma URL e salva o resultado em arquivo .txt"""
-    try:
-        logger.info(f"Iniciando extração de: {url}")
-        
-        # Gera nome do arquivo se não fornecido
-        if not nome_arquivo:
-            # Extrai domínio da URL para criar um nome mais descritivo
+    def _emprestar(self):
+        inicio = time.perf_counter()
+        with self._condicao:
+            while True:
+                if self._encerrado:
+                    raise Exception("Pool de drivers encerrado")
+                if self._livres:
+                    entrada = self._livres.pop()
+                    break
+                if self._total < self.tamanho:
+                    # Reserva a vaga antes de criar o driver fora do lock
+                    self._total += 1
+                    entrada = None
+                    break
+                restante = self.timeout_espera - (time.perf_counter() - inicio)
+                if restante <= 0:
+                    raise Exception(f"Nenhum driver disponível após {self.timeout_espera:.0f}s de espera")
+                self._condicao.wait(restante)
+
+            espera = time.perf_counter() - inicio
+            self._metricas['emprestimos'] += 1
+            self._metricas['espera_total_s'] += espera
+            self._metricas['espera_max_s'] = max(self._metricas['espera_max_s'], espera)
+
+        if entrada is not None and not self._driver_saudavel(entrada[0]):
+            logger.warning("Driver do pool não responde, substituindo...")
+            self._encerrar_driver(entrada[0])
+            with self._condicao:
+                self._metricas['descartados'] += 1
+            entrada = None
+
+        if entrada is None:
             try:
-                from urllib.parse import urlparse
-                parsed_url = urlparse(url)
-                domain = parsed_url.netloc.replace('www.', '').replace('.', '_')
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                nome_arquivo = f"{domain}_{timestamp}.txt"
-            except:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                nome_arquivo = f"extracao_{timestamp}.txt"
-        
-        # Garante que o arquivo tenha extensão .txt
-        if not nome_arquivo.endswith('.txt'):
-            nome_arquivo += '.txt'
-        
-        caminho_arquivo = os.path.join(RESULTS_DIR, nome_arquivo)
-        
-        # Escolhe o método de extração baseado no ambiente
-        if os.environ.get('VERCEL'):
-            logger.info("=== AMBIENTE VERCEL: Usando requests + BeautifulSoup ===")
-            conteudo = extrair_com_requests(url)
+                entrada = [self.fabrica(), 0]
+            except Exception:
+                with self._condicao:
+                    self._total -= 1
+                    self._condicao.notify()
+                raise
+            with self._condicao:
+                self._metricas['criados'] += 1
+
+        logger.info(f"Driver emprestado do pool (espera: {espera:.2f}s)")
+        return entrada
+
+    def _limpar_driver(self, driver):
+        """Remove o estado deixado pela extração anterior"""
+        driver.delete_all_cookies()
+        driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+        driver.get('about:blank')
+
+    def _devolver(self, entrada, falhou):
+        driver = entrada[0]
+        entrada[1] += 1
+
+        motivo = None
+        if falhou and not self._driver_saudavel(driver):
+            motivo = 'descartados'
+        elif entrada[1] >= self.max_paginas:
+            motivo = 'reciclados'
         else:
-            logger.info("=== AMBIENTE LOCAL: Usando Selenium ===")
-            # Inicia o driver e faz a extração
-            driver = iniciar_driver()
-            
-            try:
-                driver.get(url)
-                logger.info("Página carregada, aguardando...")
-                time.sleep(3)
-                
-                # Trata pop-ups e cookies
-                tratar_popups_e_cookies(driver)
-                
-                # Rola a página inteligentemente
-                rolar_pagina_inteligente(driver)
-                
-                # Extrai o conteúdo usando método avançado
-                conteudo = extrair_conteudo_avancado(driver, url)
-                
-            finally:
-                driver.quit()
-        
-        # Salva no arquivo .txt
-        with open(caminho_arquivo, 'w', encoding='utf-8') as f:
-            f.write(conteudo)
-        
-        logger.info(f"Extração concluída: {caminho_arquivo}")
-        
-        return {
-            'sucesso': True,
-            'arquivo': nome_arquivo,
-            'caminho': caminho_arquivo,
-            'tamanho': len(conteudo),
-            'mensagem': 'Extração concluída com sucesso!'
-        }
-            
-    except Exception as e:
-        logger.error(f"Erro na extração: {e}")
-        return {
-            'sucesso': False,
-            'erro': str(e),
-            'mensagem': f'Erro durante a extração: {str(e)}'
-        }
+            rss = medir_rss_driver_mb(driver)
+            if rss is not None and rss > self.max_rss_mb:
+                logger.info(f"Driver usa {rss:.0f}MB (limite {self.max_rss_mb}MB), reciclando...")
+                motivo = 'reciclados'
 
-def extrair_conteudo_avancado(driver, url):
-    """Extrai conteúdo de forma avançada e abrangente - VERSÃO MELHORADA"""
-    try:
-        logger.info("=== INICIANDO EXTRAÇÃO AVANÇADA COM SELENIUM ===")
-        
-        # Aguardar carregamento completo
-        WebDriverWait(driver, 15).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
-        )
-        
-        # Obter título da página
-        titulo = driver.title.strip()
-        logger.info(f"Título extraído: {titulo}")
-        
-        # Aguardar elementos dinâmicos carregarem
-        time.sleep(3)
-        
-        # Executar scroll inteligente para carregar conteúdo lazy-loaded
-        logger.info("Executando scroll inteligente...")
-        driver.execute_script("""
-            let totalHeight = 0;
-            let distance = 100;
-            let timer = setInterval(() => {
-                let scrollHeight = document.body.scrollHeight;
-                window.scrollBy(0, distance);
-                totalHeight += distance;
-                if(totalHeight >= scrollHeight){
-                    clearInterval(timer);
-                    window.scrollTo(0, 0); // Volta ao topo
-                }
-            }, 100);
-        """)
-        time.sleep(5)
-        
-        # Aguardar mais um pouco para garantir que tudo carregou
-        time.sleep(2)
-        
-        # Remover apenas elementos críticos indesejados (mais seletivo)
-        logger.info("Removendo elementos indesejados...")
-        elementos_criticos = ['script', 'style', 'noscript']
-        for seletor in elementos_criticos:
+        if motivo is None:
             try:
-                elementos = driver.find_elements(By.CSS_SELECTOR, seletor)
-                for elemento in elementos:
-                    driver.execute_script("arguments[0].remove();", elemento)
-            except:
-                continue
+                self._limpar_driver(driver)
+            except Exception as e:
+                logger.warning(f"Falha ao limpar driver do pool: {e}")
+                motivo = 'descartados'
+
+        with self._condicao:
+            if motivo is None and not self._encerrado:
+                self._livres.append(entrada)
+            else:
+                self._total -= 1
+                if motivo is not None:
+                    self._metricas[motivo] += 1
+            self._condicao.notify()
+
+        if motivo is not None or self._encerrado:
+            self._encerrar_driver(driver)
+
+    def obter(self):
+        """Context manager que empresta um driver e o devolve ao final da extração"""
+        pool = self
+
+        class _Emprestimo:
+            def __enter__(self):
+                self.entrada = pool._emprestar()
+                return self.entrada[0]
+
+            def __exit__(self, tipo_excecao, excecao, tb):
+                pool._devolver(self.entrada, falhou=tipo_excecao is not None)
+                return False
+
+        return _Emprestimo()
+
+    def estatisticas(self):
+        """Retorna tamanho, ocupação e tempos de espera do pool"""
+        with self._condicao:
+            emprestimos = self._metricas['emprestimos']
+            return {
+                'tamanho_maximo': self.tamanho,
+                'drivers_ativos': self._total,
+                'drivers_livres': len(self._livres),
+                'drivers_em_uso': self._total - len(self._livres),
+                'max_paginas_por_driver': self.max_paginas,
+                'max_rss_mb': self.max_rss_mb,
+                **self._metricas,
+                'espera_media_s': self._metricas['espera_total_s'] / emprestimos if emprestimos else 0.0
+            }
+
+    def encerrar(self):
+        """Encerra todos os drivers livres; os emprestados são encerrados na devolução"""
+        with self._condicao:
+            self._encerrado = True
+            livres, self._livres = self._livres, []
+            self._total -= len(livres)
+            self._condicao.notify_all()
+        for driver, _ in livres:
+            self._encerrar_driver(driver)
+
+pool_drivers = PoolDrivers(
+    POOL_DRIVERS_TAMANHO,
+    POOL_DRIVERS_MAX_PAGINAS,
+    POOL_DRIVERS_MAX_RSS_MB,
+    POOL_DRIVERS_TIMEOUT_ESPERA
+)
+
+atexit.register(pool_drivers.encerrar)
+
+# Configurações do cliente HTTP compartilhado (método requests)
+HTTP_POOL_HOSTS = int(os.environ.get('EXTRACTO_HTTP_POOL_HOSTS', '20'))
+HTTP_POOL_POR_HOST = int(os.environ.get('EXTRACTO_HTTP_POOL_POR_HOST', '10'))
+HTTP_DNS_TTL = float(os.environ.get('EXTRACTO_DNS_TTL', '300'))
+
+class CacheDNS:
+    """Cache de resoluções DNS com TTL, compartilhado pelas conexões do cliente HTTP"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._enderecos = {}  # (host, porta) -> (expira_em, [ip, ...])
+        self.acertos = 0
+        self.falhas = 0
+
+    def resolver(self, host, porta):
+        chave = (host, porta)
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._enderecos.get(chave)
+            if entrada and entrada[0] > agora:
+                self.acertos += 1
+                return entrada[1]
+            self.falhas += 1
+
+        enderecos = []
+        for _, _, _, _, endereco in socket.getaddrinfo(host, porta, 0, socket.SOCK_STREAM):
+            if endereco[0] not in enderecos:
+                enderecos.append(endereco[0])
+
+        with self._lock:
+            self._enderecos[chave] = (agora + self.ttl, enderecos)
+        return enderecos
+
+def _conexao_com_cache_dns(classe_base, cliente):
+    """Cria uma classe de conexão urllib3 que resolve o host pelo cache DNS do cliente"""
+
+    class ConexaoComCacheDNS(classe_base):
+        def _new_conn(self):
+            host = self._dns_host
+            try:
+                enderecos = cliente.dns.resolver(host, self.port)
+            except OSError:
+                # Deixa a urllib3 reportar o erro de resolução normalmente
+                return super()._new_conn()
+
+            ultimo_erro = None
+            for endereco in enderecos:
+                # Só o socket usa o IP; o SNI/verificação TLS continuam usando o host original
+                self._dns_host = endereco
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    ultimo_erro = e
+                finally:
+                    self._dns_host = host
+            raise ultimo_erro
+
+    return ConexaoComCacheDNS
+
+def _pool_monitorado(classe_base, classe_conexao, cliente):
+    """Cria uma classe de pool urllib3 que conta conexões novas e requisições por host"""
+
+    class PoolMonitorado(classe_base):
+        ConnectionCls = classe_conexao
+
+        def _new_conn(self):
+            cliente.registrar(self.host, 'conexoes_novas')
+            return super()._new_conn()
+
+        def _make_request(self, *args, **kwargs):
+            cliente.registrar(self.host, 'requisicoes')
+            return super()._make_request(*args, **kwargs)
+
+    return PoolMonitorado
+
+class AdaptadorMonitorado(HTTPAdapter):
+    """HTTPAdapter que usa os pools monitorados e o cache DNS do cliente"""
+
+    def __init__(self, cliente, **kwargs):
+        self.cliente = cliente
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _pool_monitorado(
+                HTTPConnectionPool, _conexao_com_cache_dns(HTTPConnection, self.cliente), self.cliente
+            ),
+            'https': _pool_monitorado(
+                HTTPSConnectionPool, _conexao_com_cache_dns(HTTPSConnection, self.cliente), self.cliente
+            )
+        }
+
+class ClienteHTTP:
+    """Cliente HTTP do processo: pools de conexão keep-alive por host, compressão e cache DNS.
+
+    Cada thread usa sua própria requests.Session (cookies e headers não são
+    compartilhados), mas todas montam o mesmo adaptador, então as conexões (e as
+    sessões TLS já negociadas) são reaproveitadas entre requisições e threads.
+    """
+
+    def __init__(self, pool_hosts, pool_por_host, ttl_dns):
+        self.dns = CacheDNS(ttl_dns)
+        self.adaptador = AdaptadorMonitorado(
+            self, pool_connections=pool_hosts, pool_maxsize=pool_por_host
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._por_host = {}
+
+    def sessao(self):
+        """Retorna a sessão da thread atual, criando-a na primeira chamada"""
+        sessao = getattr(self._local, 'sessao', None)
+        if sessao is None:
+            sessao = requests.Session()
+            sessao.mount('http://', self.adaptador)
+            sessao.mount('https://', self.adaptador)
+            self._local.sessao = sessao
+        return sessao
+
+    def get(self, url, **kwargs):
+        return self.sessao().get(url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.sessao().head(url, **kwargs)
+
+    def registrar(self, host, contador):
+        with self._lock:
+            contadores = self._por_host.setdefault(host, {'requisicoes': 0, 'conexoes_novas': 0})
+            contadores[contador] += 1
+
+    def estatisticas(self):
+        """Retorna requisições, conexões novas e reaproveitamentos por host"""
+        with self._lock:
+            hosts = {
+                host: {**c, 'conexoes_reaproveitadas': max(0, c['requisicoes'] - c['conexoes_novas'])}
+                for host, c in self._por_host.items()
+            }
+        totais = {
+            chave: sum(h[chave] for h in hosts.values())
+            for chave in ('requisicoes', 'conexoes_novas', 'conexoes_reaproveitadas')
+        }
+        return {
+            'pool_hosts': self.adaptador._pool_connections,
+            'pool_por_host': self.adaptador._pool_maxsize,
+            'accept_encoding': ACCEPT_ENCODING,
+            'dns': {'ttl': self.dns.ttl, 'acertos': self.dns.acertos, 'falhas': self.dns.falhas},
+            **totais,
+            'hosts': hosts
+        }
+
+cliente_http = ClienteHTTP(HTTP_POOL_HOSTS, HTTP_POOL_POR_HOST, HTTP_DNS_TTL)
+
+# Limite de taxa e circuit breaker por host (método requests)
+HOST_TAXA = float(os.environ.get('EXTRACTO_HOST_TAXA', '5'))
+HOST_RAJADA = float(os.environ.get('EXTRACTO_HOST_RAJADA', '10'))
+HOST_ESPERA_MAX = float(os.environ.get('EXTRACTO_HOST_ESPERA_MAX', '1'))
+HOST_FALHAS_ABERTURA = int(os.environ.get('EXTRACTO_HOST_FALHAS', '5'))
+HOST_TEMPO_ABERTO = float(os.environ.get('EXTRACTO_HOST_TEMPO_ABERTO', '30'))
+
+# Retentativas de falhas transitórias, agendadas fora do worker (fila de jobs e crawl)
+RETENTATIVAS_MAX = int(os.environ.get('EXTRACTO_RETENTATIVAS', '4'))
+RETENTATIVA_ATRASO_BASE = float(os.environ.get('EXTRACTO_RETENTATIVA_ATRASO', '1'))
+RETENTATIVA_ATRASO_MAX = 60.0
+# Espera total (s) que uma extração síncrona (/extrair, lote, stream) aceita em retentativas
+RETENTATIVA_SINCRONA_ESPERA_MAX = float(os.environ.get('EXTRACTO_RETENTATIVA_SINCRONA_ESPERA', '10'))
+
+class FalhaTransitoria(Exception):
+    """Falha que pode dar certo mais tarde; `tentar_apos` indica em quantos segundos"""
+
+    def __init__(self, mensagem, tentar_apos):
+        super().__init__(mensagem)
+        self.tentar_apos = tentar_apos
+
+def segundos_retry_after(valor):
+    """Converte o header Retry-After (segundos ou data HTTP) em segundos; None se ausente/inválido"""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def atraso_retentativa(tentativa):
+    """Backoff exponencial com jitter para a retentativa de número `tentativa` (0, 1, ...)"""
+    import random
+    return min(RETENTATIVA_ATRASO_MAX, RETENTATIVA_ATRASO_BASE * (2 ** tentativa) + random.uniform(0, 1))
+
+class ControleHosts:
+    """Token bucket e circuit breaker por host, compartilhados por todas as extrações.
+
+    Cada host recebe `taxa` requisições por segundo, com rajadas de até `rajada`; uma
+    requisição que precisaria esperar mais que `espera_max` pela próxima ficha é recusada
+    com FalhaTransitoria em vez de prender a thread. Após `falhas_abertura` timeouts ou
+    erros de conexão seguidos o circuito do host abre e as requisições são recusadas por
+    `tempo_aberto` segundos; depois disso uma única requisição de sonda decide se ele
+    fecha novamente ou volta a abrir. Lote e crawl esperam a vez com reserva_antecipada,
+    antes de ocupar as vagas de concorrência.
+    """
+
+    def __init__(self, taxa, rajada, espera_max, falhas_abertura, tempo_aberto):
+        self.taxa = taxa
+        self.rajada = max(1.0, rajada)
+        self.espera_max = espera_max
+        self.falhas_abertura = falhas_abertura
+        self.tempo_aberto = tempo_aberto
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._antecipadas = threading.local()
+
+    @staticmethod
+    def _host(url):
+        from urllib.parse import urlsplit
+        return urlsplit(url).netloc.lower()
+
+    def _estado(self, host, agora):
+        estado = self._hosts.get(host)
+        if estado is None:
+            estado = self._hosts[host] = {
+                'fichas': self.rajada, 'atualizado': agora, 'circuito': 'fechado',
+                'falhas_seguidas': 0, 'aberto_ate': 0.0, 'sondando': False, 'liberado_em': 0.0,
+                'requisicoes': 0, 'limitadas': 0, 'recusadas': 0, 'falhas': 0, 'aberturas': 0,
+                'ultimo_erro': None
+            }
+        elif self.taxa > 0:
+            estado['fichas'] = min(self.rajada, estado['fichas'] + (agora - estado['atualizado']) * self.taxa)
+            estado['atualizado'] = agora
+        return estado
+
+    def reservar(self, url):
+        """Libera uma requisição ao host da URL, esperando no máximo `espera_max` segundos.
+
+        Levanta FalhaTransitoria se o circuito estiver aberto ou se o host estiver
+        limitado por mais tempo que isso. Uma reserva antecipada desta thread para o
+        host é usada sem nova espera.
+        """
+        host = self._host(url)
+        reservas = self._reservas_da_thread()
+        if host in reservas:
+            reservas.discard(host)
+            return
+        agora = time.monotonic()
+        with self._lock:
+            estado = self._estado(host, agora)
+            if estado['circuito'] != 'fechado':
+                if agora < estado['aberto_ate']:
+                    estado['recusadas'] += 1
+                    raise FalhaTransitoria(f"Circuito aberto para {host} após falhas seguidas",
+                                           round(estado['aberto_ate'] - agora, 3))
+                if estado['sondando']:
+                    estado['recusadas'] += 1
+                    raise FalhaTransitoria(f"Aguardando a sonda de {host}", RETENTATIVA_ATRASO_BASE)
+                estado['circuito'] = 'meio_aberto'
+                estado['sondando'] = True
+
+            espera = max(0.0, estado['liberado_em'] - agora)
+            if self.taxa > 0 and estado['fichas'] < 1:
+                espera = max(espera, (1 - estado['fichas']) / self.taxa)
+            if espera > self.espera_max:
+                estado['recusadas'] += 1
+                estado['sondando'] = False
+                raise FalhaTransitoria(f"Limite de requisições atingido para {host}", round(espera, 3))
+            if espera > 0:
+                estado['limitadas'] += 1
+            # A ficha é consumida já (o saldo pode ficar negativo): quem chega depois espera mais
+            estado['fichas'] -= 1
+            estado['requisicoes'] += 1
+
+        if espera > 0:
+            time.sleep(espera)
+
+    def _reservas_da_thread(self):
+        reservas = getattr(self._antecipadas, 'hosts', None)
+        if reservas is None:
+            reservas = self._antecipadas.hosts = set()
+        return reservas
+
+    @contextmanager
+    def reserva_antecipada(self, url):
+        """Espera a vez no host antes do bloco, para que a espera não segure semáforos.
+
+        O reservar de dentro do bloco (nesta thread) usa a reserva feita aqui. Se ela for
+        recusada, o bloco roda sem reserva e a recusa se repete lá dentro; se não for usada
+        (cache, Selenium), a ficha é devolvida ao sair.
+        """
+        host = self._host(url)
+        reservas = self._reservas_da_thread()
+        try:
+            self.reservar(url)
+            reservas.add(host)
+        except FalhaTransitoria:
+            pass
+        try:
+            yield
+        finally:
+            if host in reservas:
+                reservas.discard(host)
+                self._devolver(host)
+
+    def _devolver(self, host):
+        """Desfaz uma reserva não usada: a ficha volta e uma sonda pendente é liberada"""
+        with self._lock:
+            estado = self._estado(host, time.monotonic())
+            estado['fichas'] = min(self.rajada, estado['fichas'] + 1)
+            estado['requisicoes'] -= 1
+            if estado['circuito'] == 'meio_aberto':
+                estado['sondando'] = False
+
+    def registrar_sucesso(self, url):
+        """Fecha o circuito do host após uma resposta da origem"""
+        with self._lock:
+            estado = self._estado(self._host(url), time.monotonic())
+            estado['falhas_seguidas'] = 0
+            estado['circuito'] = 'fechado'
+            estado['sondando'] = False
+
+    def registrar_falha(self, url, erro):
+        """Conta um timeout/erro de conexão; abre o circuito ao atingir o limite ou se a sonda falhar"""
+        host = self._host(url)
+        agora = time.monotonic()
+        with self._lock:
+            estado = self._estado(host, agora)
+            estado['falhas'] += 1
+            estado['falhas_seguidas'] += 1
+            estado['ultimo_erro'] = str(erro)[:200]
+            if estado['circuito'] == 'meio_aberto' or estado['falhas_seguidas'] >= self.falhas_abertura:
+                if estado['circuito'] != 'aberto':
+                    estado['aberturas'] += 1
+                    logger.warning(f"🚧 Circuito aberto para {host} por {self.tempo_aberto:.0f}s")
+                estado['circuito'] = 'aberto'
+                estado['aberto_ate'] = agora + self.tempo_aberto
+            estado['sondando'] = False
+
+    def pausar(self, url, segundos):
+        """Segura novas requisições ao host (ex.: 429/503 com Retry-After)"""
+        with self._lock:
+            estado = self._estado(self._host(url), time.monotonic())
+            estado['liberado_em'] = max(estado['liberado_em'], time.monotonic() + segundos)
+
+    def estatisticas(self):
+        """Retorna a configuração e o estado atual de cada host"""
+        agora = time.monotonic()
+        with self._lock:
+            hosts = {}
+            for host in list(self._hosts):
+                estado = self._estado(host, agora)
+                hosts[host] = {
+                    'circuito': 'meio_aberto' if estado['circuito'] == 'aberto' and agora >= estado['aberto_ate']
+                                else estado['circuito'],
+                    'aberto_por': round(max(0.0, estado['aberto_ate'] - agora), 3),
+                    'pausado_por': round(max(0.0, estado['liberado_em'] - agora), 3),
+                    'fichas': round(estado['fichas'], 3),
+                    'falhas_seguidas': estado['falhas_seguidas'],
+                    'requisicoes': estado['requisicoes'],
+                    'limitadas': estado['limitadas'],
+                    'recusadas': estado['recusadas'],
+                    'falhas': estado['falhas'],
+                    'aberturas': estado['aberturas'],
+                    'ultimo_erro': estado['ultimo_erro']
+                }
+        return {
+            'taxa': self.taxa,
+            'rajada': self.rajada,
+            'espera_max': self.espera_max,
+            'falhas_abertura': self.falhas_abertura,
+            'tempo_aberto': self.tempo_aberto,
+            'retentativas_max': RETENTATIVAS_MAX,
+            'hosts_limitados': sum(1 for h in hosts.values() if h['circuito'] != 'fechado' or h['pausado_por'] or h['fichas'] < 1),
+            'hosts': hosts
+        }
+
+controle_hosts = ControleHosts(HOST_TAXA, HOST_RAJADA, HOST_ESPERA_MAX, HOST_FALHAS_ABERTURA, HOST_TEMPO_ABERTO)
+
+# Limites do download em streaming do método requests (0 desativa o limite)
+DOWNLOAD_MAX_MB = float(os.environ.get('EXTRACTO_DOWNLOAD_MAX_MB', '10'))
+DOWNLOAD_PRAZO_TOTAL = float(os.environ.get('EXTRACTO_DOWNLOAD_PRAZO', '30'))
+DOWNLOAD_TAMANHO_BLOCO = 64 * 1024
+
+# Content-Types aceitos como página; qualquer outro aborta o download antes do corpo
+TIPOS_CONTEUDO_HTML = ('text/html', 'application/xhtml+xml', 'text/plain', 'application/xml', 'text/xml')
+
+# Assinaturas de binários comuns servidos com Content-Type de HTML
+ASSINATURAS_BINARIAS = (b'%PDF', b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'PK\x03\x04', b'\x1f\x8b', b'RIFF')
+
+def blocos_da_resposta(response):
+    """Entrega o corpo em blocos conforme ele chega (read1), para que o prazo valha mesmo
+    com servidores lentos; sem read1 (urllib3 antigo) usa iter_content"""
+    bruto = response.raw
+    if not hasattr(bruto, 'read1'):
+        yield from response.iter_content(DOWNLOAD_TAMANHO_BLOCO)
+        return
+    while True:
+        bloco = bruto.read1(DOWNLOAD_TAMANHO_BLOCO, decode_content=True)
+        if not bloco:
+            return
+        yield bloco
+
+def ler_corpo_limitado(response, max_bytes=None, prazo_total=None):
+    """Lê o corpo da resposta em blocos respeitando o tamanho máximo e o prazo total.
+
+    Aborta antes de ler o corpo se o Content-Type não for de página ou se o
+    Content-Length declarado passar do limite. Retorna um bytearray (sem cópia extra).
+    """
+    max_bytes = int(DOWNLOAD_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+    prazo_total = DOWNLOAD_PRAZO_TOTAL if prazo_total is None else prazo_total
+    
+    try:
+        tipo = response.headers.get('content-type', '').split(';')[0].strip().lower()
+        if tipo and tipo not in TIPOS_CONTEUDO_HTML:
+            raise Exception(f"Conteúdo não é uma página HTML (Content-Type: {tipo})")
+        
+        declarado = response.headers.get('content-length', '')
+        if max_bytes and declarado.isdigit() and int(declarado) > max_bytes:
+            raise Exception(f"Página maior que o limite de {max_bytes // 1024} KB ({int(declarado) // 1024} KB declarados)")
+        
+        corpo = bytearray()
+        inicio = time.time()
+        for bloco in blocos_da_resposta(response):
+            if not corpo and bloco.startswith(ASSINATURAS_BINARIAS):
+                raise Exception("Conteúdo binário recebido com Content-Type de página")
+            corpo += bloco
+            if max_bytes and len(corpo) > max_bytes:
+                raise Exception(f"Página maior que o limite de {max_bytes // 1024} KB")
+            if prazo_total and time.time() - inicio > prazo_total:
+                raise Exception(f"Download excedeu o prazo total de {prazo_total:.0f}s ({len(corpo) // 1024} KB recebidos)")
+        return corpo
+    finally:
+        response.close()
+
+# Quantos bytes do início do corpo são examinados no prescan de <meta charset> e na detecção estatística
+CHARSET_PRESCAN_BYTES = 4096
+CHARSET_AMOSTRA_DETECCAO = 64 * 1024
+
+# Marcas de ordem de bytes (BOM) e o codec que as consome
+BOMS_CHARSET = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+PADRAO_META_CHARSET = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:\-]+)|<\?xml[^>]+encoding\s*=\s*["\']([a-zA-Z0-9_.:\-]+)',
+    re.IGNORECASE
+)
+
+def normalizar_charset(rotulo):
+    """Valida o rótulo de charset e aplica os apelidos usados pelos navegadores"""
+    try:
+        nome = codecs.lookup(rotulo.strip().strip('"\'')).name
+    except (LookupError, AttributeError):
+        return None
+    # Como nos navegadores, latin-1/ascii declarados são lidos como windows-1252
+    if nome in ('latin-1', 'iso8859-1', 'ascii'):
+        return 'cp1252'
+    return nome
+
+def detectar_charset(amostra):
+    """Detecção estatística: UTF-8 válido, senão charset_normalizer (se instalado), senão cp1252"""
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        from charset_normalizer import from_bytes
+        candidatos = from_bytes(amostra)
+        # windows-1252 é o padrão legado da web: fica com ele sempre que for plausível
+        if any(candidato.encoding == 'cp1252' for candidato in candidatos):
+            return 'cp1252'
+        melhor = candidatos.best()
+        if melhor:
+            return normalizar_charset(melhor.encoding) or 'cp1252'
+    except ImportError:
+        pass
+    return 'cp1252'
+
+def resolver_charset(corpo, content_type=''):
+    """Resolve o charset do corpo em uma passagem: BOM, cabeçalho HTTP, <meta> e detecção.
+
+    Retorna (encoding, origem), com origem em 'bom', 'cabecalho', 'meta' ou 'deteccao'.
+    """
+    for bom, encoding in BOMS_CHARSET:
+        if corpo.startswith(bom):
+            return encoding, 'bom'
+    
+    for parametro in content_type.split(';')[1:]:
+        nome, _, valor = parametro.partition('=')
+        if nome.strip().lower() == 'charset':
+            encoding = normalizar_charset(valor)
+            if encoding:
+                return encoding, 'cabecalho'
+    
+    declarado = PADRAO_META_CHARSET.search(corpo, 0, CHARSET_PRESCAN_BYTES)
+    if declarado:
+        encoding = normalizar_charset((declarado.group(1) or declarado.group(2)).decode('ascii'))
+        # Um <meta> lido como ASCII não pode declarar UTF-16/32: como nos navegadores, vale UTF-8
+        if encoding and encoding.startswith(('utf-16', 'utf-32')):
+            encoding = 'utf-8'
+        if encoding:
+            return encoding, 'meta'
+    
+    return detectar_charset(bytes(corpo[:CHARSET_AMOSTRA_DETECCAO])), 'deteccao'
+
+# Configurações do cache de extrações por URL e motor
+CACHE_TTL = float(os.environ.get('EXTRACTO_CACHE_TTL', '600'))
+CACHE_MAX_MB = float(os.environ.get('EXTRACTO_CACHE_MAX_MB', '64'))
+
+def cabecalhos_condicionais(validadores):
+    """Monta If-None-Match/If-Modified-Since a partir dos validadores guardados"""
+    cabecalhos = {}
+    if validadores:
+        if validadores.get('etag'):
+            cabecalhos['If-None-Match'] = validadores['etag']
+        if validadores.get('last_modified'):
+            cabecalhos['If-Modified-Since'] = validadores['last_modified']
+    return cabecalhos
+
+def validadores_da_resposta(response):
+    """Extrai ETag/Last-Modified de uma resposta HTTP"""
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified')
+    }
+
+class CacheExtracoes:
+    """Cache LRU de textos extraídos, por URL e motor, limitado pelo tamanho total.
+
+    Entradas dentro do TTL são servidas direto; entradas vencidas com ETag ou
+    Last-Modified são revalidadas na origem e reaproveitadas se ela responder 304.
+    """
+
+    def __init__(self, ttl, max_bytes):
+        from collections import OrderedDict
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._metricas = {
+            'acertos': 0,
+            'falhas': 0,
+            'revalidados': 0,
+            'modificados': 0,
+            'ignorados': 0,
+            'expulsoes': 0
+        }
+
+    def registrar(self, evento):
+        with self._lock:
+            self._metricas[evento] += 1
+
+    def obter(self, url, motor):
+        """Retorna (entrada, fresca) ou (None, False) se a URL não estiver em cache"""
+        with self._lock:
+            entrada = self._entradas.get((url, motor))
+            if entrada is None:
+                return None, False
+            self._entradas.move_to_end((url, motor))
+            return dict(entrada), time.time() - entrada['armazenado_em'] < self.ttl
+
+    def armazenar(self, url, motor, conteudo, validadores=None):
+        validadores = validadores or {}
+        tamanho = len(conteudo.encode('utf-8'))
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._entradas.pop((url, motor), None)
+            if anterior:
+                self._bytes -= anterior['tamanho']
+            self._entradas[(url, motor)] = {
+                'conteudo': conteudo,
+                'etag': validadores.get('etag'),
+                'last_modified': validadores.get('last_modified'),
+                'armazenado_em': time.time(),
+                'tamanho': tamanho
+            }
+            self._bytes += tamanho
+            # Expulsa as entradas menos usadas até caber no limite
+            while self._bytes > self.max_bytes:
+                _, expulsa = self._entradas.popitem(last=False)
+                self._bytes -= expulsa['tamanho']
+                self._metricas['expulsoes'] += 1
+
+    def renovar(self, url, motor):
+        """Reinicia o TTL de uma entrada revalidada pela origem"""
+        with self._lock:
+            entrada = self._entradas.get((url, motor))
+            if entrada:
+                entrada['armazenado_em'] = time.time()
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                **self._metricas
+            }
+
+cache_extracoes = CacheExtracoes(CACHE_TTL, int(CACHE_MAX_MB * 1024 * 1024))
+
+def consultar_validadores(url):
+    """Obtém ETag/Last-Modified da origem com um HEAD (usado pelo motor Selenium)"""
+    try:
+        response = cliente_http.head(url, timeout=(5, 10), allow_redirects=True)
+        return validadores_da_resposta(response)
+    except Exception as e:
+        logger.warning(f"Não foi possível obter validadores de {url}: {e}")
+        return {}
+
+def origem_nao_modificada(url, validadores):
+    """Faz um GET condicional sem ler o corpo e retorna True se a origem responder 304"""
+    cabecalhos = cabecalhos_condicionais(validadores)
+    if not cabecalhos:
+        return False
+    try:
+        response = cliente_http.get(url, headers=cabecalhos, timeout=(5, 10), stream=True)
+        response.close()
+        return response.status_code == 304
+    except Exception as e:
+        logger.warning(f"Falha ao revalidar {url}: {e}")
+        return False
+
+def coletar_blocos_estrategias(soup, marcacao=None):
+    """Coleta os blocos de texto executando as estratégias sobrepostas originais
+
+    `marcacao` é a MarcacaoSeletores da lista 'principal' (feita aqui se não vier pronta).
+    """
+    if marcacao is None:
+        marcacao = casador_seletores.marcar(soup, ('principal',))
+    # Coletar TODOS os conteúdos possíveis (estratégia múltipla)
+    conteudos_extraidos = []
+    
+    # Estratégia 1: Seletores de conteúdo principal (na ordem da lista, como os soup.select)
+    logger.debug("Extraindo por seletores principais...")
+    for elementos in marcacao.por_seletor['principal'].values():
+        for elemento in elementos:
+            texto = elemento.get_text(separator=' ', strip=True)
+            if len(texto) > 20:  # Reduzido para capturar mais conteúdo
+                conteudos_extraidos.append(('seletor_principal', texto))
+    
+    # Estratégia 2: TODOS os parágrafos
+    logger.debug("Extraindo parágrafos...")
+    paragrafos = soup.find_all('p')
+    for p in paragrafos:
+        texto_p = p.get_text(strip=True)
+        if len(texto_p) > 10:  # Mais inclusivo
+            conteudos_extraidos.append(('paragrafo', texto_p))
+    
+    # Estratégia 3: TODAS as divs com texto significativo
+    logger.debug("Extraindo divs...")
+    divs = soup.find_all('div')
+    for div in divs:
+        texto_div = div.get_text(strip=True)
+        if len(texto_div) > 15 and len(texto_div) < 2000:  # Evita divs muito grandes
+            # Verifica se não é só texto de elementos filhos já capturados
+            texto_direto = div.get_text(strip=True)
+            if texto_direto:
+                conteudos_extraidos.append(('div_conteudo', texto_div))
+    
+    # Estratégia 4: Headers (h1, h2, h3, etc.)
+    logger.debug("Extraindo headers...")
+    for i in range(1, 7):
+        headers = soup.find_all(f'h{i}')
+        for header in headers:
+            texto_header = header.get_text(strip=True)
+            if len(texto_header) > 3:
+                conteudos_extraidos.append(('header', texto_header))
+    
+    # Estratégia 5: Spans com texto
+    logger.debug("Extraindo spans...")
+    spans = soup.find_all('span')
+    for span in spans:
+        texto_span = span.get_text(strip=True)
+        if len(texto_span) > 10:
+            conteudos_extraidos.append(('span', texto_span))
+    
+    # Estratégia 6: Links com texto significativo
+    logger.debug("Extraindo links...")
+    links = soup.find_all('a')
+    for link in links:
+        texto_link = link.get_text(strip=True)
+        if len(texto_link) > 5:
+            conteudos_extraidos.append(('link', texto_link))
+    
+    # Estratégia 7: Listas (ul, ol)
+    logger.debug("Extraindo listas...")
+    listas = soup.find_all(['ul', 'ol'])
+    for lista in listas:
+        texto_lista = lista.get_text(separator=' ', strip=True)
+        if len(texto_lista) > 10:
+            conteudos_extraidos.append(('lista', texto_lista))
+    
+    # Estratégia 8: Tabelas
+    logger.debug("Extraindo tabelas...")
+    tabelas = soup.find_all('table')
+    for tabela in tabelas:
+        texto_tabela = tabela.get_text(separator=' | ', strip=True)
+        if len(texto_tabela) > 10:
+            conteudos_extraidos.append(('tabela', texto_tabela))
+    
+    # Estratégia 9: Fallback para body completo se pouco conteúdo
+    if len(conteudos_extraidos) < 5:
+        logger.debug("Poucos elementos encontrados, usando fallback do body...")
+        body = soup.find('body')
+        if body:
+            texto_body = body.get_text(separator=' ', strip=True)
+            conteudos_extraidos.append(('body_completo', texto_body))
+    
+    return conteudos_extraidos
+
+def compilar_seletor_simples(seletor):
+    """Decompõe um seletor simples em (tipo, nome, valor).
+
+    Tipos: 'tag', 'classe', 'id', 'atributo' ([attr]), 'igual' ([attr="v"]) e
+    'contem' ([attr*="v"]). Seletores compostos levantam exceção na inicialização.
+    """
+    if seletor.startswith('.'):
+        return 'classe', seletor[1:], None
+    if seletor.startswith('#'):
+        return 'id', seletor[1:], None
+    if seletor.startswith('[') and seletor.endswith(']'):
+        corpo = seletor[1:-1]
+        if '*=' in corpo:
+            atributo, valor = corpo.split('*=', 1)
+            return 'contem', atributo.strip(), valor.strip().strip('"\'')
+        atributo, _, valor = corpo.partition('=')
+        if not valor:
+            return 'atributo', atributo.strip(), None
+        return 'igual', atributo.strip(), valor.strip().strip('"\'')
+    if re.fullmatch(r'[a-z][a-z0-9-]*', seletor):
+        return 'tag', seletor, None
+    raise Exception(f"Seletor não suportado pelo casador de seletores: {seletor}")
+
+class MarcacaoSeletores:
+    """Resultado de uma passagem do CasadorSeletores: os seletores que casam com cada nó"""
+
+    def __init__(self, listas):
+        # lista -> seletor -> nós em ordem do documento (seletores na ordem da lista)
+        self.por_seletor = {nome: dict.fromkeys(seletores) for nome, seletores in listas.items()}
+        for seletores in self.por_seletor.values():
+            for seletor in seletores:
+                seletores[seletor] = []
+        self.por_no = {}  # id(nó) -> [(lista, seletor), ...]
+        self._nos = {}    # id(nó) -> nó (mantém os nós vivos enquanto a marcação existir)
+
+    def marcar(self, no, casados):
+        self.por_no[id(no)] = casados
+        self._nos[id(no)] = no
+        for nome, seletor in casados:
+            self.por_seletor[nome][seletor].append(no)
+
+    def seletores(self, no):
+        """(lista, seletor) que casaram com o nó"""
+        return self.por_no.get(id(no), [])
+
+    def casa(self, no, nome):
+        """Verifica se algum seletor da lista `nome` casou com o nó"""
+        return any(lista == nome for lista, _ in self.por_no.get(id(no), ()))
+
+    def nos(self, *nomes):
+        """Nós que casaram com algum seletor das listas `nomes`, em ordem do documento"""
+        return [self._nos[chave] for chave, casados in self.por_no.items()
+                if any(lista in nomes for lista, _ in casados)]
+
+class CasadorSeletores:
+    """Casa todas as listas SELETORES_* com o DOM em uma única passagem pela árvore.
+
+    Cada lista é compilada uma vez em índices por tag, classe, id e atributo; casar um nó
+    custa algumas consultas a dicionários, em vez de um soup.select por seletor (que
+    recompila o seletor e percorre a árvore inteira). Funciona sobre o BeautifulSoup e o
+    lxml.html. Os acertos são contados por seletor (nós e páginas) para identificar os
+    seletores que nunca casam em produção (GET /seletores).
+    """
+
+    def __init__(self, listas):
+        self.listas = {nome: list(seletores) for nome, seletores in listas.items()}
+        self._por_tag = {}
+        self._por_classe = {}
+        self._por_id = {}
+        self._por_atributo = {}  # atributo -> [(tipo, valor, (lista, seletor)), ...]
+        for nome, seletores in self.listas.items():
+            for seletor in seletores:
+                tipo, chave, valor = compilar_seletor_simples(seletor)
+                entrada = (nome, seletor)
+                if tipo == 'tag':
+                    self._por_tag.setdefault(chave, []).append(entrada)
+                elif tipo == 'classe':
+                    self._por_classe.setdefault(chave, []).append(entrada)
+                elif tipo == 'id':
+                    self._por_id.setdefault(chave, []).append(entrada)
+                else:
+                    self._por_atributo.setdefault(chave, []).append((tipo, valor, entrada))
+        self._lock = threading.Lock()
+        self._acertos = {}  # (lista, seletor) -> [nós, páginas]
+        self._passagens = {nome: 0 for nome in self.listas}
+
+    def casar_no(self, tag, atributos):
+        """(lista, seletor) de todos os seletores que casam com a tag e seus atributos"""
+        casados = list(self._por_tag.get(tag, ()))
+        if atributos:
+            classes = atributos.get('class')
+            if classes:
+                if isinstance(classes, str):
+                    classes = classes.split()
+                for classe in dict.fromkeys(classes):
+                    casados.extend(self._por_classe.get(classe, ()))
+            identificador = atributos.get('id')
+            if identificador:
+                casados.extend(self._por_id.get(identificador, ()))
+            for atributo, regras in self._por_atributo.items():
+                valor = atributos.get(atributo)
+                if valor is None:
+                    continue
+                if not isinstance(valor, str):
+                    valor = ' '.join(valor)
+                for tipo, esperado, entrada in regras:
+                    if tipo == 'atributo' or (tipo == 'igual' and valor == esperado) \
+                            or (tipo == 'contem' and esperado and esperado in valor):
+                        casados.append(entrada)
+        return casados
+
+    def marcar(self, raiz, listas, podar=()):
+        """Percorre a árvore (BeautifulSoup ou lxml.html) uma vez e marca os nós das `listas`.
+
+        Um nó que casa com uma lista de `podar` é marcado só com ela e sua subárvore não é
+        visitada (ela será removida). Retorna uma MarcacaoSeletores e soma os acertos.
+        """
+        marcacao = MarcacaoSeletores({nome: self.listas[nome] for nome in listas})
+        lxml = not hasattr(raiz, 'contents')
+        if lxml:
+            pilha = [raiz]
+        else:
+            from bs4 import BeautifulSoup
+            from bs4.element import Tag
+            if isinstance(raiz, BeautifulSoup):
+                pilha = [filho for filho in reversed(raiz.contents) if isinstance(filho, Tag)]
+            else:
+                pilha = [raiz]
+
+        while pilha:
+            no = pilha.pop()
+            if lxml:
+                casados = self.casar_no(no.tag, no.attrib)
+            else:
+                casados = self.casar_no(no.name, no.attrs)
+            casados = [entrada for entrada in casados if entrada[0] in listas]
+            if casados:
+                removidos = [entrada for entrada in casados if entrada[0] in podar]
+                if removidos:
+                    # O nó sai da árvore: não conta como conteúdo principal, nem seus filhos
+                    marcacao.marcar(no, removidos)
+                    continue
+                marcacao.marcar(no, casados)
+            if lxml:
+                pilha.extend(filho for filho in reversed(no) if isinstance(filho.tag, str))
+            else:
+                pilha.extend(filho for filho in reversed(no.contents) if isinstance(filho, Tag))
+
+        self._contar(marcacao)
+        return marcacao
+
+    def _contar(self, marcacao):
+        with self._lock:
+            for nome, seletores in marcacao.por_seletor.items():
+                self._passagens[nome] += 1
+                for seletor, nos in seletores.items():
+                    if nos:
+                        acertos = self._acertos.setdefault((nome, seletor), [0, 0])
+                        acertos[0] += len(nos)
+                        acertos[1] += 1
+
+    def drenar(self):
+        """Retorna e zera os contadores locais (workers do pool de processos)"""
+        with self._lock:
+            contadores = {'acertos': self._acertos, 'passagens': self._passagens}
+            self._acertos = {}
+            self._passagens = {nome: 0 for nome in self.listas}
+        return contadores
+
+    def acumular(self, contadores):
+        """Soma os contadores drenados de outro processo"""
+        with self._lock:
+            for chave, (nos, paginas) in contadores['acertos'].items():
+                acertos = self._acertos.setdefault(chave, [0, 0])
+                acertos[0] += nos
+                acertos[1] += paginas
+            for nome, passagens in contadores['passagens'].items():
+                self._passagens[nome] = self._passagens.get(nome, 0) + passagens
+
+    def estatisticas(self):
+        with self._lock:
+            listas = {}
+            for nome, seletores in self.listas.items():
+                passagens = self._passagens.get(nome, 0)
+                acertos = {seletor: {'nos': self._acertos.get((nome, seletor), [0, 0])[0],
+                                     'paginas': self._acertos.get((nome, seletor), [0, 0])[1]}
+                           for seletor in seletores}
+                listas[nome] = {
+                    'paginas': passagens,
+                    'seletores': acertos,
+                    # Só faz sentido podar depois de muitas páginas observadas
+                    'sem_acertos': [s for s, a in acertos.items() if not a['nos']] if passagens else []
+                }
+            return listas
+
+casador_seletores = CasadorSeletores({
+    'criticos': SELETORES_CRITICOS,
+    'anuncios': SELETORES_ANUNCIOS,
+    'principal': SELETORES_CONTEUDO_PRINCIPAL
+})
+
+def coletar_blocos_passagem_unica(soup, marcacao=None):
+    """Coleta os blocos de texto percorrendo o DOM uma única vez.
+
+    Cada nó de texto é atribuído ao bloco (p, hN, lista, tabela, div...) mais próximo,
+    então o texto de um artigo é lido uma vez só, e não uma vez por div ancestral.
+    `marcacao` é a MarcacaoSeletores da lista 'principal' (feita aqui se não vier pronta).
+    """
+    from bs4.element import NavigableString, PreformattedString
+
+    if marcacao is None:
+        marcacao = casador_seletores.marcar(soup, ('principal',))
+
+    raiz = soup.find('body') or soup
+    # Cada bloco é [tipo, separador, partes, pai]; as partes são textos ou os índices dos
+    # blocos filhos, para que o texto de um filho pequeno demais volte para o pai
+    blocos = [['div_conteudo', ' ', [], None]]
+
+    # Pilha explícita para suportar aninhamentos profundos sem recursão; cada item leva
+    # o bloco mais próximo e os blocos inline (span, a) abertos acima do nó
+    pilha = [(filho, 0, ()) for filho in reversed(raiz.contents)]
+    while pilha:
+        no, indice_bloco, inline = pilha.pop()
+
+        if isinstance(no, NavigableString):
+            if not isinstance(no, PreformattedString):
+                texto = no.strip()
+                if texto:
+                    blocos[indice_bloco][2].append(texto)
+                    for indice_inline in inline:
+                        blocos[indice_inline][2].append(texto)
+            continue
+
+        tipo = TIPOS_BLOCO_DOM.get(no.name)
+        if tipo:
+            if tipo == 'div_conteudo' and marcacao.casa(no, 'principal'):
+                tipo = 'seletor_principal'
+            blocos[indice_bloco][2].append(len(blocos))
+            blocos.append([tipo, ' | ' if tipo == 'tabela' else ' ', [], indice_bloco])
+            indice_bloco = len(blocos) - 1
+        elif no.name in TIPOS_INLINE_DOM:
+            blocos.append([TIPOS_INLINE_DOM[no.name], ' ', [], None])
+            inline = inline + (len(blocos) - 1,)
+
+        pilha.extend((filho, indice_bloco, inline) for filho in reversed(no.contents))
+
+    # Dos filhos para os pais: um bloco abaixo do tamanho mínimo entrega o texto ao pai
+    # (os inline não têm pai: o texto deles já está no bloco que os contém)
+    textos_devolvidos = [''] * len(blocos)
+    aceitos = []
+    for indice in range(len(blocos) - 1, -1, -1):
+        tipo, separador, partes, pai = blocos[indice]
+        texto = separador.join(parte if isinstance(parte, str) else textos_devolvidos[parte]
+                               for parte in partes
+                               if isinstance(parte, str) or textos_devolvidos[parte])
+        if len(texto) > TAMANHO_MINIMO_BLOCO.get(tipo, 10):
+            aceitos.append((tipo, texto))
+        elif pai is not None:
+            textos_devolvidos[indice] = texto
+    conteudos_extraidos = aceitos[::-1]
+
+    # Fallback para body completo se pouco conteúdo (mesmo critério das estratégias)
+    if len(conteudos_extraidos) < 5:
+        logger.debug("Poucos elementos encontrados, usando fallback do body...")
+        texto_body = raiz.get_text(separator=' ', strip=True)
+        if texto_body:
+            conteudos_extraidos.append(('body_completo', texto_body))
+
+    return conteudos_extraidos
+
+# Parâmetros do índice de deduplicação: tamanho dos k-gramas e taxa de amostragem (1 em N)
+DEDUP_TAMANHO_KGRAMA = 8
+DEDUP_AMOSTRAGEM = 8
+
+class DeduplicadorTextos:
+    """Descarta textos repetidos ou contidos em textos já aceitos, em tempo quase linear.
+
+    Mantém a mesma regra da varredura original com any(): um texto é descartado se já
+    foi aceito, se sua versão normalizada está contida em um texto aceito com mais de
+    `tamanho_minimo` caracteres, ou se contém um deles. Em vez de comparar com todos os
+    textos aceitos, cada texto longo é indexado por uma amostra de k-gramas (os de hash
+    divisível por DEDUP_AMOSTRAGEM). Se A contém B, toda amostra de B também é amostra de
+    A, então só os textos que compartilham amostras precisam da comparação exata.
+    """
+
+    def __init__(self, tamanho_minimo=50):
+        self.tamanho_minimo = tamanho_minimo
+        self.textos_unicos = set()
+        self._longos = []          # versões em minúsculas dos textos longos aceitos
+        self._amostras = []        # conjunto de amostras de cada texto longo
+        self._postagens = {}       # amostra -> índices dos textos longos que a contêm
+        self._sem_amostra = []     # textos longos sem nenhuma amostra (verificados diretamente)
+        self._corpus = ''
+        self._corpus_desatualizado = False
+
+    @staticmethod
+    def _amostrar(texto):
+        """Retorna o conjunto de hashes amostrados dos k-gramas do texto"""
+        k = DEDUP_TAMANHO_KGRAMA
+        amostras = set()
+        for i in range(len(texto) - k + 1):
+            h = hash(texto[i:i + k])
+            if h % DEDUP_AMOSTRAGEM == 0:
+                amostras.add(h)
+        return amostras
+
+    def _contido_em_aceito(self, normalizado, amostras):
+        """Verifica se o texto normalizado está contido em algum texto longo aceito"""
+        if amostras:
+            # O texto que o contém precisa ter todas as amostras: basta a postagem mais curta
+            postagem = min((self._postagens.get(h, ()) for h in amostras), key=len)
+            return any(normalizado in self._longos[i] for i in postagem)
+        # Sem amostras (texto curto): uma única busca no corpus concatenado
+        if self._corpus_desatualizado:
+            self._corpus = '\x00'.join(self._longos)
+            self._corpus_desatualizado = False
+        return normalizado in self._corpus
+
+    def _contem_aceito(self, normalizado, amostras):
+        """Verifica se o texto normalizado contém algum texto longo aceito"""
+        candidatos = set()
+        for h in amostras:
+            candidatos.update(self._postagens.get(h, ()))
+        for i in candidatos:
+            if self._amostras[i] <= amostras and self._longos[i] in normalizado:
+                return True
+        return any(longo in normalizado for longo in self._sem_amostra)
+
+    def aceitar(self, texto):
+        """Registra o texto e retorna True se ele for novo (não duplicado nem contido)"""
+        if texto in self.textos_unicos or len(texto.strip()) <= 3:
+            return False
+
+        normalizado = re.sub(r'\s+', ' ', texto.strip().lower())
+        if self._longos:
+            amostras = self._amostrar(normalizado)
+            if self._contido_em_aceito(normalizado, amostras) or self._contem_aceito(normalizado, amostras):
+                return False
+
+        self.textos_unicos.add(texto)
+        if len(texto) > self.tamanho_minimo:
+            minusculo = texto.lower()
+            indice = len(self._longos)
+            amostras_texto = self._amostrar(minusculo)
+            self._longos.append(minusculo)
+            self._amostras.append(amostras_texto)
+            for h in amostras_texto:
+                self._postagens.setdefault(h, []).append(indice)
+            if not amostras_texto:
+                self._sem_amostra.append(minusculo)
+            self._corpus_desatualizado = True
+        return True
+
+# Limites (s) dos buckets dos histogramas de /metrics
+METRICAS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def escapar_rotulo_prometheus(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class MetricasExtracao:
+    """Histogramas e contadores das extrações, exportados no formato de texto do Prometheus.
+
+    Cada observação custa uma busca binária no bucket e um lock curto, então o registro
+    fica ligado sempre. Os rótulos são tuplas de pares (nome, valor) com cardinalidade
+    pequena: motor, etapa, resultado e situação do cache.
+    """
+
+    # nome -> (tipo, ajuda)
+    DESCRICOES = {
+        'extracto_etapa_duracao_segundos': ('histogram', 'Duração de cada etapa da extração'),
+        'extracto_extracao_duracao_segundos': ('histogram', 'Duração total de processar_url'),
+        'extracto_extracoes_total': ('counter', 'Extrações por motor e resultado'),
+        'extracto_cache_total': ('counter', 'Consultas ao cache de extrações por situação')
+    }
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histogramas = {}  # (nome, rótulos) -> [contagens por bucket + inf, soma, total]
+        self._contadores = {}   # (nome, rótulos) -> valor
+
+    def observar(self, nome, rotulos, valor):
+        import bisect
+        indice = bisect.bisect_left(self.buckets, valor)
+        chave = (nome, tuple(rotulos))
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histograma[0][indice] += 1
+            histograma[1] += valor
+            histograma[2] += 1
+
+    def incrementar(self, nome, rotulos, valor=1):
+        chave = (nome, tuple(rotulos))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def registrar_extracao(self, motor, resultado, duracao, etapas, situacao_cache=None):
+        """Registra uma chamada de processar_url: duração total e cada etapa (motor, etapa, duração)"""
+        for motor_etapa, etapa, duracao_etapa in etapas:
+            self.observar('extracto_etapa_duracao_segundos',
+                          (('motor', motor_etapa), ('etapa', etapa), ('resultado', resultado)), duracao_etapa)
+        rotulos = (('motor', motor), ('resultado', resultado))
+        self.observar('extracto_extracao_duracao_segundos', rotulos, duracao)
+        self.incrementar('extracto_extracoes_total', rotulos)
+        if situacao_cache:
+            self.incrementar('extracto_cache_total', (('situacao', situacao_cache),))
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)"""
+        with self._lock:
+            histogramas = {chave: (list(h[0]), h[1], h[2]) for chave, h in self._histogramas.items()}
+            contadores = dict(self._contadores)
+
+        def formatar(rotulos):
+            if not rotulos:
+                return ''
+            return '{' + ','.join(f'{nome}="{escapar_rotulo_prometheus(valor)}"' for nome, valor in rotulos) + '}'
+
+        linhas = []
+        for nome, (tipo, ajuda) in self.DESCRICOES.items():
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} {tipo}')
+            if tipo == 'counter':
+                for (nome_serie, rotulos), valor in sorted(contadores.items()):
+                    if nome_serie == nome:
+                        linhas.append(f'{nome}{formatar(rotulos)} {valor}')
+                continue
+            for (nome_serie, rotulos), (contagens, soma, total) in sorted(histogramas.items()):
+                if nome_serie != nome:
+                    continue
+                acumulado = 0
+                for limite, contagem in zip(self.buckets + (float('inf'),), contagens):
+                    acumulado += contagem
+                    le = '+Inf' if limite == float('inf') else repr(limite)
+                    linhas.append(f'{nome}_bucket{formatar(rotulos + (("le", le),))} {acumulado}')
+                linhas.append(f'{nome}_sum{formatar(rotulos)} {soma:.6f}')
+                linhas.append(f'{nome}_count{formatar(rotulos)} {total}')
+        return '\n'.join(linhas) + '\n'
+
+metricas_extracao = MetricasExtracao(METRICAS_BUCKETS)
+
+def notificar_progresso(progresso, evento, **dados):
+    """Envia um evento de andamento (etapa, titulo, bloco) se a requisição o acompanha"""
+    if progresso is not None:
+        progresso(evento, dados)
+
+def notificar_etapa(progresso, etapa, inicio, **dados):
+    """Notifica o fim de uma etapa com sua duração (s) desde `inicio` (perf_counter)"""
+    notificar_progresso(progresso, 'etapa', etapa=etapa,
+                        duracao=round(time.perf_counter() - inicio, 3), **dados)
+
+def rotular_motor(progresso, motor):
+    """Acrescenta o motor ('requests' ou 'selenium') aos eventos 'etapa' (métricas e SSE)"""
+    if progresso is None:
+        return None
+    
+    def repassar(evento, dados):
+        if evento == 'etapa':
+            dados = {**dados, 'motor': motor}
+        progresso(evento, dados)
+    
+    return repassar
+
+def contar_blocos_por_tipo(conteudos_extraidos):
+    """Quantidade de blocos coletados por estratégia (tipo)"""
+    contagem = {}
+    for tipo, _ in conteudos_extraidos:
+        contagem[tipo] = contagem.get(tipo, 0) + 1
+    return contagem
+
+def selecionar_textos_unicos(conteudos_extraidos, tipos_priorizados, progresso=None):
+    """Ordena os blocos pela prioridade do tipo e mantém apenas os textos únicos
+
+    Um texto aceito nunca é descartado depois, então com `progresso` cada bloco é
+    notificado assim que aceito.
+    """
+    por_tipo = {tipo: [] for tipo in tipos_priorizados}
+    for tipo, texto in conteudos_extraidos:
+        if tipo in por_tipo:
+            por_tipo[tipo].append(texto)
+
+    deduplicador = DeduplicadorTextos()
+    selecionados = []
+    for tipo in tipos_priorizados:
+        for texto in por_tipo[tipo]:
+            if deduplicador.aceitar(texto):
+                notificar_progresso(progresso, 'bloco', indice=len(selecionados), tipo=tipo, texto=texto)
+                selecionados.append(texto)
+    return selecionados
+
+def extrair_blocos_bs4(html_content, motor_dom, links=None, tempos=None):
+    """Faz o parsing com BeautifulSoup e retorna (título, metadados, blocos extraídos)
+
+    Se `links` for uma lista, recebe o href de cada link da página; se `tempos` for um
+    dict, recebe a duração do parsing em 'parse'.
+    """
+    carregar_bs4()
+    
+    # Tentar diferentes parsers
+    inicio_parse = time.perf_counter()
+    soup = None
+    parsers = ['html.parser', 'lxml', 'html5lib']
+    
+    for parser in parsers:
+        try:
+            soup = BeautifulSoup(html_content, parser)
+            logger.debug(f"Parser usado com sucesso: {parser}")
+            break
+        except Exception as e:
+            logger.warning(f"Parser {parser} falhou: {e}")
+            continue
+    
+    if not soup:
+        # Fallback final
+        soup = BeautifulSoup(html_content, 'html.parser')
+        logger.info("Usando html.parser como fallback final")
+    if tempos is not None:
+        tempos['parse'] = time.perf_counter() - inicio_parse
+    
+    # Extrai título
+    titulo = ""
+    if soup.title:
+        titulo = soup.title.get_text().strip()
+    
+    # Extrai metadados
+    metadados = {}
+    try:
+        desc_meta = soup.find('meta', attrs={'name': 'description'})
+        if desc_meta:
+            metadados['description'] = desc_meta.get('content', '')
+    except:
+        pass
+    
+    try:
+        keywords_meta = soup.find('meta', attrs={'name': 'keywords'})
+        if keywords_meta:
+            metadados['keywords'] = keywords_meta.get('content', '')
+    except:
+        pass
+    
+    try:
+        author_meta = soup.find('meta', attrs={'name': 'author'})
+        if author_meta:
+            metadados['author'] = author_meta.get('content', '')
+    except:
+        pass
+    
+    if links is not None:
+        links.extend(ancora['href'] for ancora in soup.find_all('a', href=True))
+    
+    # Uma passagem pelo DOM marca os elementos críticos (scripts e estilos), a publicidade
+    # e o conteúdo principal; as subárvores removidas não são visitadas
+    marcacao = casador_seletores.marcar(soup, ('criticos', 'anuncios', 'principal'),
+                                        podar=('criticos', 'anuncios'))
+    for elemento in marcacao.nos('criticos', 'anuncios'):
+        elemento.decompose()
+    
+    # Coletar TODOS os conteúdos possíveis (estratégia múltipla ou passagem única)
+    if motor_dom == 'passagem_unica':
+        logger.info("Extraindo blocos em passagem única pelo DOM...")
+        conteudos_extraidos = coletar_blocos_passagem_unica(soup, marcacao)
+    else:
+        conteudos_extraidos = coletar_blocos_estrategias(soup, marcacao)
+    
+    return titulo, metadados, conteudos_extraidos
+
+# XPaths do motor lxml, compilados na primeira extração (ver compilar_xpaths_lxml)
+XPATHS_LXML = None
+
+def compilar_xpaths_lxml():
+    """Importa o lxml e pré-compila os XPaths usados pelo motor nativo"""
+    global XPATHS_LXML
+    if XPATHS_LXML is not None:
+        return XPATHS_LXML
+    with _carregamento_lock:
+        if XPATHS_LXML is None:
+            etree = importar_medindo('lxml.etree')
+            importar_medindo('lxml.html')
+            XPATHS_LXML = {
+                'titulo': etree.XPath('(//title)[1]'),
+                'meta': etree.XPath('(//meta[@name=$nome])[1]/@content'),
+                'paragrafo': etree.XPath('//p'),
+                'div': etree.XPath('//div'),
+                'headers': [etree.XPath(f'//h{i}') for i in range(1, 7)],
+                'span': etree.XPath('//span'),
+                'link': etree.XPath('//a'),
+                'lista': etree.XPath('//ul | //ol'),
+                'tabela': etree.XPath('//table'),
+                'body': etree.XPath('(//body)[1]'),
+                'links': etree.XPath('//a/@href'),
+            }
+    return XPATHS_LXML
+
+def texto_lxml(elemento, separador=''):
+    """Equivalente ao get_text(separator, strip=True) do BeautifulSoup para elementos lxml"""
+    partes = []
+    for trecho in elemento.itertext():
+        trecho = trecho.strip()
+        if trecho:
+            partes.append(trecho)
+    return separador.join(partes)
+
+def extrair_blocos_lxml(html_content, links=None, tempos=None):
+    """Faz o parsing direto com lxml.html e retorna (título, metadados, blocos extraídos)
+
+    Reproduz as estratégias de coletar_blocos_estrategias com XPaths pré-compilados e o
+    casador_seletores, sem construir a árvore do BeautifulSoup. Se `links` for uma lista,
+    recebe os hrefs; `tempos` recebe a duração do parsing em 'parse'.
+    """
+    xpaths = compilar_xpaths_lxml()
+    import lxml.html
+    
+    inicio_parse = time.perf_counter()
+    try:
+        documento = lxml.html.document_fromstring(html_content)
+    except ValueError:
+        # Strings com declaração de encoding XML precisam ir como bytes
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+        documento = lxml.html.document_fromstring(html_content.encode('utf-8'), parser=parser)
+    if tempos is not None:
+        tempos['parse'] = time.perf_counter() - inicio_parse
+    
+    # Extrai título e metadados
+    titulo = ""
+    elementos_titulo = xpaths['titulo'](documento)
+    if elementos_titulo:
+        titulo = elementos_titulo[0].text_content().strip()
+    
+    metadados = {}
+    for nome in ('description', 'keywords', 'author'):
+        conteudo = xpaths['meta'](documento, nome=nome)
+        if conteudo:
+            metadados[nome] = str(conteudo[0])
+    
+    if links is not None:
+        links.extend(str(href) for href in xpaths['links'](documento))
+    
+    # Uma passagem marca scripts, estilos, publicidade e o conteúdo principal; os removidos
+    # saem mantendo o texto que vem depois do elemento
+    marcacao = casador_seletores.marcar(documento, ('criticos', 'anuncios', 'principal'),
+                                        podar=('criticos', 'anuncios'))
+    for elemento in marcacao.nos('criticos', 'anuncios'):
+        if elemento.getparent() is not None:
+            elemento.drop_tree()
+    
+    conteudos_extraidos = []
+    
+    # Estratégia 1: Seletores de conteúdo principal
+    for elementos in marcacao.por_seletor['principal'].values():
+        for elemento in elementos:
+            texto = texto_lxml(elemento, ' ')
+            if len(texto) > 20:
+                conteudos_extraidos.append(('seletor_principal', texto))
+    
+    # Estratégia 2: Parágrafos
+    for elemento in xpaths['paragrafo'](documento):
+        texto = texto_lxml(elemento)
+        if len(texto) > 10:
+            conteudos_extraidos.append(('paragrafo', texto))
+    
+    # Estratégia 3: Divs com texto significativo
+    for elemento in xpaths['div'](documento):
+        texto = texto_lxml(elemento)
+        if 15 < len(texto) < 2000:
+            conteudos_extraidos.append(('div_conteudo', texto))
+    
+    # Estratégia 4: Headers (h1 a h6)
+    for xpath in xpaths['headers']:
+        for elemento in xpath(documento):
+            texto = texto_lxml(elemento)
+            if len(texto) > 3:
+                conteudos_extraidos.append(('header', texto))
+    
+    # Estratégias 5 e 6: Spans e links
+    for tipo, chave, minimo in (('span', 'span', 10), ('link', 'link', 5)):
+        for elemento in xpaths[chave](documento):
+            texto = texto_lxml(elemento)
+            if len(texto) > minimo:
+                conteudos_extraidos.append((tipo, texto))
+    
+    # Estratégia 7: Listas (ul, ol)
+    for elemento in xpaths['lista'](documento):
+        texto = texto_lxml(elemento, ' ')
+        if len(texto) > 10:
+            conteudos_extraidos.append(('lista', texto))
+    
+    # Estratégia 8: Tabelas
+    for elemento in xpaths['tabela'](documento):
+        texto = texto_lxml(elemento, ' | ')
+        if len(texto) > 10:
+            conteudos_extraidos.append(('tabela', texto))
+    
+    # Estratégia 9: Fallback para body completo se pouco conteúdo
+    if len(conteudos_extraidos) < 5:
+        body = xpaths['body'](documento)
+        if body:
+            conteudos_extraidos.append(('body_completo', texto_lxml(body[0], ' ')))
+    
+    return titulo, metadados, conteudos_extraidos
+
+def extrair_blocos_html(html_content, motor_dom, links=None, tempos=None):
+    """Executa o motor DOM escolhido sobre o HTML e retorna (título, metadados, blocos extraídos)
+
+    Se `tempos` for um dict, recebe a duração do parsing em 'parse'.
+    """
+    if motor_dom == 'lxml':
+        try:
+            logger.debug("Extraindo blocos com lxml nativo...")
+            return extrair_blocos_lxml(html_content, links, tempos)
+        except Exception as e:
+            logger.warning(f"Motor lxml falhou ({type(e).__name__}: {e}), usando BeautifulSoup")
+            if links is not None:
+                del links[:]
+    return extrair_blocos_bs4(html_content, motor_dom, links, tempos)
+
+def limpar_texto_extraido(texto):
+    """Normaliza o texto final do método requests: espaços, linhas curtas, vazias e repetidas"""
+    if not texto:
+        return texto
+    
+    # Remover linhas vazias excessivas
+    linhas_limpas = []
+    linha_vazia_anterior = False
+    
+    for linha in texto.split('\n'):
+        linha = linha.strip()
+        if linha:
+            # Filtrar linhas muito curtas que podem ser ruído
+            if len(linha) > 3:
+                # Remove múltiplos espaços
+                linha = re.sub(r'\s+', ' ', linha)
+                linhas_limpas.append(linha)
+            linha_vazia_anterior = False
+        elif not linha_vazia_anterior and linhas_limpas:
+            linhas_limpas.append('')
+            linha_vazia_anterior = True
+    
+    # Remover linhas duplicadas consecutivas
+    linhas_finais = []
+    linha_anterior = ""
+    for linha in linhas_limpas:
+        if linha != linha_anterior:
+            linhas_finais.append(linha)
+        linha_anterior = linha
+    
+    return '\n'.join(linhas_finais)
+
+def processar_html(corpo, content_type, url, url_final, motor_dom, coletar_links=False, progresso=None):
+    """Parte de CPU do método requests: dos bytes baixados ao texto final com cabeçalho.
+
+    Decodifica, faz o parsing, coleta, deduplica e limpa os blocos. Retorna um dict com
+    `conteudo`, `charset` e `sinais` (ver sinais_renderizacao). Não depende de estado do
+    processo, então também roda nos workers do pool de processos (ver PoolProcessosCPU).
+    Com `coletar_links`, os links da página saem no evento 'links'. Um `corpo` bytearray
+    (como o de ler_corpo_limitado) é esvaziado logo depois da decodificação.
+    """
+    inicio_etapa = time.perf_counter()
+    
+    # Resolve o charset uma única vez e decodifica o corpo
+    encoding, origem_charset = resolver_charset(corpo, content_type)
+    logger.debug(f"Encoding: {encoding} (origem: {origem_charset})")
+    html_content = corpo.decode(encoding, errors='replace')
+    if isinstance(corpo, bytearray):
+        # Quem chamou ainda referencia o buffer: esvaziá-lo evita manter os bytes junto do texto no parsing
+        corpo.clear()
+    notificar_etapa(progresso, 'decodificacao', inicio_etapa, encoding=encoding, origem=origem_charset)
+    inicio_etapa = time.perf_counter()
+    
+    # Parsing e coleta dos blocos pelo motor escolhido
+    links = [] if coletar_links else None
+    tempos_dom = {}
+    titulo, metadados, conteudos_extraidos = extrair_blocos_html(html_content, motor_dom, links, tempos_dom)
+    duracao_parse = tempos_dom.get('parse', 0.0)
+    notificar_progresso(progresso, 'etapa', etapa='parse', duracao=round(duracao_parse, 3), motor_dom=motor_dom)
+    notificar_progresso(progresso, 'titulo', titulo=titulo)
+    notificar_progresso(progresso, 'metadados', metadados=metadados)
+    if links is not None:
+        from urllib.parse import urljoin
+        notificar_progresso(progresso, 'links', links=[urljoin(url_final, href) for href in links])
+    # O motor faz o parsing e a coleta juntos: 'estrategias' conta só a coleta
+    notificar_etapa(progresso, 'estrategias', inicio_etapa + duracao_parse, motor_dom=motor_dom,
+                    blocos=contar_blocos_por_tipo(conteudos_extraidos))
+    inicio_etapa = time.perf_counter()
+    
+    # Combinar TODOS os conteúdos únicos
+    logger.debug(f"Total de elementos extraídos: {len(conteudos_extraidos)}")
+    # Priorizar por tipo e adicionar conteúdos únicos (evita duplicatas muito similares)
+    tipos_priorizados = ['header', 'seletor_principal', 'paragrafo', 'div_conteudo', 
+                       'lista', 'tabela', 'span', 'link', 'body_completo']
+    conteudo_final_partes = selecionar_textos_unicos(conteudos_extraidos, tipos_priorizados, progresso)
+    notificar_etapa(progresso, 'deduplicacao', inicio_etapa, blocos=len(conteudo_final_partes))
+    
+    melhor_conteudo = '\n\n'.join(conteudo_final_partes)
+    
+    # Limpar e processar o texto final
+    inicio_etapa = time.perf_counter()
+    melhor_conteudo = limpar_texto_extraido(melhor_conteudo)
+    notificar_etapa(progresso, 'limpeza', inicio_etapa, caracteres=len(melhor_conteudo))
+    
+    # Sinais de página renderizada no cliente, usados pelo modo adaptativo
+    sinais = sinais_renderizacao(html_content, melhor_conteudo, conteudos_extraidos)
+    
+    # Montar conteúdo final com metadados
+    conteudo_final = f"=== EXTRAÇÃO AVANÇADA DE TEXTO by @valentelucass ===\n"
+    conteudo_final += f"TÍTULO: {titulo}\n"
+    conteudo_final += f"URL: {url}\n"
+    conteudo_final += f"DATA: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
+    conteudo_final += f"MÉTODO: Requests + BeautifulSoup (Vercel)\n"
+    if motor_dom != 'estrategias':
+        conteudo_final += f"MOTOR DOM: {motor_dom}\n"
+    
+    if metadados.get('description'):
+        conteudo_final += f"DESCRIÇÃO: {metadados['description']}\n"
+    if metadados.get('author'):
+        conteudo_final += f"AUTOR: {metadados['author']}\n"
+    if metadados.get('keywords'):
+        conteudo_final += f"PALAVRAS-CHAVE: {metadados['keywords']}\n"
+    
+    conteudo_final += "=" * 60 + "\n\n"
+    conteudo_final += melhor_conteudo if melhor_conteudo else "Nenhum conteúdo significativo encontrado."
+    
+    return {
+        'conteudo': conteudo_final,
+        'charset': {'encoding': encoding, 'origem': origem_charset},
+        'sinais': sinais
+    }
+
+def processar_html_isolado(argumentos, acompanhado):
+    """Executa processar_html num worker do pool, guardando os eventos para o processo pai.
+
+    Retorna (resultado, eventos, duração em s); os eventos são repetidos no `progresso`
+    da requisição quando o resultado volta (ver PoolProcessosCPU.processar). Os acertos
+    de seletores do worker seguem no resultado, em 'acertos_seletores'.
+    """
+    inicio = time.perf_counter()
+    eventos = [] if acompanhado else None
+    progresso = (lambda evento, dados: eventos.append((evento, dados))) if acompanhado else None
+    resultado = processar_html(*argumentos, progresso=progresso)
+    resultado['acertos_seletores'] = casador_seletores.drenar()
+    return resultado, eventos, time.perf_counter() - inicio
+
+def iniciar_worker_processos_cpu():
+    """Inicializador dos workers: carrega os parsers uma vez por processo"""
+    carregar_bs4()
+
+# Pool de processos para a parte de CPU do método requests (0 = na própria thread)
+PROCESSOS_CPU = int(os.environ.get('EXTRACTO_PROCESSOS_CPU', '0'))
+PROCESSOS_CPU_MAX_TAREFAS = int(os.environ.get('EXTRACTO_PROCESSOS_CPU_MAX_TAREFAS', '200'))
+
+class PoolProcessosCPU:
+    """Pool de processos que tira do GIL o parsing e a extração (bytes -> texto final).
+
+    Os downloads continuam nas threads; só o corpo baixado atravessa para um worker, que
+    devolve o texto final e os eventos de andamento. Os workers usam o contexto `spawn`
+    (seguro com threads e drivers vivos) e são reciclados a cada `max_tarefas` páginas
+    para conter o crescimento de memória do parser. Se um worker morrer, o pool é
+    recriado na próxima chamada.
+    """
+
+    def __init__(self, tamanho, max_tarefas):
+        self.tamanho = tamanho
+        self.max_tarefas = max_tarefas
+        self._lock = threading.Lock()
+        self._executor = None
+        self._tarefas_executor = 0   # usado só sem max_tasks_per_child (Python < 3.11)
+        self._recicla_sozinho = True
+        self._encerrado = False
+        self._metricas = {
+            'tarefas': 0,
+            'falhas': 0,
+            'pools_criados': 0,
+            'pools_recriados': 0,
+            'tempo_worker_s': 0.0,
+            'sobrecarga_s': 0.0
+        }
+
+    @property
+    def ativo(self):
+        return self.tamanho > 0 and not self._encerrado
+
+    def _criar_executor(self):
+        from concurrent.futures import ProcessPoolExecutor
+        contexto = multiprocessing.get_context('spawn')
+        try:
+            executor = ProcessPoolExecutor(max_workers=self.tamanho, mp_context=contexto,
+                                           initializer=iniciar_worker_processos_cpu,
+                                           max_tasks_per_child=self.max_tarefas)
+            self._recicla_sozinho = True
+        except TypeError:
+            executor = ProcessPoolExecutor(max_workers=self.tamanho, mp_context=contexto,
+                                           initializer=iniciar_worker_processos_cpu)
+            self._recicla_sozinho = False
+        self._tarefas_executor = 0
+        self._metricas['pools_criados'] += 1
+        logger.info(f"⚙️ Pool de processos iniciado ({self.tamanho} workers)")
+        return executor
+
+    def _obter_executor(self):
+        with self._lock:
+            if self._encerrado:
+                raise Exception("Pool de processos encerrado")
+            if (self._executor is not None and not self._recicla_sozinho
+                    and self._tarefas_executor >= self.tamanho * self.max_tarefas):
+                # Sem max_tasks_per_child: troca o pool inteiro após tamanho × max_tarefas
+                antigo, self._executor = self._executor, None
+                antigo.shutdown(wait=False)
+            if self._executor is None:
+                self._executor = self._criar_executor()
+            self._tarefas_executor += 1
+            return self._executor
+
+    def _descartar_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._metricas['pools_recriados'] += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def processar(self, argumentos, progresso=None):
+        """Roda processar_html(*argumentos) num worker e repete os eventos em `progresso`"""
+        from concurrent.futures.process import BrokenProcessPool
+        inicio = time.perf_counter()
+        executor = self._obter_executor()
+        try:
+            resultado, eventos, duracao_worker = executor.submit(
+                processar_html_isolado, argumentos, progresso is not None).result()
+        except BrokenProcessPool:
+            logger.warning("⚠️ Worker do pool de processos morreu, recriando o pool")
+            self._descartar_executor(executor)
+            with self._lock:
+                self._metricas['falhas'] += 1
+            raise Exception("Worker do pool de processos terminou inesperadamente")
+        except Exception:
+            with self._lock:
+                self._metricas['falhas'] += 1
+            raise
+        
+        sobrecarga = max(0.0, time.perf_counter() - inicio - duracao_worker)
+        casador_seletores.acumular(resultado.pop('acertos_seletores'))
+        with self._lock:
+            self._metricas['tarefas'] += 1
+            self._metricas['tempo_worker_s'] += duracao_worker
+            self._metricas['sobrecarga_s'] += sobrecarga
+        
+        for evento, dados in eventos or ():
+            progresso(evento, dados)
+        # Fila, serialização do corpo e do resultado entre os processos
+        notificar_progresso(progresso, 'etapa', etapa='pool_processos', duracao=round(sobrecarga, 3))
+        return resultado
+
+    def estatisticas(self):
+        with self._lock:
+            tarefas = self._metricas['tarefas']
+            return {
+                'ativo': self.ativo,
+                'tamanho': self.tamanho,
+                'max_tarefas_por_worker': self.max_tarefas,
+                'iniciado': self._executor is not None,
+                **{chave: round(valor, 3) if isinstance(valor, float) else valor
+                   for chave, valor in self._metricas.items()},
+                'sobrecarga_media_ms': round(self._metricas['sobrecarga_s'] / tarefas * 1000, 2) if tarefas else None
+            }
+
+    def encerrar(self):
+        """Encerra os workers; as extrações seguintes voltam a rodar na própria thread"""
+        with self._lock:
+            self._encerrado = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+pool_processos_cpu = PoolProcessosCPU(PROCESSOS_CPU, PROCESSOS_CPU_MAX_TAREFAS)
+
+atexit.register(pool_processos_cpu.encerrar)
+
+def extrair_com_requests(url, motor_dom=None, validadores=None, info_resposta=None, progresso=None, tentativa=0):
+    """Extrai conteúdo usando requests + BeautifulSoup (para Vercel) - VERSÃO ROBUSTA
+
+    Com `validadores` ({'etag', 'last_modified'}) a requisição é condicional e a função
+    retorna None se a origem responder 304. Se `info_resposta` for um dict, ele recebe
+    o status e os validadores (ETag/Last-Modified) da resposta. `progresso` recebe os
+    eventos de andamento (veja notificar_progresso). `tentativa` (0, 1, ...) escolhe os
+    timeouts progressivos; timeouts, erros de conexão e 429/503 levantam FalhaTransitoria.
+    """
+    import time
+    import random
+    
+    progresso = rotular_motor(progresso, 'requests')
+    try:
+        logger.debug("=== USANDO MÉTODO REQUESTS + BEAUTIFULSOUP ROBUSTO ===")
         
-        # Remove elementos de publicidade
-        seletores_ads = ['.advertisement', '.ads', '.ad', '.banner-ad', '.google-ads', 
-                        '.adsense', '.sponsored', '.promo', '.promotion']
-        for seletor in seletores_ads:
-            try:
-                elementos = driver.find_elements(By.CSS_SELECTOR, seletor)
-                for elemento in elementos:
-                    driver.execute_script("arguments[0].remove();", elemento)
-            except:
-                continue
+        motor_dom = motor_dom or MOTOR_DOM_PADRAO
+        if motor_dom not in MOTORES_DOM:
+            raise ValueError(f"Motor DOM inválido: {motor_dom}. Opções: {', '.join(MOTORES_DOM)}")
+        logger.debug(f"Motor DOM: {motor_dom}")
         
-        # Coletar TODOS os conteúdos possíveis (estratégia múltipla)
-        conteudos_extraidos = []
+        # Múltiplos User-Agents para evitar bloqueios
+        user_agents = [
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0'
+        ]
         
-        # Estratégia 1: Seletores de conteúdo principal
-        logger.info("Extraindo por seletores principais...")
-        for seletor in SELETORES_CONTEUDO_PRINCIPAL:
-            try:
-                elementos = driver.find_elements(By.CSS_SELECTOR, seletor)
-                for elemento in elementos:
-                    texto = elemento.text.strip()
-                    if len(texto) > 20:  # Reduzido para capturar mais conteúdo
-                        conteudos_extraidos.append(('seletor_principal', texto))
-            except:
-                continue
+        # Configurações de timeout progressivas
+        timeout_configs = [
+            (5, 10),   # (connect_timeout, read_timeout)
+            (10, 15),
+            (15, 25),
+            (20, 30)
+        ]
         
-        # Estratégia 2: TODOS os parágrafos
-        logger.info("Extraindo parágrafos...")
-        try:
-            paragrafos = driver.find_elements(By.TAG_NAME, 'p')
-            for p in paragrafos:
-                texto_p = p.text.strip()
-                if len(texto_p) > 10:  # Mais inclusivo
-                    conteudos_extraidos.append(('paragrafo', texto_p))
-        except:
-            pass
+        logger.debug(f"Fazendo requisição para: {url}")
+        
+        # Uma tentativa por chamada: falhas transitórias levantam FalhaTransitoria com o
+        # atraso sugerido e a retentativa é agendada por quem chamou, sem dormir nesta thread
+        connect_timeout, read_timeout = timeout_configs[min(tentativa, len(timeout_configs)-1)]
+        inicio_etapa = time.perf_counter()
+        
+        headers = {
+            'User-Agent': random.choice(user_agents),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8,es;q=0.7',
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Cache-Control': 'no-cache',
+            'DNT': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none'
+        }
+        headers.update(cabecalhos_condicionais(validadores))
         
-        # Estratégia 3: TODAS as divs com texto significativo
-        logger.info("Extraindo divs...")
-        try:
-            divs = driver.find_elements(By.TAG_NAME, 'div')
-            for div in divs:
-                texto_div = div.text.strip()
-                if len(texto_div) > 15 and len(texto_div) < 3000:  # Mais flexível
-                    conteudos_extraidos.append(('div_conteudo', texto_div))
-        except:
-            pass
+        # Token bucket e circuit breaker do host
+        controle_hosts.reservar(url)
+        logger.debug(f"Tentativa {tentativa + 1}/{RETENTATIVAS_MAX} - Timeout: {connect_timeout}s/{read_timeout}s")
         
-        # Estratégia 4: Spans com texto
-        logger.info("Extraindo spans...")
         try:
-            spans = driver.find_elements(By.TAG_NAME, 'span')
-            for span in spans:
-                texto_span = span.text.strip()
-                if len(texto_span) > 10:
-                    conteudos_extraidos.append(('span', texto_span))
-        except:
-            pass
-        
-        # Estratégia 5: Headers (h1, h2, h3, etc.)
-        logger.info("Extraindo headers...")
+            response = cliente_http.get(
+                url, 
+                headers=headers,
+                timeout=(connect_timeout, read_timeout),
+                allow_redirects=True,
+                verify=True,
+                stream=True
+            )
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            logger.warning(f"🔌 Timeout/erro de conexão na tentativa {tentativa + 1}: {e}")
+            controle_hosts.registrar_falha(url, e)
+            raise FalhaTransitoria(f"Falha de rede ao acessar a página: {e}", round(atraso_retentativa(tentativa), 3))
+        controle_hosts.registrar_sucesso(url)
+        
+        if response.status_code in (429, 503):
+            # A origem pediu para esperar: o host fica pausado para todas as extrações
+            response.close()
+            espera = segundos_retry_after(response.headers.get('Retry-After'))
+            if espera is None:
+                espera = atraso_retentativa(tentativa)
+            controle_hosts.pausar(url, espera)
+            raise FalhaTransitoria(f"A origem pediu para aguardar (HTTP {response.status_code})", round(espera, 3))
+        if response.status_code >= 400:
+            response.close()
+        response.raise_for_status()
+        
+        logger.debug(f"Resposta recebida: {response.status_code}")
+        
+        if info_resposta is not None:
+            info_resposta.update(validadores_da_resposta(response))
+            info_resposta['status'] = response.status_code
+        
+        if response.status_code == 304:
+            logger.info("Conteúdo não modificado na origem (304)")
+            response.close()
+            return None
+        logger.debug(f"Content-Type: {response.headers.get('content-type', 'N/A')}")
+        
+        # Lê o corpo em streaming, com limite de tamanho e prazo total; a conexão pode cair
+        # ou estourar o timeout de leitura no meio do corpo, o que também é transitório
         try:
-            for i in range(1, 7):
-                headers = driver.find_elements(By.TAG_NAME, f'h{i}')
-                for header in headers:
-                    texto_header = header.text.strip()
-                    if len(texto_header) > 3:
-                        conteudos_extraidos.append(('header', texto_header))
-        except:
-            pass
+            corpo = ler_corpo_limitado(response)
+        except (ReadTimeoutError, ProtocolError, socket.timeout, requests.exceptions.Timeout,
+                requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+            logger.warning(f"🔌 Falha ao ler o corpo na tentativa {tentativa + 1}: {e}")
+            controle_hosts.registrar_falha(url, e)
+            raise FalhaTransitoria(f"Falha de rede ao ler a página: {e}", round(atraso_retentativa(tentativa), 3))
+        logger.debug(f"Content-Length: {len(corpo)} bytes")
+        notificar_etapa(progresso, 'download', inicio_etapa, bytes=len(corpo), status=response.status_code)
+        
+        # Dos bytes ao texto final: CPU pura, feita no pool de processos quando ele está ativo
+        argumentos = (corpo, response.headers.get('content-type', ''), url, response.url, motor_dom,
+                      progresso is not None)
+        if pool_processos_cpu.ativo:
+            resultado = pool_processos_cpu.processar(argumentos, progresso)
+        else:
+            resultado = processar_html(*argumentos, progresso=progresso)
         
-        # Estratégia 6: Links com texto significativo
-        logger.info("Extraindo links...")
+        if info_resposta is not None:
+            info_resposta['charset'] = resultado['charset']
+            info_resposta['sinais'] = resultado['sinais']
+        
+        logger.debug(f"Conteúdo extraído com sucesso: {len(resultado['conteudo'])} caracteres")
+        return resultado['conteudo']
+        
+    except Exception as e:
+        logger.error(f"Erro na extração com requests: {e}")
+        raise
+
+# Armazenamento dos resultados: o arquivo visível em RESULTS_DIR é uma referência leve com
+# o cabeçalho (onde fica a linha DATA, que muda a cada extração) e o corpo vai comprimido
+# para objetos/, endereçado pelo SHA-256. 'texto' grava o .txt completo como antes.
+ARMAZENAMENTO_MODO = os.environ.get('EXTRACTO_ARMAZENAMENTO', 'comprimido')
+ARMAZENAMENTO_NIVEL_GZIP = int(os.environ.get('EXTRACTO_GZIP_NIVEL', '6'))
+# Objetos sem referência são apagados só depois dessa idade (s), para não correr com gravações
+ARMAZENAMENTO_CARENCIA_OBJETOS = float(os.environ.get('EXTRACTO_OBJETOS_CARENCIA', '600'))
+
+# Fim do cabeçalho dos resultados (ver extrair_com_requests / extrair_conteudo_avancado)
+SEPARADOR_CABECALHO = '=' * 60 + '\n\n'
+MARCA_REFERENCIA = b'{"extracto_ref"'
+
+def hash_conteudo(dados):
+    """SHA-256 (hex) do conteúdo de um resultado"""
+    import hashlib
+    if isinstance(dados, str):
+        dados = dados.encode('utf-8')
+    return hashlib.sha256(dados).hexdigest()
+
+def separar_cabecalho(conteudo):
+    """Divide o resultado em (cabeçalho até o separador, corpo)"""
+    posicao = conteudo.find(SEPARADOR_CABECALHO)
+    if posicao < 0:
+        return '', conteudo
+    posicao += len(SEPARADOR_CABECALHO)
+    return conteudo[:posicao], conteudo[posicao:]
+
+def url_do_cabecalho(cabecalho):
+    """Lê a linha 'URL:' do cabeçalho de um resultado"""
+    for linha in cabecalho.split('\n')[:6]:
+        if linha.startswith('URL: '):
+            return linha[len('URL: '):].strip()
+    return None
+
+def _gf2_vezes_matriz(matriz, vetor):
+    soma = 0
+    indice = 0
+    while vetor:
+        if vetor & 1:
+            soma ^= matriz[indice]
+        vetor >>= 1
+        indice += 1
+    return soma
+
+def _gf2_quadrado(matriz):
+    return [_gf2_vezes_matriz(matriz, linha) for linha in matriz]
+
+def crc32_combinar(crc1, crc2, tamanho2):
+    """CRC-32 de a + b a partir de crc32(a), crc32(b) e len(b) (crc32_combine do zlib)"""
+    if tamanho2 <= 0:
+        return crc1
+    impar = [0xEDB88320] + [1 << i for i in range(31)]
+    par = _gf2_quadrado(impar)
+    impar = _gf2_quadrado(par)
+    while True:
+        par = _gf2_quadrado(impar)
+        if tamanho2 & 1:
+            crc1 = _gf2_vezes_matriz(par, crc1)
+        tamanho2 >>= 1
+        if not tamanho2:
+            break
+        impar = _gf2_quadrado(par)
+        if tamanho2 & 1:
+            crc1 = _gf2_vezes_matriz(impar, crc1)
+        tamanho2 >>= 1
+        if not tamanho2:
+            break
+    return crc1 ^ crc2
+
+class ArmazenamentoResultados:
+    """Grava e lê os resultados de RESULTS_DIR, com corpos comprimidos e deduplicados.
+
+    Cada objeto é um gzip de um único membro e cabeçalho mínimo; para servir o
+    arquivo comprimido, o cabeçalho é comprimido na hora e o corpo segue como está.
+    Arquivos .txt completos (gravados antes ou no modo 'texto') continuam legíveis.
+    """
+
+    def __init__(self, diretorio, modo, nivel_gzip):
+        self.diretorio = diretorio
+        self.diretorio_objetos = os.path.join(diretorio, 'objetos')
+        self.modo = modo
+        self.nivel_gzip = nivel_gzip
+        self._lock = threading.Lock()
+        self._metricas = {
+            'gravacoes': 0,
+            'objetos_novos': 0,
+            'objetos_reaproveitados': 0,
+            'bytes_texto': 0,
+            'bytes_gravados': 0,
+            'objetos_apagados': 0
+        }
+
+    def _registrar(self, **incrementos):
+        with self._lock:
+            for chave, valor in incrementos.items():
+                self._metricas[chave] += valor
+
+    def caminho_objeto(self, hash_):
+        return os.path.join(self.diretorio_objetos, hash_[:2], hash_ + '.gz')
+
+    def _gravar_atomico(self, caminho, dados):
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+
+    def gravar(self, nome, conteudo):
+        """Grava o resultado e retorna {'tamanho' (bytes do texto), 'hash' (do corpo), 'reaproveitado'}"""
+        import zlib
+        caminho = os.path.join(self.diretorio, nome)
+        cabecalho, corpo = separar_cabecalho(conteudo)
+        dados_corpo = corpo.encode('utf-8')
+        hash_ = hash_conteudo(dados_corpo)
+        tamanho = len(cabecalho.encode('utf-8')) + len(dados_corpo)
+        
+        if self.modo == 'texto':
+            self._gravar_atomico(caminho, conteudo.encode('utf-8'))
+            self._registrar(gravacoes=1, bytes_texto=tamanho, bytes_gravados=tamanho)
+            return {'tamanho': tamanho, 'hash': hash_, 'reaproveitado': False}
+        
+        caminho_objeto = self.caminho_objeto(hash_)
+        reaproveitado = os.path.exists(caminho_objeto)
+        gravados = 0
+        if reaproveitado:
+            # Renova a idade do objeto para a coleta de órfãos não apagá-lo agora
+            os.utime(caminho_objeto)
+        else:
+            os.makedirs(os.path.dirname(caminho_objeto), exist_ok=True)
+            compressor = zlib.compressobj(self.nivel_gzip, zlib.DEFLATED, 31)
+            comprimido = compressor.compress(dados_corpo) + compressor.flush()
+            self._gravar_atomico(caminho_objeto, comprimido)
+            gravados += len(comprimido)
+        
+        referencia = json.dumps({
+            'extracto_ref': 1,
+            'objeto': hash_,
+            'tamanho': tamanho,
+            'cabecalho': cabecalho
+        }, ensure_ascii=False).encode('utf-8')
+        self._gravar_atomico(caminho, referencia)
+        gravados += len(referencia)
+        
+        self._registrar(
+            gravacoes=1, bytes_texto=tamanho, bytes_gravados=gravados,
+            **{'objetos_reaproveitados' if reaproveitado else 'objetos_novos': 1}
+        )
+        return {'tamanho': tamanho, 'hash': hash_, 'reaproveitado': reaproveitado}
+
+    def referencia(self, nome):
+        """Retorna a referência (dict) do arquivo, ou None se for um .txt completo (OSError se não existir)"""
+        with open(os.path.join(self.diretorio, nome), 'rb') as f:
+            if f.read(len(MARCA_REFERENCIA)) != MARCA_REFERENCIA:
+                return None
+            f.seek(0)
+            return json.loads(f.read().decode('utf-8'))
+
+    def blocos(self, nome):
+        """Abre o resultado e retorna um iterador sobre o texto completo, em bytes (OSError se não existir)"""
+        import gzip
+        referencia = self.referencia(nome)
+        if referencia is None:
+            return self._iterar([], open(os.path.join(self.diretorio, nome), 'rb'))
+        objeto = gzip.open(self.caminho_objeto(referencia['objeto']), 'rb')
+        return self._iterar([referencia['cabecalho'].encode('utf-8')], objeto)
+
+    def _iterar(self, iniciais, arquivo):
+        with arquivo:
+            yield from iniciais
+            while True:
+                bloco = arquivo.read(DOWNLOAD_TAMANHO_BLOCO)
+                if not bloco:
+                    return
+                yield bloco
+
+    def ler(self, nome):
+        """Texto completo do resultado"""
+        return b''.join(self.blocos(nome)).decode('utf-8')
+
+    def gzip_direto(self, nome):
+        """Retorna (tamanho, iterador) com o resultado já em gzip, sem recomprimir o corpo,
+        ou None se o arquivo não estiver no formato comprimido"""
+        import zlib
+        import struct
+        referencia = self.referencia(nome)
+        if referencia is None:
+            return None
+        caminho_objeto = self.caminho_objeto(referencia['objeto'])
+        objeto = open(caminho_objeto, 'rb')
+        cabecalho_gzip = objeto.read(10)
+        tamanho_objeto = os.fstat(objeto.fileno()).st_size
+        # Só objetos de cabeçalho mínimo (sem FNAME/FEXTRA...), como os gravados por gravar()
+        if len(cabecalho_gzip) < 10 or cabecalho_gzip[:3] != b'\x1f\x8b\x08' or cabecalho_gzip[3] != 0:
+            objeto.close()
+            return None
+        objeto.seek(tamanho_objeto - 8)
+        crc_corpo, tamanho_corpo = struct.unpack('<II', objeto.read(8))
+        
+        texto_cabecalho = referencia['cabecalho'].encode('utf-8')
+        compressor = zlib.compressobj(self.nivel_gzip, zlib.DEFLATED, -15)
+        # Blocos não finais terminados em fronteira de byte: o deflate do corpo continua em seguida
+        deflate_cabecalho = compressor.compress(texto_cabecalho) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        crc_total = crc32_combinar(zlib.crc32(texto_cabecalho), crc_corpo, tamanho_corpo)
+        trailer = struct.pack('<II', crc_total, (len(texto_cabecalho) + tamanho_corpo) & 0xFFFFFFFF)
+        
+        def gerar():
+            with objeto:
+                yield cabecalho_gzip + deflate_cabecalho
+                objeto.seek(10)
+                restante = tamanho_objeto - 18
+                while restante > 0:
+                    bloco = objeto.read(min(DOWNLOAD_TAMANHO_BLOCO, restante))
+                    if not bloco:
+                        break
+                    restante -= len(bloco)
+                    yield bloco
+                yield trailer
+        
+        tamanho = 10 + len(deflate_cabecalho) + (tamanho_objeto - 18) + 8
+        return tamanho, gerar()
+
+    def informacoes(self, caminho):
+        """Tamanho do texto, hash do corpo e URL de um arquivo de RESULTS_DIR (usado na reconciliação)"""
+        nome = os.path.basename(caminho)
+        referencia = self.referencia(nome)
+        if referencia is not None:
+            return {
+                'tamanho': referencia['tamanho'],
+                'hash': referencia['objeto'],
+                'url': url_do_cabecalho(referencia['cabecalho'])
+            }
+        with open(caminho, 'rb') as f:
+            dados = f.read()
+        cabecalho, corpo = separar_cabecalho(dados.decode('utf-8', errors='replace'))
+        return {'tamanho': len(dados), 'hash': hash_conteudo(corpo), 'url': url_do_cabecalho(cabecalho)}
+
+    def coletar_orfaos(self, hashes_em_uso, carencia=None):
+        """Apaga objetos que nenhuma referência usa há mais de `carencia` segundos"""
+        carencia = ARMAZENAMENTO_CARENCIA_OBJETOS if carencia is None else carencia
+        if not os.path.isdir(self.diretorio_objetos):
+            return 0
+        limite = time.time() - carencia
+        apagados = 0
+        for prefixo in os.listdir(self.diretorio_objetos):
+            pasta = os.path.join(self.diretorio_objetos, prefixo)
+            if not os.path.isdir(pasta):
+                continue
+            for arquivo in os.listdir(pasta):
+                caminho = os.path.join(pasta, arquivo)
+                hash_ = arquivo[:-len('.gz')]
+                try:
+                    if hash_ not in hashes_em_uso and os.path.getmtime(caminho) < limite:
+                        os.remove(caminho)
+                        apagados += 1
+                except OSError:
+                    continue
+        if apagados:
+            self._registrar(objetos_apagados=apagados)
+            logger.info(f"🧹 {apagados} objeto(s) sem referência apagado(s)")
+        return apagados
+
+    def estatisticas(self):
+        with self._lock:
+            metricas = dict(self._metricas)
+        economia = 1 - metricas['bytes_gravados'] / metricas['bytes_texto'] if metricas['bytes_texto'] else 0.0
+        return {
+            'modo': self.modo,
+            'nivel_gzip': self.nivel_gzip,
+            **metricas,
+            'economia': round(economia, 3)
+        }
+
+armazenamento_resultados = ArmazenamentoResultados(RESULTS_DIR, ARMAZENAMENTO_MODO, ARMAZENAMENTO_NIVEL_GZIP)
+
+# Catálogo SQLite dos arquivos em RESULTS_DIR (evita listdir + stat a cada listagem)
+CATALOGO_DB = os.environ.get('EXTRACTO_CATALOGO_DB') or os.path.join(RESULTS_DIR, '.catalogo.sqlite3')
+CATALOGO_INTERVALO_RECONCILIACAO = float(os.environ.get('EXTRACTO_CATALOGO_RECONCILIACAO', '300'))
+
+# Colunas aceitas para ordenação nas listagens
+ORDENACOES_CATALOGO = {'data': 'modificado_em', 'nome': 'nome', 'tamanho': 'tamanho'}
+
+class CatalogoResultados:
+    """Catálogo SQLite dos resultados: nome, URL, tamanho, datas, motor e hash do conteúdo.
+
+    Mantido por processar_url e pelas rotas de exclusão; listagens, ordenação, paginação
+    e exclusão por período viram consultas indexadas. reconciliar() corrige divergências
+    com o diretório (arquivos criados ou removidos por fora da aplicação).
+    """
+
+    def __init__(self, caminho_db, diretorio, inspecionar):
+        import sqlite3
+        self.caminho_db = caminho_db
+        self.diretorio = diretorio
+        # inspecionar(caminho) -> {'tamanho', 'hash', 'url'} de um arquivo do diretório
+        self.inspecionar = inspecionar
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho_db, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        with self._lock, self._conexao:
+            try:
+                self._conexao.execute('PRAGMA journal_mode=WAL')
+            except sqlite3.DatabaseError:
+                pass
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS arquivos (
+                    nome TEXT PRIMARY KEY,
+                    url TEXT,
+                    tamanho INTEGER NOT NULL,
+                    criado_em REAL NOT NULL,
+                    modificado_em REAL NOT NULL,
+                    motor TEXT,
+                    hash TEXT
+                )
+            """)
+            self._conexao.execute('CREATE INDEX IF NOT EXISTS idx_arquivos_modificado ON arquivos (modificado_em)')
+            self._conexao.execute('CREATE INDEX IF NOT EXISTS idx_arquivos_url ON arquivos (url)')
+            self._conexao.execute('CREATE INDEX IF NOT EXISTS idx_arquivos_hash ON arquivos (hash)')
+        self._ultima_reconciliacao = None
+
+    def registrar(self, nome, url, tamanho, modificado_em, motor=None, hash_=None):
+        """Insere ou atualiza um arquivo (a data de criação da primeira gravação é mantida)"""
+        with self._lock, self._conexao:
+            self._conexao.execute("""
+                INSERT INTO arquivos (nome, url, tamanho, criado_em, modificado_em, motor, hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (nome) DO UPDATE SET
+                    url = excluded.url, tamanho = excluded.tamanho,
+                    modificado_em = excluded.modificado_em,
+                    motor = excluded.motor, hash = excluded.hash
+            """, (nome, url, tamanho, modificado_em, modificado_em, motor, hash_))
+
+    def remover(self, nomes):
+        with self._lock, self._conexao:
+            self._conexao.executemany('DELETE FROM arquivos WHERE nome = ?', [(nome,) for nome in nomes])
+
+    def _filtro(self, desde=None, ate=None, prefixo=None):
+        condicoes, parametros = [], []
+        if prefixo:
+            # Faixa sobre a chave primária (usa o índice, ao contrário de LIKE)
+            condicoes.append('nome >= ? AND nome < ?')
+            parametros += [prefixo, prefixo + '\U0010ffff']
+        if desde is not None:
+            condicoes.append('modificado_em >= ?')
+            parametros.append(desde)
+        if ate is not None:
+            condicoes.append('modificado_em <= ?')
+            parametros.append(ate)
+        return (' WHERE ' + ' AND '.join(condicoes)) if condicoes else '', parametros
+
+    def listar(self, ordenar='data', decrescente=True, limite=None, deslocamento=0,
+               desde=None, ate=None, prefixo=None):
+        """Lista os arquivos (dicts) ordenados e paginados, opcionalmente por período (epoch) e prefixo do nome"""
+        if ordenar not in ORDENACOES_CATALOGO:
+            raise ValueError(f"Ordenação inválida: {ordenar}. Opções: {', '.join(ORDENACOES_CATALOGO)}")
+        where, parametros = self._filtro(desde, ate, prefixo)
+        sql = (f"SELECT * FROM arquivos{where} ORDER BY {ORDENACOES_CATALOGO[ordenar]} "
+               f"{'DESC' if decrescente else 'ASC'}, nome LIMIT ? OFFSET ?")
+        parametros += [-1 if limite is None else int(limite), int(deslocamento or 0)]
+        with self._lock:
+            return [dict(linha) for linha in self._conexao.execute(sql, parametros)]
+
+    def contar(self, desde=None, ate=None):
+        where, parametros = self._filtro(desde, ate)
+        with self._lock:
+            return self._conexao.execute(f'SELECT COUNT(*) FROM arquivos{where}', parametros).fetchone()[0]
+
+    def reconciliar(self):
+        """Sincroniza o catálogo com o diretório e retorna o que foi corrigido"""
+        inicio = time.perf_counter()
+        # Catálogo lido antes do diretório: um arquivo gravado no meio da varredura
+        # aparece no disco, nunca só no catálogo
+        with self._lock:
+            catalogados = {
+                linha['nome']: linha['modificado_em']
+                for linha in self._conexao.execute('SELECT nome, modificado_em FROM arquivos')
+            }
+        
+        # O tamanho no disco não é comparado: com o armazenamento comprimido o .txt é só uma referência
+        no_disco = {}
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.endswith('.txt') and entrada.is_file():
+                    no_disco[entrada.name] = entrada.stat().st_mtime
+        
+        removidos = [nome for nome in catalogados if nome not in no_disco]
+        divergentes = [nome for nome, modificado_em in no_disco.items() if catalogados.get(nome) != modificado_em]
+        
+        self.remover(removidos)
+        for nome in divergentes:
+            try:
+                info = self.inspecionar(os.path.join(self.diretorio, nome))
+            except (OSError, ValueError):
+                continue
+            tamanho, hash_, url, modificado_em = info['tamanho'], info['hash'], info['url'], no_disco[nome]
+            with self._lock, self._conexao:
+                if nome in catalogados:
+                    self._conexao.execute(
+                        'UPDATE arquivos SET tamanho = ?, modificado_em = ?, hash = ? WHERE nome = ?',
+                        (tamanho, modificado_em, hash_, nome)
+                    )
+                else:
+                    # OR IGNORE: se processar_url registrou o arquivo nesse meio tempo, vale o registro dele
+                    self._conexao.execute(
+                        'INSERT OR IGNORE INTO arquivos (nome, url, tamanho, criado_em, modificado_em, hash) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (nome, url, tamanho, modificado_em, modificado_em, hash_)
+                    )
+        
+        resultado = {
+            'quando': datetime.now().isoformat(),
+            'arquivos_no_disco': len(no_disco),
+            'adicionados': sum(1 for nome in divergentes if nome not in catalogados),
+            'atualizados': sum(1 for nome in divergentes if nome in catalogados),
+            'removidos': len(removidos),
+            'duracao': round(time.perf_counter() - inicio, 3)
+        }
+        self._ultima_reconciliacao = resultado
+        if divergentes or removidos:
+            logger.info(f"🗂️ Catálogo reconciliado: {resultado}")
+        return resultado
+
+    def hashes_em_uso(self):
+        """Hashes de corpo referenciados por algum arquivo"""
+        with self._lock:
+            return {linha[0] for linha in self._conexao.execute('SELECT DISTINCT hash FROM arquivos WHERE hash IS NOT NULL')}
+
+    def estatisticas(self):
+        with self._lock:
+            total, tamanho = self._conexao.execute(
+                'SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM arquivos'
+            ).fetchone()
+        return {
+            'banco': self.caminho_db,
+            'arquivos': total,
+            'tamanho_total': tamanho,
+            'intervalo_reconciliacao': CATALOGO_INTERVALO_RECONCILIACAO,
+            'ultima_reconciliacao': self._ultima_reconciliacao
+        }
+
+catalogo_resultados = CatalogoResultados(CATALOGO_DB, RESULTS_DIR, armazenamento_resultados.informacoes)
+
+def reconciliar_resultados():
+    """Reconcilia o catálogo com o diretório e apaga os objetos que ficaram sem referência"""
+    resultado = catalogo_resultados.reconciliar()
+    resultado['objetos_apagados'] = armazenamento_resultados.coletar_orfaos(catalogo_resultados.hashes_em_uso())
+    return resultado
+
+def reconciliar_catalogo_periodicamente():
+    """Reconcilia o catálogo ao iniciar e depois a cada CATALOGO_INTERVALO_RECONCILIACAO segundos"""
+    while True:
         try:
-            links = driver.find_elements(By.TAG_NAME, 'a')
-            for link in links:
-                texto_link = link.text.strip()
-                if len(texto_link) > 5:
-                    conteudos_extraidos.append(('link', texto_link))
+            reconciliar_resultados()
+        except Exception as e:
+            logger.warning(f"Falha ao reconciliar o catálogo: {e}")
+        if CATALOGO_INTERVALO_RECONCILIACAO <= 0:
+            return
+        time.sleep(CATALOGO_INTERVALO_RECONCILIACAO)
+
+# Os workers do pool de processos importam este módulo: só o processo principal reconcilia
+if multiprocessing.parent_process() is None:
+    threading.Thread(target=reconciliar_catalogo_periodicamente, name='catalogo-reconciliacao', daemon=True).start()
+
+# Dataset estruturado das extrações (JSONL em shards, exportável também em Parquet)
+DATASET_ATIVO = os.environ.get('EXTRACTO_DATASET', '1') != '0'
+DATASET_DIR = os.environ.get('EXTRACTO_DATASET_DIR') or os.path.join(RESULTS_DIR, 'dataset')
+DATASET_SHARD_MAX_MB = float(os.environ.get('EXTRACTO_DATASET_SHARD_MB', '64'))
+DATASET_LINHAS_POR_GRUPO = int(os.environ.get('EXTRACTO_DATASET_LINHAS_POR_GRUPO', '1000'))
+
+class DatasetExtracoes:
+    """Registra cada extração como uma linha JSON em shards que só recebem acréscimos.
+
+    Um documento tem título, URL, data, motor, metadados e os blocos na ordem do
+    arquivo final, cada um com o tipo (estratégia) que o gerou.
+    """
+
+    def __init__(self, diretorio, shard_max_bytes):
+        self.diretorio = diretorio
+        self.shard_max_bytes = shard_max_bytes
+        self._lock = threading.Lock()
+        self._registrados = 0
+        os.makedirs(diretorio, exist_ok=True)
+        existentes = self.shards()
+        self._indice = int(existentes[-1][len('extracoes-'):-len('.jsonl')]) if existentes else 1
+
+    def shards(self):
+        """Nomes dos shards, do mais antigo para o mais novo"""
+        return sorted(
+            nome for nome in os.listdir(self.diretorio)
+            if nome.startswith('extracoes-') and nome.endswith('.jsonl')
+        )
+
+    def _caminho_shard(self, indice):
+        return os.path.join(self.diretorio, f'extracoes-{indice:05d}.jsonl')
+
+    def registrar(self, documento):
+        linha = (json.dumps(documento, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            caminho = self._caminho_shard(self._indice)
+            if os.path.exists(caminho) and os.path.getsize(caminho) + len(linha) > self.shard_max_bytes:
+                self._indice += 1
+                caminho = self._caminho_shard(self._indice)
+            with open(caminho, 'ab') as f:
+                f.write(linha)
+            self._registrados += 1
+
+    def documentos(self, desde=None, ate=None):
+        """Itera sobre os documentos (dicts), opcionalmente filtrados pela data (ISO) da extração"""
+        for nome in self.shards():
+            with open(os.path.join(self.diretorio, nome), 'rb') as f:
+                for linha in f:
+                    documento = json.loads(linha)
+                    if (desde and documento['data'] < desde) or (ate and documento['data'] > ate):
+                        continue
+                    yield documento
+
+    def blocos_jsonl(self, desde=None, ate=None):
+        """Dataset em JSONL, em blocos de bytes; sem filtro os shards são copiados sem parsing"""
+        if desde or ate:
+            for documento in self.documentos(desde, ate):
+                yield (json.dumps(documento, ensure_ascii=False) + '\n').encode('utf-8')
+            return
+        for nome in self.shards():
+            with open(os.path.join(self.diretorio, nome), 'rb') as f:
+                while True:
+                    bloco = f.read(DOWNLOAD_TAMANHO_BLOCO)
+                    if not bloco:
+                        break
+                    yield bloco
+
+    def exportar_parquet(self, destino, desde=None, ate=None):
+        """Grava o dataset em Parquet, um row group a cada DATASET_LINHAS_POR_GRUPO documentos (requer pyarrow)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        esquema = pa.schema([
+            ('arquivo', pa.string()),
+            ('url', pa.string()),
+            ('titulo', pa.string()),
+            ('data', pa.string()),
+            ('motor', pa.string()),
+            ('hash', pa.string()),
+            ('metadados', pa.struct([('description', pa.string()), ('keywords', pa.string()), ('author', pa.string())])),
+            ('blocos', pa.list_(pa.struct([('tipo', pa.string()), ('texto', pa.string())]))),
+        ])
+        
+        total = 0
+        with pq.ParquetWriter(destino, esquema, compression='zstd') as escritor:
+            lote = []
+            for documento in self.documentos(desde, ate):
+                lote.append(documento)
+                if len(lote) >= DATASET_LINHAS_POR_GRUPO:
+                    escritor.write_table(pa.Table.from_pylist(lote, schema=esquema))
+                    total += len(lote)
+                    lote = []
+            if lote or not total:
+                escritor.write_table(pa.Table.from_pylist(lote, schema=esquema))
+                total += len(lote)
+        return total
+
+    def estatisticas(self):
+        shards = self.shards()
+        return {
+            'diretorio': self.diretorio,
+            'shards': len(shards),
+            'tamanho_total': sum(os.path.getsize(os.path.join(self.diretorio, nome)) for nome in shards),
+            'shard_max_mb': round(self.shard_max_bytes / (1024 * 1024), 1),
+            'registrados_no_processo': self._registrados
+        }
+
+dataset_extracoes = DatasetExtracoes(DATASET_DIR, int(DATASET_SHARD_MAX_MB * 1024 * 1024)) if DATASET_ATIVO else None
+
+def gerar_nome_arquivo(url, nome_arquivo=None):
+    """Gera o nome do arquivo .txt da extração (domínio + timestamp se não fornecido)"""
+    if not nome_arquivo:
+        # Extrai domínio da URL para criar um nome mais descritivo
+        try:
+            from urllib.parse import urlparse
+            parsed_url = urlparse(url)
+            domain = parsed_url.netloc.replace('www.', '').replace('.', '_')
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            nome_arquivo = f"{domain}_{timestamp}.txt"
         except:
-            pass
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            nome_arquivo = f"extracao_{timestamp}.txt"
+    
+    # Garante que o arquivo tenha extensão .txt
+    if not nome_arquivo.endswith('.txt'):
+        nome_arquivo += '.txt'
+    
+    return nome_arquivo
+
+def extrair_com_selenium(url, esperas=None, progresso=None):
+    """Extrai conteúdo com um driver Chrome emprestado do pool"""
+    progresso = rotular_motor(progresso, 'selenium')
+    inicio_etapa = time.perf_counter()
+    carregar_selenium()
+    with pool_drivers.obter() as driver:
+        notificar_etapa(progresso, 'driver', inicio_etapa)
+        inicio_etapa = time.perf_counter()
+        
+        driver.get(url)
+        logger.info("Página carregada, aguardando estabilidade...")
+        aguardar_documento_pronto(driver, esperas)
+        notificar_etapa(progresso, 'carregamento', inicio_etapa)
+        if progresso is not None:
+            notificar_progresso(progresso, 'titulo', titulo=driver.title.strip())
+        inicio_etapa = time.perf_counter()
+        aguardar_pagina_estavel(driver, esperas)
+        notificar_etapa(progresso, 'estabilidade', inicio_etapa)
+        inicio_etapa = time.perf_counter()
+        
+        # Trata pop-ups e cookies
+        tratar_popups_e_cookies(driver, esperas)
+        notificar_etapa(progresso, 'popups', inicio_etapa)
+        inicio_etapa = time.perf_counter()
+        
+        # Rola a página inteligentemente
+        rolar_pagina_inteligente(driver, esperas)
+        notificar_etapa(progresso, 'rolagem', inicio_etapa)
+        
+        # Extrai o conteúdo usando método avançado
+        return extrair_conteudo_avancado(driver, url, esperas, progresso)
+
+# Escolha do método de extração: 'requests', 'selenium' ou 'adaptativo' (requests primeiro e
+# Selenium só quando o resultado parece incompleto). Na Vercel não há Chrome: sempre requests.
+MOTORES_EXTRACAO = ('requests', 'selenium', 'adaptativo')
+MOTOR_EXTRACAO = 'requests' if os.environ.get('VERCEL') else os.environ.get('EXTRACTO_MOTOR', 'adaptativo')
+ADAPTATIVO_LIMIAR = float(os.environ.get('EXTRACTO_ADAPTATIVO_LIMIAR', '0.5'))
+ADAPTATIVO_MIN_CARACTERES = int(os.environ.get('EXTRACTO_ADAPTATIVO_MIN_CARACTERES', '1500'))
+ADAPTATIVO_MIN_PARAGRAFOS = int(os.environ.get('EXTRACTO_ADAPTATIVO_MIN_PARAGRAFOS', '5'))
+# Bytes de script por caractere de texto a partir dos quais a página é tratada como app JS
+ADAPTATIVO_RAZAO_SCRIPT_MAX = 20.0
+ADAPTATIVO_HISTORICO = 500
+if MOTOR_EXTRACAO not in MOTORES_EXTRACAO:
+    logger.warning(f"EXTRACTO_MOTOR inválido: {MOTOR_EXTRACAO}. Usando selenium")
+    MOTOR_EXTRACAO = 'selenium'
+
+PADRAO_SCRIPT = re.compile(r'<script\b[^>]*>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+# Marcadores de SPA: contêiner raiz vazio e avisos de JavaScript obrigatório
+MARCADORES_SPA = {
+    'raiz_vazia': re.compile(
+        r'<div[^>]+id\s*=\s*["\'](?:root|app|__next|__nuxt|svelte|main-app)["\'][^>]*>\s*</div>', re.IGNORECASE),
+    'aviso_javascript': re.compile(
+        r'<noscript[^>]*>[^<]{0,200}?(?:enable|ativ|habilit)\w*\s+(?:o\s+)?javascript', re.IGNORECASE),
+    'app_angular': re.compile(r'<app-root[^>]*>\s*</app-root>', re.IGNORECASE)
+}
+
+def sinais_renderizacao(html_content, texto, conteudos_extraidos):
+    """Mede o HTML bruto e o texto extraído pelo método requests (ver pontuar_extracao)"""
+    bytes_script = sum(len(m.group(1)) for m in PADRAO_SCRIPT.finditer(html_content))
+    return {
+        'bytes_html': len(html_content),
+        'bytes_script': bytes_script,
+        'caracteres_texto': len(texto),
+        'paragrafos': sum(1 for tipo, _ in conteudos_extraidos if tipo == 'paragrafo'),
+        'razao_script_texto': round(bytes_script / max(1, len(texto)), 2),
+        'marcadores_spa': [nome for nome, padrao in MARCADORES_SPA.items() if padrao.search(html_content)]
+    }
+
+def pontuar_extracao(sinais):
+    """Nota de 0 a 1 para a extração sem navegador: texto e parágrafos somam, scripts e SPA descontam"""
+    nota_texto = min(1.0, sinais['caracteres_texto'] / max(1, ADAPTATIVO_MIN_CARACTERES))
+    nota_paragrafos = min(1.0, sinais['paragrafos'] / max(1, ADAPTATIVO_MIN_PARAGRAFOS))
+    nota_script = 1.0 - min(1.0, sinais['razao_script_texto'] / ADAPTATIVO_RAZAO_SCRIPT_MAX)
+    nota = 0.5 * nota_texto + 0.3 * nota_paragrafos + 0.2 * nota_script
+    if sinais['marcadores_spa']:
+        nota *= 0.5
+    return round(nota, 3)
+
+class RegistroDecisoesMotor:
+    """Histórico das decisões do modo adaptativo, para calibrar o limiar com o tráfego real.
+
+    Guarda as últimas `tamanho` decisões (nota, sinais, motor escolhido e o tempo de cada
+    método) e totais desde o início do processo.
+    """
+
+    def __init__(self, tamanho):
+        from collections import deque
+        self._lock = threading.Lock()
+        self._decisoes = deque(maxlen=tamanho)
+        self.totais = {'decisoes': 0, 'escalonadas': 0, 'tempo_requests': 0.0, 'tempo_selenium': 0.0}
+
+    def registrar(self, decisao):
+        with self._lock:
+            self._decisoes.append(decisao)
+            self.totais['decisoes'] += 1
+            self.totais['escalonadas'] += 1 if decisao['escalonado'] else 0
+            self.totais['tempo_requests'] += decisao['tempo_requests'] or 0.0
+            self.totais['tempo_selenium'] += decisao['tempo_selenium'] or 0.0
+
+    def estatisticas(self):
+        """Retorna a configuração, os totais e as decisões recentes (mais novas primeiro)"""
+        with self._lock:
+            decisoes = list(self._decisoes)
+            totais = dict(self.totais)
+        return {
+            'modo': MOTOR_EXTRACAO,
+            'limiar': ADAPTATIVO_LIMIAR,
+            'min_caracteres': ADAPTATIVO_MIN_CARACTERES,
+            'min_paragrafos': ADAPTATIVO_MIN_PARAGRAFOS,
+            **{chave: round(valor, 3) if isinstance(valor, float) else valor for chave, valor in totais.items()},
+            'taxa_escalonamento': round(totais['escalonadas'] / totais['decisoes'], 3) if totais['decisoes'] else 0.0,
+            'recentes': decisoes[::-1]
+        }
+
+registro_decisoes_motor = RegistroDecisoesMotor(ADAPTATIVO_HISTORICO)
+
+def extrair_adaptativo(url, motor_dom, validadores, info_resposta, esperas, progresso, tentativa=0):
+    """Tenta o método requests e escala para o Selenium se a nota ficar abaixo do limiar.
+
+    Retorna (conteudo, decisao); conteudo é None se a origem respondeu 304. Os eventos de
+    progresso do método requests só são repassados se o resultado dele for o usado.
+    """
+    decisao = {
+        'url': url,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'nota': None,
+        'limiar': ADAPTATIVO_LIMIAR,
+        'escalonado': False,
+        'motivo': None,
+        'motor': 'requests',
+        'tempo_requests': None,
+        'tempo_selenium': None,
+        'sinais': None
+    }
+    
+    try:
+        return escolher_motor_adaptativo(url, motor_dom, validadores, info_resposta, esperas,
+                                         progresso, tentativa, decisao)
+    finally:
+        # Toda decisão entra no histórico, inclusive as que terminam em exceção
+        registro_decisoes_motor.registrar(decisao)
+
+def escolher_motor_adaptativo(url, motor_dom, validadores, info_resposta, esperas, progresso, tentativa, decisao):
+    """Corpo de extrair_adaptativo: preenche `decisao` e retorna (conteudo, decisao)"""
+    eventos = []
+    inicio = time.perf_counter()
+    try:
+        conteudo = extrair_com_requests(url, motor_dom, validadores, info_resposta,
+                                        lambda evento, dados: eventos.append((evento, dados)), tentativa)
+    except FalhaTransitoria:
+        decisao['motivo'] = 'falha_transitoria'
+        decisao['tempo_requests'] = round(time.perf_counter() - inicio, 3)
+        raise
+    except Exception as e:
+        # Bloqueios e páginas recusadas pelo requests ainda podem abrir no navegador
+        conteudo = None
+        decisao['motivo'] = f'erro_requests: {e}'
+    decisao['tempo_requests'] = round(time.perf_counter() - inicio, 3)
+    
+    if decisao['motivo'] is None:
+        if conteudo is None:
+            # 304: o conteúdo em cache continua válido, sem navegador
+            decisao['motivo'] = 'nao_modificado'
+            return None, decisao
+        decisao['sinais'] = info_resposta.get('sinais')
+        decisao['nota'] = pontuar_extracao(decisao['sinais'])
+        if decisao['nota'] >= ADAPTATIVO_LIMIAR:
+            decisao['motivo'] = 'nota_suficiente'
+            for evento, dados in eventos:
+                notificar_progresso(progresso, evento, **dados)
+            return conteudo, decisao
+        decisao['motivo'] = 'nota_baixa'
+    
+    logger.info(f"🔼 Escalando para o Selenium ({decisao['motivo']}, nota {decisao['nota']})")
+    # As etapas do requests entram nas métricas mesmo quando o resultado é descartado
+    for evento, dados in eventos:
+        if evento == 'etapa':
+            notificar_progresso(progresso, evento, **dados)
+    notificar_progresso(progresso, 'escalonamento', nota=decisao['nota'], motivo=decisao['motivo'],
+                        tempo_requests=decisao['tempo_requests'])
+    decisao['escalonado'] = True
+    inicio = time.perf_counter()
+    erro_selenium = None
+    try:
+        conteudo_selenium = extrair_com_selenium(url, esperas, progresso)
+    except Exception as e:
+        # Pool de drivers esgotado, Chrome que não inicia...
+        logger.warning(f"⚠️ Selenium falhou no modo adaptativo: {e}")
+        erro_selenium = e
+        conteudo_selenium = None
+    decisao['tempo_selenium'] = round(time.perf_counter() - inicio, 3)
+    
+    falhou = erro_selenium is not None or conteudo_selenium.startswith('Erro ')
+    if falhou:
+        decisao['motivo'] += '; selenium_falhou'
+        # Se o Selenium falhar, fica o que o requests conseguiu (quando conseguiu)
+        if conteudo is not None:
+            for evento, dados in eventos:
+                if evento != 'etapa':
+                    notificar_progresso(progresso, evento, **dados)
+            return conteudo, decisao
+        if erro_selenium is not None:
+            raise erro_selenium
+    decisao['motor'] = 'selenium'
+    return conteudo_selenium, decisao
+
+def processar_url(url, nome_arquivo=None, motor_dom=None, usar_cache=True, progresso=None, tentativa=0):
+    """Processa uma URL e salva o resultado em arquivo .txt
+
+    `progresso`, se informado, recebe (evento, dados) a cada etapa concluída e a cada
+    bloco de texto definitivo (usado por /extrair/stream). Em falhas transitórias o
+    resultado traz `tentar_apos` (s); `tentativa` é o número da retentativa (0 na primeira).
+    As durações das etapas vão para as métricas de /metrics.
+    """
+    inicio_extracao = time.perf_counter()
+    # (motor, etapa, duração) de cada etapa concluída; motor None = etapa do próprio processar_url
+    etapas_medidas = []
+    situacao_cache = None
+    
+    def registrar_metricas(motor_usado, resultado):
+        metricas_extracao.registrar_extracao(
+            motor_usado, resultado, time.perf_counter() - inicio_extracao,
+            [(motor_etapa or motor_usado, etapa, duracao) for motor_etapa, etapa, duracao in etapas_medidas],
+            situacao_cache
+        )
+    
+    try:
+        logger.info(f"Iniciando extração de: {url}")
+        
+        # Gera nome do arquivo se não fornecido
+        nome_arquivo = gerar_nome_arquivo(url, nome_arquivo)
+        
+        caminho_arquivo = os.path.join(RESULTS_DIR, nome_arquivo)
+        
+        # Tempo gasto em cada espera por prontidão da página (s)
+        esperas = {}
+        
+        # O motor faz parte da chave do cache: cada um gera um texto diferente
+        if MOTOR_EXTRACAO == 'requests':
+            motor = f"requests:{motor_dom or MOTOR_DOM_PADRAO}"
+        elif MOTOR_EXTRACAO == 'adaptativo':
+            motor = f"adaptativo:{motor_dom or MOTOR_DOM_PADRAO}"
+        else:
+            motor = 'selenium'
+        
+        # Decisão do modo adaptativo (nota, motor escolhido e tempos)
+        decisao_motor = None
+        
+        # Consulta o cache (a menos que o cliente peça para ignorá-lo)
+        entrada, fresca = None, False
+        if usar_cache:
+            entrada, fresca = cache_extracoes.obter(url, motor)
+            situacao_cache = 'falha'
+        else:
+            situacao_cache = 'ignorado'
+        validadores = None
+        if entrada:
+            validadores = {'etag': entrada['etag'], 'last_modified': entrada['last_modified']}
+        
+        # Charset da página decodificada nesta extração (só no método requests)
+        charset = None
+        
+        # Título, metadados e blocos desta extração, para o dataset estruturado
+        estrutura = {'titulo': None, 'metadados': {}, 'blocos': []}
+        
+        def acompanhar(evento, dados):
+            if evento == 'bloco':
+                estrutura['blocos'].append({'tipo': dados['tipo'], 'texto': dados['texto']})
+            elif evento in ('titulo', 'metadados'):
+                estrutura[evento] = dados[evento]
+            elif evento == 'etapa':
+                etapas_medidas.append((dados.get('motor'), dados['etapa'], dados['duracao']))
+            notificar_progresso(progresso, evento, **dados)
+        
+        # Escolhe o método de extração baseado no ambiente
+        if entrada and fresca:
+            logger.info("=== CACHE: conteúdo servido do cache ===")
+            conteudo = entrada['conteudo']
+            situacao_cache = 'acerto'
+        elif MOTOR_EXTRACAO in ('requests', 'adaptativo'):
+            info_resposta = {}
+            if MOTOR_EXTRACAO == 'adaptativo':
+                logger.info("=== MODO ADAPTATIVO: requests primeiro, Selenium se necessário ===")
+                conteudo, decisao_motor = extrair_adaptativo(url, motor_dom, validadores, info_resposta,
+                                                             esperas, acompanhar, tentativa)
+            else:
+                logger.info("=== MÉTODO REQUESTS: Usando requests + BeautifulSoup ===")
+                conteudo = extrair_com_requests(url, motor_dom, validadores, info_resposta, acompanhar, tentativa)
+            charset = info_resposta.get('charset')
+            if conteudo is None:
+                if not entrada:
+                    raise Exception("A origem respondeu 304 sem conteúdo em cache")
+                conteudo = entrada['conteudo']
+                situacao_cache = 'revalidado'
+            elif not conteudo.startswith('Erro '):
+                cache_extracoes.armazenar(url, motor, conteudo, info_resposta)
+        else:
+            if validadores and origem_nao_modificada(url, validadores):
+                logger.info("=== CACHE: origem não modificada (304), Selenium dispensado ===")
+                conteudo = entrada['conteudo']
+                situacao_cache = 'revalidado'
+            else:
+                logger.info("=== AMBIENTE LOCAL: Usando Selenium ===")
+                conteudo = extrair_com_selenium(url, esperas, acompanhar)
+                # Os fallbacks do Selenium devolvem a mensagem de erro como texto: não guardar
+                if not conteudo.startswith('Erro '):
+                    cache_extracoes.armazenar(url, motor, conteudo, consultar_validadores(url))
+        
+        if situacao_cache == 'revalidado':
+            cache_extracoes.renovar(url, motor)
+        if usar_cache:
+            cache_extracoes.registrar({'acerto': 'acertos', 'revalidado': 'revalidados', 'falha': 'falhas'}[situacao_cache])
+            if entrada and situacao_cache == 'falha':
+                cache_extracoes.registrar('modificados')
+        else:
+            cache_extracoes.registrar('ignorados')
+        
+        notificar_progresso(progresso, 'cache', situacao=situacao_cache)
+        
+        # Salva no arquivo .txt
+        inicio_gravacao = time.perf_counter()
+        gravado = armazenamento_resultados.gravar(nome_arquivo, conteudo)
+        catalogo_resultados.registrar(nome_arquivo, url, gravado['tamanho'],
+                                      os.path.getmtime(caminho_arquivo), motor, gravado['hash'])
+        
+        # Só extrações feitas agora entram no dataset (acertos de cache não geram blocos)
+        if dataset_extracoes is not None and estrutura['blocos']:
+            dataset_extracoes.registrar({
+                'arquivo': nome_arquivo,
+                'url': url,
+                'titulo': estrutura['titulo'],
+                'data': datetime.now().isoformat(timespec='seconds'),
+                'motor': motor,
+                'hash': gravado['hash'],
+                'metadados': estrutura['metadados'],
+                'blocos': estrutura['blocos']
+            })
+        notificar_etapa(acompanhar, 'gravacao', inicio_gravacao, caracteres=len(conteudo))
+        
+        if situacao_cache == 'acerto':
+            motor_usado = 'cache'
+        elif decisao_motor:
+            motor_usado = decisao_motor['motor']
+        else:
+            motor_usado = 'requests' if MOTOR_EXTRACAO == 'requests' else 'selenium'
+        # Os fallbacks do Selenium devolvem a mensagem de erro como texto
+        registrar_metricas(motor_usado, 'erro' if conteudo.startswith('Erro ') else 'sucesso')
+        
+        logger.info(f"Extração concluída: {caminho_arquivo}")
+        
+        return {
+            'sucesso': True,
+            'arquivo': nome_arquivo,
+            'caminho': caminho_arquivo,
+            'tamanho': len(conteudo),
+            'tempos_espera': esperas,
+            'tempo_espera_total': round(sum(esperas.values()), 3),
+            'cache': situacao_cache,
+            'charset': charset,
+            'decisao_motor': decisao_motor,
+            'mensagem': 'Extração concluída com sucesso!'
+        }
+            
+    except Exception as e:
+        logger.error(f"Erro na extração: {e}")
+        resultado = {
+            'sucesso': False,
+            'erro': str(e),
+            'mensagem': f'Erro durante a extração: {str(e)}'
+        }
+        if isinstance(e, FalhaTransitoria):
+            resultado['tentar_apos'] = e.tentar_apos
+        if etapas_medidas and etapas_medidas[-1][0]:
+            motor_usado = etapas_medidas[-1][0]
+        else:
+            motor_usado = 'selenium' if MOTOR_EXTRACAO == 'selenium' else 'requests'
+        registrar_metricas(motor_usado, 'transitoria' if isinstance(e, FalhaTransitoria) else 'erro')
+        return resultado
+
+def atraso_retentativa_sincrona(resultado, tentativa, espera_total):
+    """Atraso (s) antes de repetir a tentativa `tentativa`, ou None se a falha não for
+    transitória ou se as tentativas ou o orçamento de espera tiverem acabado"""
+    atraso = resultado.get('tentar_apos')
+    if (atraso is None or tentativa + 1 >= RETENTATIVAS_MAX
+            or espera_total + atraso > RETENTATIVA_SINCRONA_ESPERA_MAX):
+        return None
+    return atraso
+
+def processar_url_sincrono(url, nome_arquivo=None, motor_dom=None, usar_cache=True, progresso=None):
+    """processar_url para quem espera a resposta: repete falhas transitórias dentro de um orçamento.
+
+    Espera o `tentar_apos` de cada falha (que já respeita o Retry-After, a pausa e o token
+    bucket do host) enquanto a soma das esperas couber em RETENTATIVA_SINCRONA_ESPERA_MAX e
+    houver tentativas. Esgotado o orçamento, devolve o resultado com `tentar_apos`.
+    """
+    espera_total = 0.0
+    tentativa = 0
+    while True:
+        resultado = processar_url(url, nome_arquivo, motor_dom, usar_cache, progresso, tentativa)
+        atraso = atraso_retentativa_sincrona(resultado, tentativa, espera_total)
+        if atraso is None:
+            resultado['retentativas'] = tentativa
+            return resultado
+        logger.info(f"🔁 Nova tentativa de {url} em {atraso:.1f}s ({tentativa + 1}/{RETENTATIVAS_MAX - 1})")
+        notificar_progresso(progresso, 'retentativa', tentativa=tentativa + 1, tentar_apos=atraso,
+                            erro=resultado.get('erro'))
+        time.sleep(atraso)
+        espera_total += atraso
+        tentativa += 1
+
+# Extrator executado dentro da página: remove scripts/estilos/anúncios, aplica as
+# estratégias de coleta e devolve tudo em um único JSON (uma só chamada ao WebDriver).
+# arguments[0] = SELETORES_CONTEUDO_PRINCIPAL, arguments[1] = SELETORES_ANUNCIOS
+SCRIPT_EXTRACAO_NAVEGADOR = """
+    var seletoresPrincipais = arguments[0];
+    var seletoresAnuncios = arguments[1];
+
+    function selecionar(seletor) {
+        try {
+            return document.querySelectorAll(seletor);
+        } catch (e) {
+            return [];
+        }
+    }
+
+    // Remover elementos críticos e publicidade
+    ['script', 'style', 'noscript'].concat(seletoresAnuncios).forEach(function (seletor) {
+        var elementos = selecionar(seletor);
+        for (var i = 0; i < elementos.length; i++) {
+            elementos[i].remove();
+        }
+    });
+
+    var conteudos = [];
+
+    function coletar(seletor, tipo, minimo, maximo) {
+        var elementos = selecionar(seletor);
+        for (var i = 0; i < elementos.length; i++) {
+            var texto = (elementos[i].innerText || '').trim();
+            if (texto.length > minimo && (!maximo || texto.length < maximo)) {
+                conteudos.push([tipo, texto]);
+            }
+        }
+    }
+
+    // Estratégias 1 a 8: mesmos critérios de tamanho da coleta por elemento
+    seletoresPrincipais.forEach(function (seletor) {
+        coletar(seletor, 'seletor_principal', 20);
+    });
+    coletar('p', 'paragrafo', 10);
+    coletar('div', 'div_conteudo', 15, 3000);
+    coletar('span', 'span', 10);
+    for (var nivel = 1; nivel <= 6; nivel++) {
+        coletar('h' + nivel, 'header', 3);
+    }
+    coletar('a', 'link', 5);
+    coletar('ul, ol', 'lista', 10);
+    coletar('table', 'tabela', 10);
+
+    // Estratégia 9: elementos visíveis (um único getComputedStyle por elemento)
+    var todos = document.querySelectorAll('*');
+    for (var i = 0; i < todos.length; i++) {
+        var el = todos[i];
+        if (el.offsetParent === null) continue;
+        var texto = (el.innerText || '').trim();
+        if (texto.length <= 15 || texto.length >= 2000) continue;
+        var estilo = getComputedStyle(el);
+        if (estilo.display !== 'none' && estilo.visibility !== 'hidden') {
+            conteudos.push(['elemento_visivel', texto]);
+        }
+    }
+
+    // Estratégia 10: body completo se pouco conteúdo
+    if (conteudos.length < 10 && document.body) {
+        conteudos.push(['body_completo', (document.body.innerText || '').trim()]);
+    }
+
+    // Metadados
+    var metadados = {};
+    ['description', 'keywords', 'author'].forEach(function (nome) {
+        var meta = document.querySelector('meta[name="' + nome + '"]');
+        if (meta) {
+            metadados[nome] = meta.getAttribute('content');
+        }
+    });
+    if (!metadados.author) {
+        var autor = document.querySelector('.author, .by-author, .post-author, [rel="author"]');
+        if (autor) {
+            metadados.author = (autor.innerText || '').trim();
+        }
+    }
+
+    // Links (já absolutos) para o modo crawl
+    var links = [];
+    var ancoras = document.querySelectorAll('a[href]');
+    for (var j = 0; j < ancoras.length; j++) {
+        links.push(ancoras[j].href);
+    }
+
+    return JSON.stringify({conteudos: conteudos, metadados: metadados, links: links});
+"""
+
+def extrair_conteudo_avancado(driver, url, esperas=None, progresso=None):
+    """Extrai conteúdo de forma avançada e abrangente - VERSÃO MELHORADA"""
+    try:
+        logger.info("=== INICIANDO EXTRAÇÃO AVANÇADA COM SELENIUM ===")
         
-        # Estratégia 7: Listas (ul, ol)
-        logger.info("Extraindo listas...")
-        try:
-            listas = driver.find_elements(By.CSS_SELECTOR, 'ul, ol')
-            for lista in listas:
-                texto_lista = lista.text.strip()
-                if len(texto_lista) > 10:
-                    conteudos_extraidos.append(('lista', texto_lista))
-        except:
-            pass
+        # Aguardar carregamento completo
+        aguardar_documento_pronto(driver, esperas)
         
-        # Estratégia 8: Tabelas
-        logger.info("Extraindo tabelas...")
-        try:
-            tabelas = driver.find_elements(By.TAG_NAME, 'table')
-            for tabela in tabelas:
-                texto_tabela = tabela.text.strip()
-                if len(texto_tabela) > 10:
-                    conteudos_extraidos.append(('tabela', texto_tabela))
-        except:
-            pass
+        # Obter título da página
+        titulo = driver.title.strip()
+        logger.info(f"Título extraído: {titulo}")
         
-        # Estratégia 9: Elementos com texto visível (mais abrangente)
-        logger.info("Extraindo elementos com texto visível...")
+        # Executar scroll gradual para carregar conteúdo lazy-loaded; o script
+        # termina ao chegar no fim da página (ou no limite), sem espera fixa
+        logger.info("Executando scroll inteligente...")
+        inicio_rolagem = inicio_etapa = time.perf_counter()
         try:
-            # Busca por qualquer elemento que tenha texto e seja visível
-            elementos_com_texto = driver.execute_script("""
-                var elementos = [];
-                var todosElementos = document.querySelectorAll('*');
-                for (var i = 0; i < todosElementos.length; i++) {
-                    var el = todosElementos[i];
-                    if (el.innerText && el.innerText.trim().length > 10 && 
-                        el.offsetParent !== null && 
-                        getComputedStyle(el).display !== 'none' &&
-                        getComputedStyle(el).visibility !== 'hidden') {
-                        elementos.push(el.innerText.trim());
+            driver.set_script_timeout(ESPERA_ROLAGEM_GRADUAL_MAX + 5)
+            driver.execute_async_script("""
+                var limiteMs = arguments[0];
+                var callback = arguments[arguments.length - 1];
+                var inicio = Date.now();
+                let totalHeight = 0;
+                let distance = 100;
+                let timer = setInterval(() => {
+                    let scrollHeight = document.body.scrollHeight;
+                    window.scrollBy(0, distance);
+                    totalHeight += distance;
+                    if(totalHeight >= scrollHeight || Date.now() - inicio >= limiteMs){
+                        clearInterval(timer);
+                        window.scrollTo(0, 0); // Volta ao topo
+                        callback(totalHeight);
                     }
-                }
-                return elementos;
-            """)
-            
-            for texto in elementos_com_texto:
-                if len(texto) > 15 and len(texto) < 2000:
-                    conteudos_extraidos.append(('elemento_visivel', texto))
-        except:
-            pass
-        
-        # Estratégia 10: Fallback para body completo se pouco conteúdo
-        if len(conteudos_extraidos) < 10:
-            logger.info("Poucos elementos encontrados, usando fallback do body...")
-            try:
-                body = driver.find_element(By.TAG_NAME, 'body')
-                texto_body = body.text.strip()
-                conteudos_extraidos.append(('body_completo', texto_body))
-            except:
-                pass
+                }, 100);
+            """, int(ESPERA_ROLAGEM_GRADUAL_MAX * 1000))
+        except Exception as e:
+            logger.warning(f"Erro no scroll gradual: {e}")
+        registrar_espera(esperas, 'rolagem_gradual', time.perf_counter() - inicio_rolagem)
+        
+        # Aguardar o conteúdo carregado pela rolagem estabilizar
+        aguardar_pagina_estavel(driver, esperas)
+        notificar_etapa(progresso, 'rolagem_gradual', inicio_etapa)
+        inicio_etapa = time.perf_counter()
+        
+        # Limpeza, filtro de visibilidade e coleta de todas as estratégias em uma única chamada
+        logger.info("Executando extrator no navegador (chamada única)...")
+        resultado_navegador = json.loads(driver.execute_script(
+            SCRIPT_EXTRACAO_NAVEGADOR, SELETORES_CONTEUDO_PRINCIPAL, SELETORES_ANUNCIOS
+        ))
+        conteudos_extraidos = [(tipo, texto) for tipo, texto in resultado_navegador['conteudos']]
+        notificar_etapa(progresso, 'estrategias', inicio_etapa,
+                        blocos=contar_blocos_por_tipo(conteudos_extraidos))
+        inicio_etapa = time.perf_counter()
         
         # Combinar TODOS os conteúdos únicos
         logger.info(f"Total de elementos extraídos: {len(conteudos_extraidos)}")
-        textos_unicos = set()
-        conteudo_final_partes = []
-        
-        # Priorizar por tipo e adicionar conteúdos únicos
+        # Priorizar por tipo e adicionar conteúdos únicos (evita duplicatas muito similares)
         tipos_priorizados = ['header', 'seletor_principal', 'paragrafo', 'div_conteudo', 
                            'lista', 'tabela', 'span', 'link', 'elemento_visivel', 'body_completo']
-        
-        for tipo in tipos_priorizados:
-            for tipo_atual, texto in conteudos_extraidos:
-                if tipo_atual == tipo and texto not in textos_unicos and len(texto.strip()) > 3:
-                    # Evita duplicatas muito similares
-                    texto_normalizado = re.sub(r'\s+', ' ', texto.strip().lower())
-                    if not any(texto_normalizado in existing.lower() or existing.lower() in texto_normalizado 
-                             for existing in textos_unicos if len(existing) > 50):
-                        textos_unicos.add(texto)
-                        conteudo_final_partes.append(texto)
+        conteudo_final_partes = selecionar_textos_unicos(conteudos_extraidos, tipos_priorizados, progresso)
+        notificar_etapa(progresso, 'deduplicacao', inicio_etapa, blocos=len(conteudo_final_partes))
         
         melhor_conteudo = '\n\n'.join(conteudo_final_partes)
         
@@ -947,8 +3727,10 @@ def extrair_conteudo_avancado(driver, url):
             
             melhor_conteudo = '\n'.join(linhas_finais)
         
-        # Extrair metadados adicionais
-        metadados = extrair_metadados(driver)
+        # Metadados coletados pelo mesmo extrator do navegador
+        metadados = resultado_navegador['metadados']
+        notificar_progresso(progresso, 'metadados', metadados=metadados)
+        notificar_progresso(progresso, 'links', links=resultado_navegador.get('links', []))
         
         # Montar conteúdo final
         conteudo_final = f"=== EXTRAÇÃO AVANÇADA DE TEXTO by @valentelucass ===\n"
@@ -1234,6 +4016,199 @@ def serve_frontend_static(filename):
     """Servir outros arquivos estáticos do front-end"""
     return send_file(f'front-end/{filename}')
 
+# Configurações da fila de extrações assíncronas (/extrair com "assincrono": true)
+JOBS_WORKERS = int(os.environ.get('EXTRACTO_JOBS_WORKERS', '2'))
+JOBS_MAX_FILA = int(os.environ.get('EXTRACTO_JOBS_MAX_FILA', '1000'))
+JOBS_RETENCAO = float(os.environ.get('EXTRACTO_JOBS_RETENCAO', '3600'))
+
+ESTADOS_FINAIS_JOB = ('concluido', 'falhou', 'cancelado')
+
+class FilaJobs:
+    """Fila de extrações em segundo plano atendida por um pool de workers do processo.
+
+    Os workers são iniciados na primeira submissão. Jobs na fila podem ser cancelados
+    imediatamente; um job em execução termina a extração atual, mas é marcado como
+    cancelado e seu resultado é descartado. Jobs finalizados ficam disponíveis para
+    consulta por `retencao` segundos. Uma falha transitória (resultado com `tentar_apos`)
+    devolve o job à fila depois do atraso por um timer, liberando o worker nesse intervalo.
+    """
+
+    def __init__(self, workers, max_fila, retencao):
+        import queue
+        self.workers = workers
+        self.retencao = retencao
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._threads = []
+        self._ocupados = 0
+        self._tempo_ocupado = 0.0
+        self._iniciado_em = None
+
+    def _iniciar_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._iniciado_em = time.time()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._executar, name=f'extracto-job-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _limpar_antigos(self):
+        limite = time.time() - self.retencao
+        with self._lock:
+            for job_id in [j['id'] for j in self._jobs.values()
+                           if j['estado'] in ESTADOS_FINAIS_JOB and j['concluido_em'] < limite]:
+                del self._jobs[job_id]
+
+    def submeter(self, url, nome_arquivo=None, motor_dom=None, usar_cache=True):
+        """Coloca a URL na fila e retorna o job criado"""
+        import queue
+        import uuid
+        self._limpar_antigos()
+        self._iniciar_workers()
+        job = {
+            'id': uuid.uuid4().hex,
+            'url': url,
+            'nome_arquivo': nome_arquivo,
+            'motor_dom': motor_dom,
+            'usar_cache': usar_cache,
+            'estado': 'na_fila',
+            'cancelamento_solicitado': False,
+            'criado_em': time.time(),
+            'iniciado_em': None,
+            'concluido_em': None,
+            'tentativas': 0,
+            'proxima_tentativa': None,
+            'resultado': None
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+        try:
+            self._fila.put_nowait(job['id'])
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job['id']]
+            raise Exception(f"Fila de extrações cheia ({self._fila.maxsize} jobs)")
+        return self.consultar(job['id'])
+
+    def _executar(self):
+        while True:
+            job_id = self._fila.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job['estado'] != 'na_fila':
+                    continue
+                job['estado'] = 'executando'
+                job['iniciado_em'] = time.time()
+                self._ocupados += 1
+
+            try:
+                resultado = processar_url(job['url'], job['nome_arquivo'], job['motor_dom'], job['usar_cache'],
+                                          tentativa=job['tentativas'])
+            except Exception as e:
+                resultado = {'sucesso': False, 'erro': str(e), 'mensagem': f'Erro durante a extração: {str(e)}'}
+
+            with self._lock:
+                agora = time.time()
+                self._ocupados -= 1
+                self._tempo_ocupado += agora - job['iniciado_em']
+                atraso = resultado.get('tentar_apos')
+                if job['cancelamento_solicitado']:
+                    job['estado'] = 'cancelado'
+                elif atraso is not None and job['tentativas'] + 1 < RETENTATIVAS_MAX:
+                    job['tentativas'] += 1
+                    job['estado'] = 'aguardando_retentativa'
+                    job['proxima_tentativa'] = agora + atraso
+                    job['resultado'] = resultado
+                    timer = threading.Timer(atraso, self._reenfileirar, args=(job_id,))
+                    timer.daemon = True
+                    timer.start()
+                    continue
+                else:
+                    job['estado'] = 'concluido' if resultado.get('sucesso') else 'falhou'
+                    job['resultado'] = resultado
+                job['concluido_em'] = agora
+
+    def _reenfileirar(self, job_id):
+        import queue
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['estado'] != 'aguardando_retentativa':
+                return
+            job['estado'] = 'na_fila'
+            job['proxima_tentativa'] = None
+        try:
+            self._fila.put_nowait(job_id)
+        except queue.Full:
+            with self._lock:
+                job['estado'] = 'falhou'
+                job['concluido_em'] = time.time()
+
+    def cancelar(self, job_id):
+        """Cancela o job; retorna None se ele não existir"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job['estado'] in ('na_fila', 'aguardando_retentativa'):
+                job['estado'] = 'cancelado'
+                job['concluido_em'] = time.time()
+            elif job['estado'] == 'executando':
+                job['cancelamento_solicitado'] = True
+        return self.consultar(job_id)
+
+    def consultar(self, job_id):
+        """Retorna o estado, os tempos e o resultado do job (None se não existir)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            agora = time.time()
+            inicio_execucao = job['iniciado_em'] or job['concluido_em'] or agora
+            return {
+                'id': job['id'],
+                'url': job['url'],
+                'estado': job['estado'],
+                'cancelamento_solicitado': job['cancelamento_solicitado'],
+                'criado_em': datetime.fromtimestamp(job['criado_em']).isoformat(),
+                'iniciado_em': datetime.fromtimestamp(job['iniciado_em']).isoformat() if job['iniciado_em'] else None,
+                'concluido_em': datetime.fromtimestamp(job['concluido_em']).isoformat() if job['concluido_em'] else None,
+                'tempo_na_fila': round(inicio_execucao - job['criado_em'], 3),
+                'tempo_execucao': round((job['concluido_em'] or agora) - job['iniciado_em'], 3) if job['iniciado_em'] else None,
+                'retentativas': job['tentativas'],
+                'proxima_tentativa': datetime.fromtimestamp(job['proxima_tentativa']).isoformat() if job['proxima_tentativa'] else None,
+                'resultado': job['resultado']
+            }
+
+    def estatisticas(self):
+        """Retorna a profundidade da fila e a utilização dos workers"""
+        with self._lock:
+            estados = {}
+            for job in self._jobs.values():
+                estados[job['estado']] = estados.get(job['estado'], 0) + 1
+            decorrido = time.time() - self._iniciado_em if self._iniciado_em else 0
+            capacidade = decorrido * self.workers
+            return {
+                'workers': self.workers,
+                'workers_ativos': len(self._threads),
+                'workers_ocupados': self._ocupados,
+                'utilizacao_atual': self._ocupados / self.workers if self.workers else 0.0,
+                'utilizacao_media': min(1.0, self._tempo_ocupado / capacidade) if capacidade else 0.0,
+                'profundidade_fila': estados.get('na_fila', 0),
+                'capacidade_fila': self._fila.maxsize,
+                'jobs_por_estado': estados
+            }
+
+fila_jobs = FilaJobs(JOBS_WORKERS, JOBS_MAX_FILA, JOBS_RETENCAO)
+
+def normalizar_url(url):
+    """Valida a URL, assumindo https:// quando o esquema não é informado"""
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
 @app.route('/extrair', methods=['POST'])
 def extrair():
     """Endpoint para extrair conteúdo de uma URL"""
@@ -1241,15 +4216,25 @@ def extrair():
         data = request.get_json()
         url = data.get('url')
         filename = data.get('filename')
+        motor_dom = data.get('motor_dom')  # opcional: 'estrategias', 'passagem_unica' ou 'lxml'
+        usar_cache = not data.get('sem_cache')  # opcional: true ignora o cache de extrações
         
         if not url:
             return jsonify({'sucesso': False, 'mensagem': 'URL é obrigatória'})
         
-        # Validar URL
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
+        url = normalizar_url(url)
+        
+        # Modo assíncrono: enfileira a extração e devolve o id do job imediatamente
+        if data.get('assincrono'):
+            job = fila_jobs.submeter(url, filename, motor_dom, usar_cache)
+            return jsonify({
+                'sucesso': True,
+                'job_id': job['id'],
+                'estado': job['estado'],
+                'mensagem': 'Extração enfileirada'
+            }), 202
         
-        resultado = processar_url(url, filename)
+        resultado = processar_url_sincrono(url, filename, motor_dom, usar_cache)
         return jsonify(resultado)
         
     except Exception as e:
@@ -1259,28 +4244,628 @@ def extrair():
             'mensagem': f'Erro interno: {str(e)}'
         })
 
-@app.route('/arquivos')
-def listar_arquivos():
-    """Lista todos os arquivos extraídos"""
+# Configurações do processamento em lote (/extrair/lote)
+LOTE_MAX_URLS = int(os.environ.get('EXTRACTO_LOTE_MAX_URLS', '500'))
+LOTE_CONCORRENCIA = int(os.environ.get('EXTRACTO_LOTE_CONCORRENCIA', '8'))
+LOTE_CONCORRENCIA_POR_HOST = int(os.environ.get('EXTRACTO_LOTE_CONCORRENCIA_POR_HOST', '2'))
+
+# Limites compartilhados por todos os lotes em andamento no processo
+semaforo_lote = threading.BoundedSemaphore(LOTE_CONCORRENCIA)
+# host -> [semáforo, usos]; a entrada sai quando nenhuma extração do host está em andamento ou esperando
+semaforos_por_host = {}
+semaforos_por_host_lock = threading.Lock()
+
+@contextmanager
+def semaforo_do_host(url):
+    """Ocupa uma das vagas de extração simultânea no host da URL enquanto o bloco roda"""
+    from urllib.parse import urlparse
+    host = urlparse(url).netloc.lower()
+    with semaforos_por_host_lock:
+        entrada = semaforos_por_host.get(host)
+        if entrada is None:
+            entrada = semaforos_por_host[host] = [threading.BoundedSemaphore(LOTE_CONCORRENCIA_POR_HOST), 0]
+        entrada[1] += 1
     try:
-        arquivos = []
+        with entrada[0]:
+            yield
+    finally:
+        with semaforos_por_host_lock:
+            entrada[1] -= 1
+            if entrada[1] == 0:
+                del semaforos_por_host[host]
+
+def processar_item_lote(indice, url, nome_arquivo=None, motor_dom=None, usar_cache=True, tentativa=0):
+    """Faz uma tentativa de uma URL do lote respeitando os limites global e por host"""
+    inicio = time.perf_counter()
+    if not url or not isinstance(url, str):
+        resultado = {'sucesso': False, 'erro': 'URL inválida', 'mensagem': 'URL é obrigatória'}
+    else:
+        url = normalizar_url(url)
+        if not nome_arquivo:
+            # Mesmo padrão de processar_url, com o índice para não colidir no mesmo segundo
+            nome_arquivo = gerar_nome_arquivo(url)[:-len('.txt')] + f'_{indice + 1:03d}.txt'
+        # A vez no token bucket é esperada antes das vagas, e o host é reservado antes
+        # da vaga global para não ocupá-la enquanto espera
+        with controle_hosts.reserva_antecipada(url), semaforo_do_host(url), semaforo_lote:
+            resultado = processar_url(url, nome_arquivo, motor_dom, usar_cache, None, tentativa)
+    return {'indice': indice, 'url': url, **resultado, 'retentativas': tentativa,
+            'duracao': round(time.perf_counter() - inicio, 3)}
+
+def processar_lote(tarefas, motor_dom=None, usar_cache=True):
+    """Processa (url, nome_arquivo) em paralelo, gerando cada resultado assim que fica pronto.
+
+    Falhas transitórias voltam ao lote depois do `tentar_apos`, com o mesmo orçamento das
+    extrações síncronas (ver processar_url_sincrono); a espera não ocupa threads nem vagas.
+    """
+    import heapq
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    executor = ThreadPoolExecutor(max_workers=min(LOTE_CONCORRENCIA, len(tarefas)))
+    # futuro -> (indice, url, nome_arquivo, tentativa, espera_total, inicio)
+    pendentes = {}
+    # Retentativas agendadas: (pronta_em, indice, url, nome_arquivo, tentativa, espera_total, inicio)
+    adiadas = []
+
+    def enviar(indice, url, nome_arquivo, tentativa=0, espera_total=0.0, inicio=None):
+        futuro = executor.submit(processar_item_lote, indice, url, nome_arquivo, motor_dom, usar_cache, tentativa)
+        pendentes[futuro] = (indice, url, nome_arquivo, tentativa, espera_total, inicio)
+
+    try:
+        for indice, (url, nome_arquivo) in enumerate(tarefas):
+            enviar(indice, url, nome_arquivo)
+        while pendentes or adiadas:
+            while adiadas and adiadas[0][0] <= time.monotonic():
+                enviar(*heapq.heappop(adiadas)[1:])
+            espera = max(0.0, adiadas[0][0] - time.monotonic()) if adiadas else None
+            if not pendentes:
+                time.sleep(espera)
+                continue
+            
+            concluidos, _ = wait(pendentes, timeout=espera, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                indice, url, nome_arquivo, tentativa, espera_total, inicio = pendentes.pop(futuro)
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    logger.error(f"Erro no item {indice} do lote: {e}")
+                    yield {
+                        'indice': indice,
+                        'url': url,
+                        'sucesso': False,
+                        'erro': str(e),
+                        'mensagem': f'Erro durante a extração: {str(e)}'
+                    }
+                    continue
+                # A duração de um item conta desde o início da primeira tentativa
+                if inicio is None:
+                    inicio = time.perf_counter() - resultado['duracao']
+                atraso = atraso_retentativa_sincrona(resultado, tentativa, espera_total)
+                if atraso is not None:
+                    logger.info(f"🔁 Nova tentativa de {resultado['url']} em {atraso:.1f}s ({tentativa + 1}/{RETENTATIVAS_MAX - 1})")
+                    heapq.heappush(adiadas, (time.monotonic() + atraso, indice, resultado['url'], nome_arquivo,
+                                             tentativa + 1, espera_total + atraso, inicio))
+                    continue
+                resultado['duracao'] = round(time.perf_counter() - inicio, 3)
+                yield resultado
+    finally:
+        # Se o cliente abandonar o fluxo, as URLs ainda não iniciadas são canceladas
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def resumir_lote(resultados, inicio):
+    """Monta os totais de um lote processado"""
+    sucessos = sum(1 for r in resultados if r.get('sucesso'))
+    return {
+        'total': len(resultados),
+        'sucessos': sucessos,
+        'falhas': len(resultados) - sucessos,
+        'duracao': round(time.perf_counter() - inicio, 3)
+    }
+
+@app.route('/extrair/lote', methods=['POST'])
+def extrair_lote():
+    """Endpoint para extrair várias URLs em paralelo (JSON único ou fluxo NDJSON)"""
+    try:
+        data = request.get_json() or {}
+        itens = data.get('urls') or []
+        motor_dom = data.get('motor_dom')
+        usar_cache = not data.get('sem_cache')
+        
+        if not isinstance(itens, list) or not itens:
+            return jsonify({'sucesso': False, 'mensagem': 'Lista de URLs é obrigatória'})
+        if len(itens) > LOTE_MAX_URLS:
+            return jsonify({
+                'sucesso': False,
+                'mensagem': f'O lote aceita no máximo {LOTE_MAX_URLS} URLs'
+            })
+        
+        # Cada item pode ser "url" ou {"url": ..., "filename": ...}
+        tarefas = []
+        for item in itens:
+            if isinstance(item, dict):
+                tarefas.append((item.get('url'), item.get('filename')))
+            else:
+                tarefas.append((item, None))
+        
+        inicio = time.perf_counter()
+        
+        if data.get('stream'):
+            # Uma linha JSON por URL concluída e uma linha final com o resumo
+            def gerar():
+                resultados = []
+                for resultado in processar_lote(tarefas, motor_dom, usar_cache):
+                    resultados.append(resultado)
+                    yield json.dumps(resultado, ensure_ascii=False) + '\n'
+                yield json.dumps({'resumo': resumir_lote(resultados, inicio)}, ensure_ascii=False) + '\n'
+            return Response(stream_with_context(gerar()), mimetype='application/x-ndjson')
+        
+        resultados = sorted(processar_lote(tarefas, motor_dom, usar_cache), key=lambda r: r['indice'])
+        return jsonify({'sucesso': True, **resumir_lote(resultados, inicio), 'resultados': resultados})
+        
+    except Exception as e:
+        logger.error(f"Erro no endpoint /extrair/lote: {e}")
+        return jsonify({
+            'sucesso': False,
+            'mensagem': f'Erro interno: {str(e)}'
+        })
+
+# Intervalo (s) sem eventos após o qual /extrair/stream envia um comentário de keep-alive
+SSE_INTERVALO_KEEPALIVE = float(os.environ.get('EXTRACTO_SSE_KEEPALIVE', '15'))
+
+@app.route('/extrair/stream')
+def extrair_stream():
+    """Endpoint SSE: etapas, título e blocos de texto conforme a extração avança"""
+    import queue
+    
+    url = request.args.get('url')
+    if not url:
+        return jsonify({'sucesso': False, 'mensagem': 'URL é obrigatória'})
+    
+    url = normalizar_url(url)
+    filename = request.args.get('filename')
+    motor_dom = request.args.get('motor_dom')
+    usar_cache = request.args.get('sem_cache', '').lower() not in ('1', 'true')
+    
+    eventos = queue.Queue()
+    inicio = time.perf_counter()
+    
+    def progresso(evento, dados):
+        eventos.put((evento, {**dados, 'decorrido': round(time.perf_counter() - inicio, 3)}))
+    
+    # A extração roda em uma thread própria: se o cliente desconectar ela termina e grava o arquivo
+    def executar():
+        try:
+            resultado = processar_url_sincrono(url, filename, motor_dom, usar_cache, progresso)
+            eventos.put(('resultado', resultado))
+        finally:
+            eventos.put(None)
+    
+    threading.Thread(target=executar, name='extracao-stream', daemon=True).start()
+    
+    def gerar():
+        while True:
+            try:
+                item = eventos.get(timeout=SSE_INTERVALO_KEEPALIVE)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            if item is None:
+                return
+            evento, dados = item
+            yield f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+    
+    resposta = Response(stream_with_context(gerar()), mimetype='text/event-stream')
+    resposta.headers['Cache-Control'] = 'no-cache'
+    resposta.headers['X-Accel-Buffering'] = 'no'
+    return resposta
+
+@app.route('/jobs')
+def status_jobs():
+    """Mostra a profundidade da fila e a utilização dos workers de extração"""
+    return jsonify({'sucesso': True, 'fila': fila_jobs.estatisticas()})
+
+@app.route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+def consultar_job(job_id):
+    """Consulta (GET) ou cancela (DELETE) uma extração assíncrona"""
+    if request.method == 'DELETE':
+        job = fila_jobs.cancelar(job_id)
+    else:
+        job = fila_jobs.consultar(job_id)
+    
+    if job is None:
+        return jsonify({'sucesso': False, 'erro': 'Job não encontrado'}), 404
+    
+    return jsonify({'sucesso': True, 'job': job})
+
+# Configurações do modo crawl (/crawl)
+CRAWL_PROFUNDIDADE_PADRAO = int(os.environ.get('EXTRACTO_CRAWL_PROFUNDIDADE', '2'))
+CRAWL_MAX_PAGINAS_PADRAO = int(os.environ.get('EXTRACTO_CRAWL_MAX_PAGINAS', '50'))
+CRAWL_MAX_PAGINAS_LIMITE = int(os.environ.get('EXTRACTO_CRAWL_MAX_PAGINAS_LIMITE', '1000'))
+CRAWL_CONCORRENCIA = int(os.environ.get('EXTRACTO_CRAWL_CONCORRENCIA', '4'))
+CRAWL_INTERVALO_HOST = float(os.environ.get('EXTRACTO_CRAWL_INTERVALO_HOST', '0.5'))
+CRAWL_RESPEITAR_ROBOTS = os.environ.get('EXTRACTO_CRAWL_ROBOTS', '1') != '0'
+CRAWL_DIR = os.path.join(RESULTS_DIR, 'crawls')
+
+ESTADOS_FINAIS_CRAWL = ('concluido', 'cancelado', 'falhou')
+
+# Links para arquivos que não são páginas não entram na fronteira
+EXTENSOES_NAO_HTML = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.zip', '.gz', '.tar',
+    '.rar', '.7z', '.mp3', '.mp4', '.avi', '.mov', '.webm', '.css', '.js', '.json', '.xml',
+    '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.exe', '.dmg', '.woff', '.woff2', '.ttf'
+)
+
+def normalizar_url_crawl(url):
+    """Forma canônica da URL para a fronteira: sem fragmento, host minúsculo e porta padrão omitida"""
+    from urllib.parse import urlsplit, urlunsplit
+    partes = urlsplit(url.strip())
+    esquema = partes.scheme.lower()
+    if esquema not in ('http', 'https') or not partes.hostname:
+        return None
+    try:
+        porta = partes.port
+    except ValueError:
+        return None
+    host = partes.hostname.lower()
+    if porta is not None and (esquema, porta) not in (('http', 80), ('https', 443)):
+        host = f'{host}:{porta}'
+    return urlunsplit((esquema, host, partes.path or '/', partes.query, ''))
+
+def dominio_crawl(url):
+    """Domínio usado para decidir se um link é do mesmo site (ignora 'www.')"""
+    from urllib.parse import urlsplit
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+class ConjuntoVisitadas:
+    """Conjunto compacto de URLs já vistas: guarda só um hash de 64 bits de cada URL"""
+
+    def __init__(self):
+        self._hashes = set()
+
+    def adicionar(self, url):
+        """Adiciona a URL e retorna True se ela ainda não tinha sido vista"""
+        import hashlib
+        chave = int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big')
+        if chave in self._hashes:
+            return False
+        self._hashes.add(chave)
+        return True
+
+    def __len__(self):
+        return len(self._hashes)
+
+class GerenciadorCrawls:
+    """Executa crawls de um site a partir de uma URL semente, em segundo plano.
+
+    A fronteira segue só links do mesmo domínio até a profundidade e o orçamento de
+    páginas pedidos; cada URL entra uma única vez (ConjuntoVisitadas). As páginas são
+    extraídas em paralelo por processar_url, respeitando o limite de extrações
+    simultâneas por host dos lotes, um intervalo mínimo entre acessos ao mesmo host
+    e o robots.txt. Os arquivos ficam em RESULTS_DIR com o prefixo crawl_<id>_ e o
+    manifesto em crawls/<id>.json.
+    """
+
+    def __init__(self, retencao):
+        self.retencao = retencao
+        self._lock = threading.Lock()
+        self._crawls = {}
+
+    def _limpar_antigos(self):
+        limite = time.time() - self.retencao
+        with self._lock:
+            for crawl_id in [c['id'] for c in self._crawls.values()
+                             if c['estado'] in ESTADOS_FINAIS_CRAWL and c['concluido_em'] < limite]:
+                del self._crawls[crawl_id]
+
+    def iniciar(self, semente, profundidade=None, max_paginas=None, motor_dom=None, concorrencia=None):
+        """Cria o crawl, inicia a execução em segundo plano e retorna seu estado"""
+        import uuid
+        semente = normalizar_url_crawl(semente)
+        if not semente:
+            raise ValueError('URL semente inválida')
+        self._limpar_antigos()
+        crawl = {
+            'id': uuid.uuid4().hex[:12],
+            'semente': semente,
+            'dominio': dominio_crawl(semente),
+            'profundidade': CRAWL_PROFUNDIDADE_PADRAO if profundidade is None else max(0, int(profundidade)),
+            'max_paginas': min(int(max_paginas or CRAWL_MAX_PAGINAS_PADRAO), CRAWL_MAX_PAGINAS_LIMITE),
+            'motor_dom': motor_dom,
+            'concorrencia': max(1, int(concorrencia or CRAWL_CONCORRENCIA)),
+            'estado': 'executando',
+            'cancelamento_solicitado': False,
+            'criado_em': time.time(),
+            'concluido_em': None,
+            'na_fronteira': 0,
+            'em_andamento': 0,
+            'aguardando_retentativa': 0,
+            'urls_vistas': 0,
+            'ignoradas_robots': 0,
+            'paginas': [],
+            'erro': None
+        }
+        with self._lock:
+            self._crawls[crawl['id']] = crawl
+        threading.Thread(target=self._executar, args=(crawl,), name=f"crawl-{crawl['id']}", daemon=True).start()
+        return self.consultar(crawl['id'])
+
+    def _permitido_pelo_robots(self, crawl, robots, url):
+        """Consulta (e guarda por host) o robots.txt do host da URL"""
+        if not CRAWL_RESPEITAR_ROBOTS:
+            return True
+        from urllib.parse import urlsplit
+        from urllib.robotparser import RobotFileParser
+        partes = urlsplit(url)
+        origem = f'{partes.scheme}://{partes.netloc}'
+        if origem not in robots:
+            regras = RobotFileParser()
+            try:
+                resposta = cliente_http.get(origem + '/robots.txt', timeout=(5, 10))
+                if resposta.status_code in (401, 403):
+                    regras.disallow_all = True
+                elif resposta.status_code == 200:
+                    regras.parse(resposta.text.splitlines())
+                else:
+                    regras.allow_all = True
+            except Exception:
+                regras.allow_all = True
+            robots[origem] = regras
+        return robots[origem].can_fetch('Extracto', url)
+
+    def _visitar(self, crawl, indice, url, profundidade, ultimo_acesso, tentativa=0):
+        """Extrai uma página do crawl e retorna (registro da página, links encontrados)"""
+        from urllib.parse import urlsplit
+        links = []
+        
+        def acompanhar(evento, dados):
+            if evento == 'links':
+                links.extend(dados['links'])
+        
+        host = urlsplit(url).netloc
+        nome_arquivo = f"crawl_{crawl['id']}_{indice:04d}_{dominio_crawl(url).replace('.', '_')}.txt"
+        inicio = time.perf_counter()
+        # Intervalo mínimo entre acessos ao mesmo host dentro do crawl, esperado (como a vez
+        # no token bucket) antes de ocupar a vaga do host
+        with self._lock:
+            espera = ultimo_acesso.get(host, 0) + CRAWL_INTERVALO_HOST - time.time()
+            ultimo_acesso[host] = time.time() + max(0.0, espera)
+        if espera > 0:
+            time.sleep(espera)
+        with controle_hosts.reserva_antecipada(url), semaforo_do_host(url):
+            resultado = processar_url(url, nome_arquivo, crawl['motor_dom'], False, acompanhar, tentativa)
+        
+        pagina = {
+            'indice': indice,
+            'url': url,
+            'profundidade': profundidade,
+            'sucesso': resultado.get('sucesso', False),
+            'arquivo': resultado.get('arquivo'),
+            'erro': resultado.get('erro'),
+            'tentar_apos': resultado.get('tentar_apos'),
+            'retentativas': tentativa,
+            'links_encontrados': len(links),
+            'duracao': round(time.perf_counter() - inicio, 3)
+        }
+        return pagina, links
+
+    def _executar(self, crawl):
+        import heapq
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        
+        visitadas = ConjuntoVisitadas()
+        visitadas.adicionar(crawl['semente'])
+        fronteira = deque([(crawl['semente'], 0)])
+        # Falhas transitórias voltam depois do atraso: (pronta_em, indice, url, profundidade, tentativa)
+        adiadas = []
+        robots = {}
+        ultimo_acesso = {}
+        agendadas = 0
         
-        if os.path.exists(RESULTS_DIR):
-            for arquivo in os.listdir(RESULTS_DIR):
-                if arquivo.endswith('.txt'):
-                    caminho = os.path.join(RESULTS_DIR, arquivo)
-                    stat = os.stat(caminho)
+        try:
+            with ThreadPoolExecutor(max_workers=crawl['concorrencia']) as executor:
+                pendentes = {}
+                while fronteira or pendentes or adiadas:
+                    if crawl['cancelamento_solicitado']:
+                        adiadas.clear()
+                    # Retentativas vencidas têm prioridade e não consomem orçamento de páginas
+                    while adiadas and adiadas[0][0] <= time.monotonic() and len(pendentes) < crawl['concorrencia']:
+                        _, indice, url, profundidade, tentativa = heapq.heappop(adiadas)
+                        futuro = executor.submit(self._visitar, crawl, indice, url, profundidade, ultimo_acesso, tentativa)
+                        pendentes[futuro] = profundidade
+                    # Agenda páginas até encher os workers ou esgotar o orçamento
+                    while (fronteira and len(pendentes) < crawl['concorrencia']
+                           and agendadas < crawl['max_paginas'] and not crawl['cancelamento_solicitado']):
+                        url, profundidade = fronteira.popleft()
+                        if not self._permitido_pelo_robots(crawl, robots, url):
+                            with self._lock:
+                                crawl['ignoradas_robots'] += 1
+                            continue
+                        agendadas += 1
+                        futuro = executor.submit(self._visitar, crawl, agendadas, url, profundidade, ultimo_acesso)
+                        pendentes[futuro] = profundidade
+                    
+                    with self._lock:
+                        crawl['na_fronteira'] = len(fronteira)
+                        crawl['em_andamento'] = len(pendentes)
+                        crawl['aguardando_retentativa'] = len(adiadas)
+                    # Sem trabalho pronto: acorda quando a próxima retentativa vencer
+                    espera = max(0.0, adiadas[0][0] - time.monotonic()) if adiadas else None
+                    if not pendentes:
+                        if espera is None:
+                            break
+                        time.sleep(min(espera, 0.5))
+                        continue
                     
-                    arquivos.append({
-                        'nome': arquivo,
-                        'tamanho': stat.st_size,
-                        'data': datetime.fromtimestamp(stat.st_mtime).isoformat()
-                    })
+                    concluidos, _ = wait(pendentes, timeout=espera, return_when=FIRST_COMPLETED)
+                    for futuro in concluidos:
+                        profundidade = pendentes.pop(futuro)
+                        pagina, links = futuro.result()
+                        if (pagina['tentar_apos'] is not None and pagina['retentativas'] + 1 < RETENTATIVAS_MAX
+                                and not crawl['cancelamento_solicitado']):
+                            heapq.heappush(adiadas, (time.monotonic() + pagina['tentar_apos'], pagina['indice'],
+                                                     pagina['url'], profundidade, pagina['retentativas'] + 1))
+                            continue
+                        # Só expande a fronteira enquanto ainda houver orçamento de páginas
+                        if profundidade < crawl['profundidade'] and agendadas + len(fronteira) < crawl['max_paginas']:
+                            for link in links:
+                                link = normalizar_url_crawl(link)
+                                if (link and dominio_crawl(link) == crawl['dominio']
+                                        and not link.split('?')[0].lower().endswith(EXTENSOES_NAO_HTML)
+                                        and visitadas.adicionar(link)):
+                                    fronteira.append((link, profundidade + 1))
+                        with self._lock:
+                            crawl['paginas'].append(pagina)
+                            crawl['urls_vistas'] = len(visitadas)
+        except Exception as e:
+            logger.error(f"Erro no crawl {crawl['id']}: {e}")
+            crawl['erro'] = str(e)
+        
+        with self._lock:
+            crawl['concluido_em'] = time.time()
+            crawl['na_fronteira'] = len(fronteira)
+            crawl['em_andamento'] = 0
+            crawl['aguardando_retentativa'] = 0
+            if crawl['erro']:
+                crawl['estado'] = 'falhou'
+            elif crawl['cancelamento_solicitado']:
+                crawl['estado'] = 'cancelado'
+            else:
+                crawl['estado'] = 'concluido'
+        
+        self._gravar_manifesto(crawl['id'])
+        logger.info(f"🕸️ Crawl {crawl['id']} {crawl['estado']}: {len(crawl['paginas'])} página(s)")
+
+    def _gravar_manifesto(self, crawl_id):
+        manifesto = self.consultar(crawl_id, incluir_paginas=True)
+        try:
+            os.makedirs(CRAWL_DIR, exist_ok=True)
+            with open(os.path.join(CRAWL_DIR, f'{crawl_id}.json'), 'w', encoding='utf-8') as f:
+                json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.warning(f"Falha ao gravar o manifesto do crawl {crawl_id}: {e}")
+
+    def cancelar(self, crawl_id):
+        """Para de agendar páginas (as em andamento terminam); retorna None se o crawl não existir"""
+        with self._lock:
+            crawl = self._crawls.get(crawl_id)
+            if crawl is None:
+                return None
+            if crawl['estado'] == 'executando':
+                crawl['cancelamento_solicitado'] = True
+        return self.consultar(crawl_id)
+
+    def consultar(self, crawl_id, incluir_paginas=True):
+        """Retorna o progresso do crawl (None se não existir)"""
+        with self._lock:
+            crawl = self._crawls.get(crawl_id)
+            if crawl is None:
+                return None
+            sucessos = sum(1 for p in crawl['paginas'] if p['sucesso'])
+            estado = {
+                'id': crawl['id'],
+                'semente': crawl['semente'],
+                'estado': crawl['estado'],
+                'profundidade': crawl['profundidade'],
+                'max_paginas': crawl['max_paginas'],
+                'motor_dom': crawl['motor_dom'],
+                'concorrencia': crawl['concorrencia'],
+                'criado_em': datetime.fromtimestamp(crawl['criado_em']).isoformat(),
+                'concluido_em': datetime.fromtimestamp(crawl['concluido_em']).isoformat() if crawl['concluido_em'] else None,
+                'duracao': round((crawl['concluido_em'] or time.time()) - crawl['criado_em'], 3),
+                'paginas_concluidas': len(crawl['paginas']),
+                'sucessos': sucessos,
+                'falhas': len(crawl['paginas']) - sucessos,
+                'em_andamento': crawl['em_andamento'],
+                'aguardando_retentativa': crawl['aguardando_retentativa'],
+                'na_fronteira': crawl['na_fronteira'],
+                'urls_vistas': crawl['urls_vistas'],
+                'ignoradas_robots': crawl['ignoradas_robots'],
+                'prefixo_arquivos': f"crawl_{crawl['id']}_",
+                'erro': crawl['erro']
+            }
+            if incluir_paginas:
+                estado['paginas'] = [dict(p) for p in crawl['paginas']]
+            return estado
+
+    def listar(self):
+        with self._lock:
+            ids = list(self._crawls)
+        return [self.consultar(crawl_id, incluir_paginas=False) for crawl_id in ids]
+
+gerenciador_crawls = GerenciadorCrawls(JOBS_RETENCAO)
+
+@app.route('/crawl', methods=['POST'])
+def iniciar_crawl():
+    """Inicia o crawl de um site a partir de uma URL semente"""
+    try:
+        data = request.get_json() or {}
+        url = data.get('url')
+        if not url:
+            return jsonify({'sucesso': False, 'mensagem': 'URL é obrigatória'})
+        
+        crawl = gerenciador_crawls.iniciar(
+            normalizar_url(url),
+            data.get('profundidade'),
+            data.get('max_paginas'),
+            data.get('motor_dom'),
+            data.get('concorrencia')
+        )
+        return jsonify({
+            'sucesso': True,
+            'crawl_id': crawl['id'],
+            'estado': crawl['estado'],
+            'mensagem': 'Crawl iniciado'
+        }), 202
         
-        # Ordenar por data de modificação (mais recente primeiro)
-        arquivos.sort(key=lambda x: x['data'], reverse=True)
+    except Exception as e:
+        logger.error(f"Erro no endpoint /crawl: {e}")
+        return jsonify({
+            'sucesso': False,
+            'mensagem': f'Erro interno: {str(e)}'
+        })
+
+@app.route('/crawls')
+def listar_crawls():
+    """Lista os crawls em andamento e os finalizados recentemente"""
+    return jsonify({'sucesso': True, 'crawls': gerenciador_crawls.listar()})
+
+@app.route('/crawl/<crawl_id>', methods=['GET', 'DELETE'])
+def consultar_crawl(crawl_id):
+    """Consulta (GET) o progresso ou cancela (DELETE) um crawl"""
+    if request.method == 'DELETE':
+        crawl = gerenciador_crawls.cancelar(crawl_id)
+    else:
+        crawl = gerenciador_crawls.consultar(crawl_id)
+    
+    if crawl is None:
+        return jsonify({'sucesso': False, 'erro': 'Crawl não encontrado'}), 404
+    return jsonify({'sucesso': True, 'crawl': crawl})
+
+def parametros_listagem():
+    """Lê ordenação e paginação da query string (?ordenar=data|nome|tamanho&ordem=asc&limite=&deslocamento=)"""
+    return {
+        'ordenar': request.args.get('ordenar', 'data'),
+        'decrescente': request.args.get('ordem', 'desc').lower() != 'asc',
+        'limite': request.args.get('limite', type=int),
+        'deslocamento': request.args.get('deslocamento', 0, type=int)
+    }
+
+@app.route('/arquivos')
+def listar_arquivos():
+    """Lista todos os arquivos extraídos"""
+    try:
+        # Consulta ao catálogo (padrão: mais recente primeiro, sem limite)
+        arquivos = [
+            {
+                'nome': linha['nome'],
+                'tamanho': linha['tamanho'],
+                'data': datetime.fromtimestamp(linha['modificado_em']).isoformat()
+            }
+            for linha in catalogo_resultados.listar(**parametros_listagem())
+        ]
         
-        return jsonify({'arquivos': arquivos})
+        return jsonify({'arquivos': arquivos, 'total': catalogo_resultados.contar()})
         
     except Exception as e:
         logger.error(f"Erro ao listar arquivos: {e}")
@@ -1295,6 +4880,25 @@ def download_arquivo(filename):
         if not os.path.exists(caminho_arquivo):
             return jsonify({'erro': 'Arquivo não encontrado'}), 404
         
+        # Resultado comprimido: entregue em gzip direto se o cliente aceitar
+        if request.accept_encodings['gzip']:
+            comprimido = armazenamento_resultados.gzip_direto(filename)
+            if comprimido:
+                tamanho, blocos = comprimido
+                response = Response(blocos, mimetype='text/plain')
+                response.headers['Content-Encoding'] = 'gzip'
+                response.headers['Content-Length'] = str(tamanho)
+                response.headers['Vary'] = 'Accept-Encoding'
+                response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+                return response
+        
+        if armazenamento_resultados.referencia(filename) is not None:
+            # Descomprime em blocos enquanto envia
+            response = Response(armazenamento_resultados.blocos(filename), mimetype='text/plain')
+            response.headers['Vary'] = 'Accept-Encoding'
+            response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+            return response
+        
         return send_file(
             caminho_arquivo,
             as_attachment=True,
@@ -1306,30 +4910,84 @@ def download_arquivo(filename):
         logger.error(f"Erro ao fazer download: {e}")
         return jsonify({'erro': 'Erro interno'}), 500
 
+class SaidaZip:
+    """Destino não pesquisável para o zipfile: acumula os bytes escritos até serem drenados"""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+def data_da_query(nome):
+    """Converte um parâmetro ISO (2024-01-31 ou 2024-01-31T12:00) da query string em timestamp"""
+    valor = request.args.get(nome)
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(valor).timestamp()
+    except ValueError:
+        raise ValueError(f"Data inválida em '{nome}': {valor} (use AAAA-MM-DD ou AAAA-MM-DDTHH:MM)")
+
+def gerar_zip_resultados(nomes):
+    """Gera o ZIP dos arquivos em blocos, comprimindo um arquivo de cada vez conforme o cliente lê"""
+    import zipfile
+    
+    saida = SaidaZip()
+    with zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for nome in nomes:
+            caminho_arquivo = os.path.join(RESULTS_DIR, nome)
+            try:
+                info_zip = zipfile.ZipInfo.from_file(caminho_arquivo, nome)
+                info_zip.compress_type = zipfile.ZIP_DEFLATED
+                blocos = armazenamento_resultados.blocos(nome)
+            except (OSError, ValueError):
+                # Removido depois da consulta ao catálogo
+                continue
+            with zip_file.open(info_zip, 'w') as destino:
+                for bloco in blocos:
+                    destino.write(bloco)
+                    dados = saida.drenar()
+                    if dados:
+                        yield dados
+            yield saida.drenar()
+    yield saida.drenar()
+
 @app.route('/download-all')
 def download_all():
-    """Download de todos os arquivos em um ZIP"""
+    """Download de todos os arquivos em um ZIP gerado em streaming
+
+    Filtros opcionais: ?desde=&ate= (datas ISO de modificação), ?prefixo= e
+    ?arquivos=a.txt,b.txt (lista explícita).
+    """
     try:
-        import zipfile
-        
-        # Criar arquivo ZIP em memória
-        zip_buffer = io.BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            if os.path.exists(RESULTS_DIR):
-                for arquivo in os.listdir(RESULTS_DIR):
-                    if arquivo.endswith('.txt'):
-                        caminho_arquivo = os.path.join(RESULTS_DIR, arquivo)
-                        zip_file.write(caminho_arquivo, arquivo)
+        linhas = catalogo_resultados.listar(
+            ordenar='nome', decrescente=False,
+            desde=data_da_query('desde'), ate=data_da_query('ate'),
+            prefixo=request.args.get('prefixo')
+        )
+        nomes = [linha['nome'] for linha in linhas]
         
-        zip_buffer.seek(0)
+        arquivos = request.args.get('arquivos')
+        if arquivos:
+            escolhidos = {nome.strip() for nome in arquivos.split(',') if nome.strip()}
+            nomes = [nome for nome in nomes if nome in escolhidos]
         
-        response = make_response(zip_buffer.getvalue())
-        response.headers['Content-Type'] = 'application/zip'
+        response = Response(stream_with_context(gerar_zip_resultados(nomes)), mimetype='application/zip')
         response.headers['Content-Disposition'] = 'attachment; filename=arquivos_extraidos.zip'
-        
         return response
         
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         logger.error(f"Erro ao criar ZIP: {e}")
         return jsonify({'erro': 'Erro interno'}), 500
@@ -1344,6 +5002,7 @@ def deletar_arquivo(filename):
             return jsonify({'erro': 'Arquivo não encontrado'}), 404
         
         os.remove(caminho_arquivo)
+        catalogo_resultados.remover([filename])
         return jsonify({'sucesso': True, 'mensagem': 'Arquivo deletado com sucesso'})
         
     except Exception as e:
@@ -1368,26 +5027,24 @@ def excluir_arquivos():
         data_limite = datetime.now() - timedelta(days=dias)
         
         arquivos_excluidos = []
-        total_arquivos = 0
+        total_arquivos = catalogo_resultados.contar()
         
-        # Listar todos os arquivos .txt no diretório
-        for arquivo in os.listdir(RESULTS_DIR):
-            if arquivo.endswith('.txt'):
-                caminho_arquivo = os.path.join(RESULTS_DIR, arquivo)
-                total_arquivos += 1
-                
-                # Verificar data de modificação do arquivo
-                data_modificacao = datetime.fromtimestamp(os.path.getmtime(caminho_arquivo))
-                
-                if data_modificacao >= data_limite:
-                    try:
-                        os.remove(caminho_arquivo)
-                        arquivos_excluidos.append({
-                            'nome': arquivo,
-                            'data_modificacao': data_modificacao.strftime('%d/%m/%Y %H:%M:%S')
-                        })
-                    except Exception as e:
-                        print(f"Erro ao excluir {arquivo}: {e}")
+        # Arquivos modificados a partir da data limite (consulta indexada no catálogo)
+        for linha in catalogo_resultados.listar(desde=data_limite.timestamp()):
+            arquivo = linha['nome']
+            caminho_arquivo = os.path.join(RESULTS_DIR, arquivo)
+            data_modificacao = datetime.fromtimestamp(linha['modificado_em'])
+            try:
+                if os.path.exists(caminho_arquivo):
+                    os.remove(caminho_arquivo)
+                arquivos_excluidos.append({
+                    'nome': arquivo,
+                    'data_modificacao': data_modificacao.strftime('%d/%m/%Y %H:%M:%S')
+                })
+            except Exception as e:
+                print(f"Erro ao excluir {arquivo}: {e}")
+        
+        catalogo_resultados.remover([arquivo['nome'] for arquivo in arquivos_excluidos])
         
         return jsonify({
             'sucesso': True,
@@ -1415,25 +5072,22 @@ def listar_arquivos_detalhado():
                 'erro': 'Diretório de arquivos não encontrado'
             })
         
-        for arquivo in os.listdir(RESULTS_DIR):
-            if arquivo.endswith('.txt'):
-                caminho = os.path.join(RESULTS_DIR, arquivo)
-                stat = os.stat(caminho)
-                
-                arquivos.append({
-                    'nome': arquivo,
-                    'tamanho': stat.st_size,
-                    'data_modificacao': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    'data_criacao': datetime.fromtimestamp(stat.st_ctime).isoformat()
-                })
-        
-        # Ordenar por data de modificação (mais recente primeiro)
-        arquivos.sort(key=lambda x: x['data_modificacao'], reverse=True)
+        # Consulta ao catálogo (padrão: mais recente primeiro, sem limite)
+        for linha in catalogo_resultados.listar(**parametros_listagem()):
+            arquivos.append({
+                'nome': linha['nome'],
+                'tamanho': linha['tamanho'],
+                'data_modificacao': datetime.fromtimestamp(linha['modificado_em']).isoformat(),
+                'data_criacao': datetime.fromtimestamp(linha['criado_em']).isoformat(),
+                'url': linha['url'],
+                'motor': linha['motor'],
+                'hash': linha['hash']
+            })
         
         return jsonify({
             'sucesso': True,
             'arquivos': arquivos,
-            'total': len(arquivos)
+            'total': catalogo_resultados.contar()
         })
         
     except Exception as e:
@@ -1442,6 +5096,150 @@ def listar_arquivos_detalhado():
             'erro': f'Erro ao listar arquivos: {str(e)}'
         })
 
+@app.route('/catalogo')
+def status_catalogo():
+    """Mostra o tamanho do catálogo de resultados e a última reconciliação"""
+    return jsonify({
+        'sucesso': True,
+        'catalogo': catalogo_resultados.estatisticas(),
+        'armazenamento': armazenamento_resultados.estatisticas()
+    })
+
+@app.route('/catalogo/reconciliar', methods=['POST'])
+def reconciliar_catalogo():
+    """Reconcilia o catálogo com o diretório de resultados imediatamente"""
+    try:
+        return jsonify({'sucesso': True, 'reconciliacao': reconciliar_resultados()})
+    except Exception as e:
+        logger.error(f"Erro ao reconciliar o catálogo: {e}")
+        return jsonify({'sucesso': False, 'erro': str(e)})
+
+@app.route('/dataset')
+def status_dataset():
+    """Mostra os shards do dataset estruturado de extrações"""
+    if dataset_extracoes is None:
+        return jsonify({'sucesso': False, 'mensagem': 'Dataset desativado (EXTRACTO_DATASET=0)'})
+    return jsonify({'sucesso': True, 'dataset': dataset_extracoes.estatisticas()})
+
+@app.route('/dataset/exportar')
+def exportar_dataset():
+    """Exporta o dataset em streaming: JSONL (padrão) ou Parquet (?formato=parquet, requer pyarrow)
+
+    Filtros opcionais: ?desde=&ate= (datas ISO da extração).
+    """
+    if dataset_extracoes is None:
+        return jsonify({'sucesso': False, 'mensagem': 'Dataset desativado (EXTRACTO_DATASET=0)'})
+    
+    desde = request.args.get('desde')
+    ate = request.args.get('ate')
+    formato = request.args.get('formato', 'jsonl')
+    
+    if formato == 'jsonl':
+        response = Response(stream_with_context(dataset_extracoes.blocos_jsonl(desde, ate)),
+                            mimetype='application/x-ndjson')
+        response.headers['Content-Disposition'] = 'attachment; filename=extracoes.jsonl'
+        return response
+    
+    if formato != 'parquet':
+        return jsonify({'sucesso': False, 'mensagem': f'Formato inválido: {formato}. Opções: jsonl, parquet'}), 400
+    
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return jsonify({'sucesso': False, 'mensagem': 'Exportação em Parquet requer o pacote pyarrow'}), 501
+    
+    try:
+        # O Parquet só fica legível com o rodapé: gera em arquivo temporário e envia em blocos
+        descritor, caminho = tempfile.mkstemp(suffix='.parquet')
+        os.close(descritor)
+        dataset_extracoes.exportar_parquet(caminho, desde, ate)
+        
+        def gerar():
+            try:
+                with open(caminho, 'rb') as f:
+                    while True:
+                        bloco = f.read(DOWNLOAD_TAMANHO_BLOCO)
+                        if not bloco:
+                            break
+                        yield bloco
+            finally:
+                os.remove(caminho)
+        
+        response = Response(gerar(), mimetype='application/vnd.apache.parquet')
+        response.headers['Content-Length'] = str(os.path.getsize(caminho))
+        response.headers['Content-Disposition'] = 'attachment; filename=extracoes.parquet'
+        return response
+        
+    except Exception as e:
+        logger.error(f"Erro ao exportar dataset: {e}")
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+@app.route('/cliente_http')
+def status_cliente_http():
+    """Mostra o reaproveitamento de conexões e o cache DNS do cliente HTTP compartilhado"""
+    return jsonify({'sucesso': True, 'cliente_http': cliente_http.estatisticas()})
+
+@app.route('/motor')
+def status_motor():
+    """Mostra o modo de extração e as decisões recentes do modo adaptativo"""
+    return jsonify({'sucesso': True, 'motor': registro_decisoes_motor.estatisticas()})
+
+@app.route('/processos_cpu')
+def status_processos_cpu():
+    """Mostra o pool de processos do parsing (tarefas, recriações e sobrecarga)"""
+    return jsonify({'sucesso': True, 'processos_cpu': pool_processos_cpu.estatisticas()})
+
+@app.route('/seletores')
+def status_seletores():
+    """Mostra os acertos de cada seletor das listas SELETORES_* (para podar os que nunca casam)"""
+    return jsonify({'sucesso': True, 'seletores': casador_seletores.estatisticas()})
+
+@app.route('/metrics')
+def metricas():
+    """Histogramas e contadores das etapas de extração no formato do Prometheus"""
+    return Response(metricas_extracao.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/hosts')
+def status_hosts():
+    """Mostra o limite de taxa e o estado do circuit breaker de cada host"""
+    return jsonify({'sucesso': True, 'hosts': controle_hosts.estatisticas()})
+
+@app.route('/cache', methods=['GET', 'DELETE'])
+def status_cache():
+    """Mostra os contadores do cache de extrações (GET) ou o esvazia (DELETE)"""
+    if request.method == 'DELETE':
+        cache_extracoes.limpar()
+    return jsonify({'sucesso': True, 'cache': cache_extracoes.estatisticas()})
+
+@app.route('/inicializacao')
+def relatorio_inicializacao():
+    """Mostra o tempo de inicialização do módulo e de cada importação"""
+    return jsonify({
+        'sucesso': True,
+        'inicializacao': {
+            'tempo_total': round(TEMPO_INICIALIZACAO, 4),
+            'orcamento': ORCAMENTO_INICIALIZACAO,
+            'dentro_do_orcamento': TEMPO_INICIALIZACAO <= ORCAMENTO_INICIALIZACAO,
+            'importacoes': TEMPOS_IMPORTACAO,
+            'selenium_carregado': By is not None,
+            'bs4_carregado': BeautifulSoup is not None
+        }
+    })
+
+@app.route('/pool_drivers')
+def status_pool_drivers():
+    """Mostra o tamanho, a ocupação e os tempos de espera do pool de drivers Chrome"""
+    return jsonify({'sucesso': True, 'pool': pool_drivers.estatisticas()})
+
+# Relatório de inicialização a frio (importações + configuração do módulo)
+TEMPO_INICIALIZACAO = time.perf_counter() - INICIO_MODULO
+ORCAMENTO_INICIALIZACAO = float(os.environ.get('EXTRACTO_ORCAMENTO_INICIALIZACAO', '1.0'))
+logger.info(f"Módulo inicializado em {TEMPO_INICIALIZACAO:.3f}s (importações: {TEMPOS_IMPORTACAO})")
+if TEMPO_INICIALIZACAO > ORCAMENTO_INICIALIZACAO:
+    logger.warning(
+        f"Inicialização a frio ({TEMPO_INICIALIZACAO:.3f}s) acima do orçamento de {ORCAMENTO_INICIALIZACAO}s"
+    )
+
 if __name__ == '__main__':
     print("🚀 Iniciando Extrator de Texto Web...")
     print("📱 Acesse: http://localhost:5000")
@@ -0,0 +1,278 @@
+"""Mede cada etapa do método requests sobre um corpus HTML fixo, sem acesso à rede
+
+O corpus fica em benchmarks/corpus (páginas salvas de notícia, blog, documentação e
+e-commerce em windows-1252) e é servido por um servidor HTTP local; as páginas
+patológicas são geradas na execução para não versionar arquivos grandes: 'grande'
+(~5 MB) e 'aninhado' (divs aninhados em profundidade). Para cada página e etapa
+(download, decodificacao, parse, estrategias, deduplicacao, limpeza) são medidos
+p50/p99, throughput e pico de memória (tracemalloc, em uma passada separada). O
+resultado é salvo em JSON e pode ser comparado com uma execução anterior.
+
+Uso: python benchmarks/extracao.py [--repeticoes N] [--motor-dom MOTOR]
+                                   [--saida arquivo.json] [--comparar anterior.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import threading
+import statistics
+import tracemalloc
+from datetime import datetime
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_CORPUS = os.path.join(DIRETORIO, 'corpus')
+DIRETORIO_RESULTADOS = os.path.join(DIRETORIO, 'resultados')
+
+# Páginas acima desse tamanho usam --repeticoes-grandes (a de 5 MB leva segundos por execução)
+TAMANHO_PAGINA_GRANDE = 1024 * 1024
+
+ETAPAS = ('download', 'decodificacao', 'parse', 'estrategias', 'deduplicacao', 'limpeza')
+
+# Mesma prioridade de tipos usada por processar_html
+TIPOS_PRIORIZADOS = ['header', 'seletor_principal', 'paragrafo', 'div_conteudo',
+                     'lista', 'tabela', 'span', 'link', 'body_completo']
+
+def gerar_paginas_sinteticas():
+    """Gera as páginas patológicas do corpus: ~5 MB de artigo e aninhamento profundo"""
+    aleatorio = random.Random(7)
+    # Vocabulário grande: com poucas palavras todo texto compartilharia k-gramas com todos os
+    # outros, o que mede o pior caso do DeduplicadorTextos e não uma página real
+    silabas = ('ca', 'da', 'ção', 'men', 'to', 're', 'pa', 'gi', 'na', 'lo', 'tex', 'pro', 'du', 'vi', 'ar', 'se')
+    palavras = [''.join(aleatorio.choice(silabas) for _ in range(aleatorio.randint(2, 4))) for _ in range(3000)]
+
+    def frase(n):
+        return ' '.join(aleatorio.choice(palavras) for _ in range(n)).capitalize() + '.'
+
+    partes = ['<html><head><meta charset="utf-8"><title>Página grande</title></head><body><main>']
+    tamanho = 0
+    while tamanho < 5 * 1024 * 1024:
+        bloco = (f'<section><h2>{frase(6)}</h2><p>{frase(60)}</p>'
+                 f'<ul><li>{frase(8)}</li><li>{frase(8)}</li></ul><div class="card"><span>{frase(5)}</span></div></section>')
+        partes.append(bloco)
+        tamanho += len(bloco.encode('utf-8'))
+    partes.append('</main></body></html>')
+
+    profundidade = 1000
+    aninhado = ('<html><head><meta charset="utf-8"><title>Aninhamento profundo</title></head><body>'
+                + '<div class="nivel">' * profundidade + f'<p>{frase(40)}</p>' + '</div>' * profundidade
+                + ''.join(f'<div><div><div><p>{frase(20)}</p></div></div></div>' for _ in range(300))
+                + '</body></html>')
+
+    return {
+        'grande': ''.join(partes).encode('utf-8'),
+        'aninhado': aninhado.encode('utf-8')
+    }
+
+def carregar_corpus():
+    """Lê as páginas salvas e acrescenta as sintéticas: nome -> bytes"""
+    paginas = {}
+    for nome_arquivo in sorted(os.listdir(DIRETORIO_CORPUS)):
+        if nome_arquivo.endswith('.html'):
+            with open(os.path.join(DIRETORIO_CORPUS, nome_arquivo), 'rb') as f:
+                paginas[nome_arquivo[:-len('.html')]] = f.read()
+    paginas.update(gerar_paginas_sinteticas())
+    return paginas
+
+def iniciar_servidor(paginas):
+    """Serve as páginas em 127.0.0.1 numa porta livre; retorna (servidor, url_base)"""
+
+    class Manipulador(SimpleHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Cabeçalho e corpo saem em escritas separadas: sem isso o Nagle soma ~40 ms às páginas pequenas
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            corpo = paginas.get(self.path.strip('/'))
+            if corpo is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            # Sem charset no cabeçalho: o charset vem do meta/detecção, como em boa parte da web
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f'http://127.0.0.1:{servidor.server_address[1]}/'
+
+def executar_etapas(url, motor_dom, tempos=None):
+    """Executa o pipeline do método requests etapa por etapa; acumula os tempos (s) em `tempos`"""
+    import lxml.html
+
+    def marcar(etapa, inicio):
+        agora = time.perf_counter()
+        if tempos is not None:
+            tempos[etapa].append(agora - inicio)
+        return agora
+
+    inicio = time.perf_counter()
+    resposta = app.cliente_http.get(url, timeout=(5, 30), stream=True)
+    corpo = app.ler_corpo_limitado(resposta)
+    inicio = marcar('download', inicio)
+
+    encoding, _ = app.resolver_charset(corpo, resposta.headers.get('content-type', ''))
+    html_content = corpo.decode(encoding, errors='replace')
+    del corpo
+    inicio = marcar('decodificacao', inicio)
+
+    # O motor faz o próprio parsing: a etapa 'estrategias' é o tempo do motor menos o parse isolado
+    if motor_dom == 'lxml':
+        lxml.html.document_fromstring(html_content)
+    else:
+        app.carregar_bs4()
+        app.BeautifulSoup(html_content, 'html.parser')
+    inicio_parse = inicio
+    inicio = marcar('parse', inicio)
+    duracao_parse = inicio - inicio_parse
+
+    _, _, blocos = app.extrair_blocos_html(html_content, motor_dom)
+    agora = time.perf_counter()
+    if tempos is not None:
+        tempos['estrategias'].append(max(0.0, (agora - inicio) - duracao_parse))
+    inicio = agora
+
+    partes = app.selecionar_textos_unicos(blocos, TIPOS_PRIORIZADOS)
+    inicio = marcar('deduplicacao', inicio)
+
+    texto = app.limpar_texto_extraido('\n\n'.join(partes))
+    marcar('limpeza', inicio)
+    return texto
+
+class TemposComPicoMemoria(dict):
+    """Tempos por etapa que também anotam o pico de memória (KB) de cada etapa.
+
+    executar_etapas acessa tempos[etapa] ao fim de cada etapa: nesse momento o pico do
+    tracemalloc é lido e zerado para a próxima.
+    """
+
+    def __init__(self):
+        super().__init__((etapa, []) for etapa in ETAPAS)
+        self.picos = {}
+
+    def __getitem__(self, etapa):
+        _, pico = tracemalloc.get_traced_memory()
+        self.picos[etapa] = pico // 1024
+        tracemalloc.reset_peak()
+        return super().__getitem__(etapa)
+
+def medir_memoria(url, motor_dom):
+    """Pico de memória (KB) de cada etapa, medido com tracemalloc numa passada própria"""
+    tempos = TemposComPicoMemoria()
+    tracemalloc.start()
+    try:
+        executar_etapas(url, motor_dom, tempos)
+    finally:
+        tracemalloc.stop()
+    return tempos.picos
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    return statistics.quantiles(ordenados, n=100, method='inclusive')[p - 1]
+
+def medir_pagina(url, tamanho, motor_dom, repeticoes):
+    """Mede as etapas de uma página: p50/p99/média (ms), throughput (MB/s) e pico de memória"""
+    tempos = {etapa: [] for etapa in ETAPAS}
+    for _ in range(repeticoes):
+        executar_etapas(url, motor_dom, tempos)
+    picos = medir_memoria(url, motor_dom)
+
+    etapas = {}
+    for etapa in ETAPAS:
+        p50 = percentil(tempos[etapa], 50)
+        etapas[etapa] = {
+            'p50_ms': round(p50 * 1000, 3),
+            'p99_ms': round(percentil(tempos[etapa], 99) * 1000, 3),
+            'media_ms': round(statistics.fmean(tempos[etapa]) * 1000, 3),
+            'mb_s': round(tamanho / 1024 / 1024 / p50, 2) if p50 else None,
+            'memoria_pico_kb': picos.get(etapa)
+        }
+    return etapas
+
+def comparar(atual, anterior):
+    """Imprime a razão entre os p50 desta execução e os de uma execução anterior"""
+    print(f"\nComparação com {anterior['data']} (p50 atual / anterior; < 1 é mais rápido)")
+    print(f"{'página':<14} " + ' '.join(f'{etapa:>13}' for etapa in ETAPAS))
+    for nome, pagina in atual['paginas'].items():
+        antiga = anterior['paginas'].get(nome)
+        if not antiga:
+            continue
+        colunas = []
+        for etapa in ETAPAS:
+            novo = pagina['etapas'][etapa]['p50_ms']
+            velho = antiga['etapas'].get(etapa, {}).get('p50_ms')
+            colunas.append(f'{novo / velho:>12.2f}x' if velho else f"{'-':>13}")
+        print(f"{nome:<14} " + ' '.join(colunas))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das etapas do método requests')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--repeticoes-grandes', type=int, default=3,
+                        help='repetições das páginas com mais de 1 MB')
+    parser.add_argument('--motor-dom', default=app.MOTOR_DOM_PADRAO, choices=app.MOTORES_DOM)
+    parser.add_argument('--saida', help='arquivo JSON do resultado (padrão: benchmarks/resultados/)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior')
+    argumentos = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    paginas = carregar_corpus()
+    servidor, url_base = iniciar_servidor(paginas)
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'motor_dom': argumentos.motor_dom,
+        'paginas': {}
+    }
+
+    try:
+        # Aquecimento com a menor página (imports, pool de conexões, XPaths compilados)
+        executar_etapas(url_base + min(paginas, key=lambda nome: len(paginas[nome])), argumentos.motor_dom)
+
+        print(f"motor_dom={argumentos.motor_dom} (p50 em ms | pico de memória em KB)")
+        print(f"{'página':<14} {'KB':>6} " + ' '.join(f'{etapa:>19}' for etapa in ETAPAS))
+        for nome, corpo in paginas.items():
+            repeticoes = argumentos.repeticoes
+            if len(corpo) > TAMANHO_PAGINA_GRANDE:
+                repeticoes = min(repeticoes, argumentos.repeticoes_grandes)
+            etapas = medir_pagina(url_base + nome, len(corpo), argumentos.motor_dom, repeticoes)
+            resultado['paginas'][nome] = {'bytes': len(corpo), 'repeticoes': repeticoes, 'etapas': etapas}
+            print(f"{nome:<14} {len(corpo) // 1024:>6} " + ' '.join(
+                f"{etapas[e]['p50_ms']:>9.2f} | {etapas[e]['memoria_pico_kb']:>7}" for e in ETAPAS))
+    finally:
+        servidor.shutdown()
+
+    resultado['totais_p50_ms'] = {
+        etapa: round(sum(p['etapas'][etapa]['p50_ms'] for p in resultado['paginas'].values()), 3)
+        for etapa in ETAPAS
+    }
+
+    saida = argumentos.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"extracao_{argumentos.motor_dom}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultado salvo em {saida}")
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding='utf-8') as f:
+            comparar(resultado, json.load(f))
+
+if __name__ == '__main__':
+    main()
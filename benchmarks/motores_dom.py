@@ -0,0 +1,87 @@
+"""Compara o tempo dos motores DOM do método requests sobre um corpus HTML fixo
+
+Uso: python benchmarks/motores_dom.py [repeticoes]
+"""
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+def gerar_corpus():
+    """Gera páginas sintéticas determinísticas (artigo, listagem, tabela e aninhamento profundo)"""
+    aleatorio = random.Random(42)
+    palavras = ('extração', 'conteúdo', 'página', 'texto', 'análise', 'dados',
+                'notícia', 'produto', 'documento', 'tabela', 'lista', 'resumo')
+
+    def frase(n):
+        return ' '.join(aleatorio.choice(palavras) for _ in range(n)).capitalize() + '.'
+
+    cabecalho = ('<html><head><title>{titulo}</title>'
+                 '<meta name="description" content="{descricao}">'
+                 '<script>var x = 1;</script><style>p {{ color: red; }}</style></head><body>')
+
+    artigo = [cabecalho.format(titulo='Artigo', descricao=frase(8))]
+    artigo.append('<nav><ul>' + ''.join(f'<li><a href="/{i}">{frase(3)}</a></li>' for i in range(30)) + '</ul></nav>')
+    artigo.append('<article class="post-content"><h1>' + frase(6) + '</h1>')
+    for _ in range(80):
+        artigo.append(f'<h2>{frase(5)}</h2><p>{frase(40)} <span>{frase(6)}</span></p>')
+    artigo.append('</article><div class="ads">' + frase(10) + '</div></body></html>')
+
+    listagem = [cabecalho.format(titulo='Listagem', descricao=frase(8)), '<main>']
+    for i in range(300):
+        listagem.append(f'<div class="card"><a href="/p/{i}">{frase(4)}</a>'
+                        f'<span class="preco">R$ {i},90</span><p>{frase(15)}</p></div>')
+    listagem.append('</main></body></html>')
+
+    tabela = [cabecalho.format(titulo='Tabela', descricao=frase(8)), '<div id="content"><table>']
+    for _ in range(500):
+        tabela.append('<tr>' + ''.join(f'<td>{frase(2)}</td>' for _ in range(6)) + '</tr>')
+    tabela.append('</table></div></body></html>')
+
+    profundo = [cabecalho.format(titulo='Aninhado', descricao=frase(8))]
+    profundo.append('<div class="wrapper">' * 200 + f'<p>{frase(30)}</p>' + '</div>' * 200)
+    profundo.append('</body></html>')
+
+    return {
+        'artigo': ''.join(artigo),
+        'listagem': ''.join(listagem),
+        'tabela': ''.join(tabela),
+        'aninhado': ''.join(profundo),
+    }
+
+def medir(html, motor_dom, repeticoes):
+    """Retorna o menor tempo (ms) de parsing + coleta + deduplicação do motor"""
+    tipos = ['seletor_principal', 'paragrafo', 'div_conteudo', 'header', 'lista', 'tabela', 'span', 'link']
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        _, _, blocos = app.extrair_blocos_html(html, motor_dom)
+        app.selecionar_textos_unicos(blocos, tipos)
+        decorrido = (time.perf_counter() - inicio) * 1000
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    logging.disable(logging.INFO)
+    corpus = gerar_corpus()
+
+    print(f"{'página':<10} {'KB':>6} " + ' '.join(f'{motor:>15}' for motor in app.MOTORES_DOM))
+    totais = dict.fromkeys(app.MOTORES_DOM, 0.0)
+    for nome, html in corpus.items():
+        tempos = {motor: medir(html, motor, repeticoes) for motor in app.MOTORES_DOM}
+        for motor, tempo in tempos.items():
+            totais[motor] += tempo
+        print(f"{nome:<10} {len(html) // 1024:>6} " + ' '.join(f'{tempos[m]:>12.1f} ms' for m in app.MOTORES_DOM))
+
+    base = totais['estrategias']
+    print(f"{'total':<10} {'':>6} " + ' '.join(f'{totais[m]:>12.1f} ms' for m in app.MOTORES_DOM))
+    print(f"{'ganho':<10} {'':>6} " + ' '.join(f'{base / totais[m]:>14.1f}x' for m in app.MOTORES_DOM))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Mede o throughput do parsing com threads concorrentes, na thread e no pool de processos
+
+Cada configuração processa as mesmas páginas (processar_html, dos bytes ao texto final)
+a partir de várias threads, como fazem os jobs e o crawl: primeiro na própria thread
+(limitada pelo GIL) e depois em PoolProcessosCPU com 1 até os.cpu_count() workers. O
+download fica de fora para medir só a CPU. Saem páginas/s, o ganho sobre a execução em
+thread e a sobrecarga média de cada ida e volta ao pool.
+
+Uso: python benchmarks/processos_cpu.py [--threads N] [--paginas N] [--workers 1,2,4]
+                                        [--motor-dom MOTOR] [--saida arquivo.json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import threading
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+from extracao import carregar_corpus, DIRETORIO_RESULTADOS, TAMANHO_PAGINA_GRANDE
+
+def medir(paginas, total, threads, executar):
+    """Processa `total` páginas (em rodízio) com `threads` threads; retorna páginas/s"""
+    proxima = iter(range(total))
+    lock = threading.Lock()
+    erros = []
+
+    def trabalhar():
+        while True:
+            with lock:
+                indice = next(proxima, None)
+            if indice is None:
+                return
+            try:
+                executar(paginas[indice % len(paginas)])
+            except Exception as e:
+                erros.append(e)
+                return
+
+    inicio = time.perf_counter()
+    grupo = [threading.Thread(target=trabalhar) for _ in range(threads)]
+    for thread in grupo:
+        thread.start()
+    for thread in grupo:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    if erros:
+        raise erros[0]
+    return total / duracao
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput do parsing: threads x pool de processos')
+    parser.add_argument('--threads', type=int, default=max(4, 2 * (os.cpu_count() or 1)))
+    parser.add_argument('--paginas', type=int, default=200, help='páginas processadas por configuração')
+    parser.add_argument('--workers', help='tamanhos do pool separados por vírgula (padrão: 1 até os.cpu_count())')
+    parser.add_argument('--motor-dom', default=app.MOTOR_DOM_PADRAO, choices=app.MOTORES_DOM)
+    parser.add_argument('--saida', help='arquivo JSON do resultado (padrão: benchmarks/resultados/)')
+    argumentos = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    # A página de ~5 MB dominaria o tempo de todas as configurações
+    corpus = {nome: corpo for nome, corpo in carregar_corpus().items() if len(corpo) <= TAMANHO_PAGINA_GRANDE}
+    paginas = [(corpo, 'text/html', f'http://benchmark/{nome}', f'http://benchmark/{nome}', argumentos.motor_dom, False)
+               for nome, corpo in corpus.items()]
+    cpus = os.cpu_count() or 1
+    tamanhos = ([int(n) for n in argumentos.workers.split(',')] if argumentos.workers
+                else list(range(1, cpus + 1)))
+
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': cpus,
+        'motor_dom': argumentos.motor_dom,
+        'threads': argumentos.threads,
+        'paginas': argumentos.paginas,
+        'corpus': {nome: len(corpo) for nome, corpo in corpus.items()},
+        'configuracoes': {}
+    }
+
+    # Aquecimento: imports e XPaths compilados no processo principal
+    for argumentos_pagina in paginas:
+        app.processar_html(*argumentos_pagina)
+
+    print(f"{cpus} CPUs, {argumentos.threads} threads, {argumentos.paginas} páginas, motor_dom={argumentos.motor_dom}")
+    print(f"{'configuração':<14} {'páginas/s':>10} {'ganho':>7} {'sobrecarga (ms)':>16}")
+    base = medir(paginas, argumentos.paginas, argumentos.threads, lambda p: app.processar_html(*p))
+    resultado['configuracoes']['thread'] = {'paginas_s': round(base, 2)}
+    print(f"{'thread':<14} {base:>10.1f} {1.0:>6.2f}x {'-':>16}")
+
+    for tamanho in tamanhos:
+        pool = app.PoolProcessosCPU(tamanho, app.PROCESSOS_CPU_MAX_TAREFAS)
+        try:
+            # A subida dos workers (spawn + import do app) fica fora da medição
+            medir(paginas, tamanho * len(paginas), tamanho, pool.processar)
+            pool._metricas.update(tarefas=0, sobrecarga_s=0.0, tempo_worker_s=0.0)
+            vazao = medir(paginas, argumentos.paginas, argumentos.threads, pool.processar)
+            sobrecarga = pool.estatisticas()['sobrecarga_media_ms']
+        finally:
+            pool.encerrar()
+        nome = f'processos_{tamanho}'
+        resultado['configuracoes'][nome] = {'paginas_s': round(vazao, 2), 'ganho': round(vazao / base, 3),
+                                            'sobrecarga_media_ms': sobrecarga}
+        print(f"{nome:<14} {vazao:>10.1f} {vazao / base:>6.2f}x {sobrecarga:>16.2f}")
+
+    saida = argumentos.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"processos_cpu_{argumentos.motor_dom}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultado salvo em {saida}")
+
+if __name__ == '__main__':
+    main()
@@ -368,6 +368,10 @@ const ExtractionManager = {
                     await FileManager.checkAndDeleteExcessFiles();
                 }, 1000);
             } else {
+                // Falha transitória que o servidor já repetiu sem sucesso (429, 503, rede)
+                if (data.tentar_apos != null) {
+                    throw new Error(`${data.erro || 'Falha temporária'} - tente novamente em ${Math.ceil(data.tentar_apos)}s`);
+                }
                 throw new Error(data.erro || 'Erro desconhecido na extração');
             }
 
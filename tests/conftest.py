@@ -0,0 +1,50 @@
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+# Sem Chrome e com os resultados num diretório temporário (mesmo modo da Vercel)
+os.environ.setdefault('VERCEL', '1')
+os.environ.setdefault('EXTRACTO_CATALOGO_RECONCILIACAO', '0')
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+@pytest.fixture
+def servidor_html():
+    """Inicia servidores HTTP locais: servidor_html({'/caminho': b'<html>...'}) -> url_base"""
+    servidores = []
+
+    def iniciar(paginas):
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+            conexoes = set()
+
+            def do_GET(self):
+                Manipulador.conexoes.add(self.client_address)
+                corpo = paginas.get(self.path)
+                if corpo is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        servidor.conexoes = Manipulador.conexoes
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        servidores.append(servidor)
+        return servidor, f'http://127.0.0.1:{servidor.server_address[1]}'
+
+    yield iniciar
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
@@ -0,0 +1,41 @@
+import pytest
+
+import app
+
+SPA = (b'<html><head><title>App</title><script>' + b'var x = 1;' * 5000 +
+       b'</script></head><body><div id="root"></div><p>Carregando o aplicativo...</p></body></html>')
+
+def falhar_ao_criar_driver():
+    raise Exception("Não foi possível inicializar o Chrome WebDriver")
+
+@pytest.mark.parametrize('pool', [
+    app.PoolDrivers(1, 10, 1024, 1, fabrica=falhar_ao_criar_driver),
+    app.PoolDrivers(0, 10, 1024, 0.05),  # nenhum driver livre: estoura a espera
+], ids=['chrome_nao_inicia', 'pool_esgotado'])
+def test_selenium_que_levanta_mantem_texto_do_requests(monkeypatch, servidor_html, pool):
+    _, url_base = servidor_html({'/spa': SPA})
+    monkeypatch.setattr(app, 'pool_drivers', pool)
+    monkeypatch.setattr(app, 'registro_decisoes_motor', app.RegistroDecisoesMotor(10))
+
+    conteudo, decisao = app.extrair_adaptativo(url_base + '/spa', 'estrategias', None, {}, None, None)
+
+    assert 'Carregando o aplicativo' in conteudo
+    assert decisao['escalonado'] and decisao['motor'] == 'requests'
+    assert decisao['motivo'] == 'nota_baixa; selenium_falhou'
+    assert decisao['tempo_selenium'] is not None
+    assert app.registro_decisoes_motor.estatisticas()['recentes'] == [decisao]
+
+def test_decisao_registrada_quando_os_dois_metodos_falham(monkeypatch):
+    def requests_recusado(*args, **kwargs):
+        raise Exception("Conteúdo não é uma página")
+
+    monkeypatch.setattr(app, 'extrair_com_requests', requests_recusado)
+    monkeypatch.setattr(app, 'pool_drivers', app.PoolDrivers(1, 10, 1024, 1, fabrica=falhar_ao_criar_driver))
+    monkeypatch.setattr(app, 'registro_decisoes_motor', app.RegistroDecisoesMotor(10))
+
+    with pytest.raises(Exception, match='Chrome WebDriver'):
+        app.extrair_adaptativo('http://127.0.0.1:9/', 'estrategias', None, {}, None, None)
+
+    decisao, = app.registro_decisoes_motor.estatisticas()['recentes']
+    assert decisao['motivo'].endswith('; selenium_falhou')
+    assert decisao['tempo_selenium'] is not None
@@ -0,0 +1,19 @@
+import app
+
+TEXTO = 'Olá, coração! Página em português com acentuação suficiente.'
+
+def test_cabecalho_utf16_sem_bom_e_respeitado():
+    corpo = bytearray(f'<html><body><p>{TEXTO}</p></body></html>'.encode('utf-16-le'))
+    encoding, origem = app.resolver_charset(corpo, 'text/html; charset=UTF-16LE')
+    assert (encoding, origem) == ('utf-16-le', 'cabecalho')
+
+    resultado = app.processar_html(corpo, 'text/html; charset=UTF-16LE', 'http://x/', 'http://x/', 'lxml')
+    assert TEXTO in resultado['conteudo']
+
+def test_meta_utf16_em_documento_ascii_vira_utf8():
+    corpo = f'<html><head><meta charset="utf-16"></head><body><p>{TEXTO}</p></body></html>'.encode('utf-8')
+    assert app.resolver_charset(corpo, 'text/html') == ('utf-8', 'meta')
+
+def test_cabecalho_latin1_lido_como_cp1252():
+    corpo = '<p>preço “aspas”</p>'.encode('cp1252')
+    assert app.resolver_charset(corpo, 'text/html; charset=iso-8859-1') == ('cp1252', 'cabecalho')
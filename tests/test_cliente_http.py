@@ -0,0 +1,35 @@
+import threading
+
+import app
+
+def test_conexao_reaproveitada_entre_requisicoes(servidor_html):
+    servidor, url_base = servidor_html({'/a': b'<p>a</p>', '/b': b'<p>b</p>'})
+    cliente = app.ClienteHTTP(pool_hosts=4, pool_por_host=2, ttl_dns=60)
+
+    for caminho in ['/a', '/b', '/a', '/b', '/a']:
+        resposta = cliente.get(url_base + caminho, timeout=5)
+        assert resposta.status_code == 200
+        resposta.content  # lê o corpo para a conexão voltar ao pool
+
+    # Uma única conexão TCP (mesma porta de origem) do lado do servidor
+    assert len(servidor.conexoes) == 1
+    estatisticas = cliente.estatisticas()
+    assert estatisticas['requisicoes'] == 5
+    assert estatisticas['conexoes_novas'] == 1
+    assert estatisticas['conexoes_reaproveitadas'] == 4
+
+def test_conexao_reaproveitada_entre_threads(servidor_html):
+    servidor, url_base = servidor_html({'/a': b'<p>a</p>'})
+    cliente = app.ClienteHTTP(pool_hosts=4, pool_por_host=2, ttl_dns=60)
+
+    def baixar():
+        resposta = cliente.get(url_base + '/a', timeout=5)
+        resposta.content
+
+    # Threads em sequência, cada uma com sua Session, compartilham o pool do adaptador
+    for _ in range(3):
+        thread = threading.Thread(target=baixar)
+        thread.start()
+        thread.join()
+
+    assert len(servidor.conexoes) == 1
@@ -0,0 +1,63 @@
+import random
+import re
+
+import pytest
+
+import app
+
+def selecionar_quadratico(textos):
+    """Varredura original (antes do DeduplicadorTextos), comparando com todos os aceitos"""
+    textos_unicos = set()
+    selecionados = []
+    for texto in textos:
+        if texto not in textos_unicos and len(texto.strip()) > 3:
+            texto_normalizado = re.sub(r'\s+', ' ', texto.strip().lower())
+            if not any(texto_normalizado in existing.lower() or existing.lower() in texto_normalizado
+                       for existing in textos_unicos if len(existing) > 50):
+                textos_unicos.add(texto)
+                selecionados.append(texto)
+    return selecionados
+
+def selecionar_indexado(textos):
+    deduplicador = app.DeduplicadorTextos()
+    return [texto for texto in textos if deduplicador.aceitar(texto)]
+
+def gerar_textos(aleatorio, quantidade):
+    """Textos com repetições, trechos de textos anteriores, maiúsculas e espaços variados"""
+    palavras = ['casa', 'texto', 'Página', 'de', 'a', 'conteúdo', 'preço', 'R$', '10', 'marca', 'x']
+    textos = []
+    for _ in range(quantidade):
+        sorteio = aleatorio.random()
+        if textos and sorteio < 0.2:
+            texto = aleatorio.choice(textos)  # repetido
+        elif textos and sorteio < 0.55:
+            # Trecho de um texto anterior, com tamanho perto do limite de 50 caracteres
+            origem = aleatorio.choice(textos)
+            tamanho = aleatorio.choice([3, 4, 10, 48, 49, 50, 51, 52, len(origem)])
+            inicio = aleatorio.randint(0, max(0, len(origem) - tamanho))
+            texto = origem[inicio:inicio + tamanho]
+        elif textos and sorteio < 0.75:
+            # Texto anterior dentro de um maior
+            texto = ' '.join([aleatorio.choice(palavras), aleatorio.choice(textos), aleatorio.choice(palavras)])
+        else:
+            texto = ' '.join(aleatorio.choice(palavras) for _ in range(aleatorio.randint(1, 25)))
+        if aleatorio.random() < 0.2:
+            texto = texto.upper()
+        if aleatorio.random() < 0.2:
+            texto = texto.replace(' ', aleatorio.choice(['  ', '\n', ' \t ']))
+        if aleatorio.random() < 0.1:
+            texto = '  ' + texto + ' '
+        textos.append(texto)
+    return textos
+
+@pytest.mark.parametrize('semente', range(200))
+def test_mesmo_resultado_que_a_varredura_quadratica(semente):
+    aleatorio = random.Random(semente)
+    textos = gerar_textos(aleatorio, aleatorio.randint(1, 120))
+    assert selecionar_indexado(textos) == selecionar_quadratico(textos)
+
+@pytest.mark.parametrize('tamanho', [49, 50, 51, 52])
+def test_contencao_perto_do_limite(tamanho):
+    longo = ('abcdefghij' * 6)[:tamanho]
+    textos = [longo, longo[5:], 'xx ' + longo + ' yy', longo.upper()]
+    assert selecionar_indexado(textos) == selecionar_quadratico(textos)
@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import RAIZ
+
+# Importa o app num processo novo (inicialização a frio) e devolve o relatório em JSON
+SCRIPT = """
+import json, sys
+import app
+print(json.dumps({
+    'tempo': app.TEMPO_INICIALIZACAO,
+    'orcamento': app.ORCAMENTO_INICIALIZACAO,
+    'importacoes': app.TEMPOS_IMPORTACAO,
+    'modulos': sorted(nome for nome in ('selenium', 'bs4', 'lxml') if nome in sys.modules)
+}))
+"""
+
+def inicializar():
+    processo = subprocess.run([sys.executable, '-c', SCRIPT], cwd=RAIZ, env=dict(os.environ),
+                              capture_output=True, text=True, timeout=60)
+    assert processo.returncode == 0, processo.stderr
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+def test_inicializacao_dentro_do_orcamento():
+    relatorio = inicializar()
+    assert relatorio['tempo'] <= relatorio['orcamento'], (
+        f"Inicialização a frio em {relatorio['tempo']:.3f}s, orçamento de {relatorio['orcamento']}s "
+        f"(importações: {relatorio['importacoes']})")
+
+def test_dependencias_pesadas_carregadas_sob_demanda():
+    assert inicializar()['modulos'] == []
@@ -0,0 +1,33 @@
+import threading
+import time
+from collections import Counter
+
+import app
+
+def test_semaforo_do_host_limita_e_libera_a_entrada():
+    limite = app.LOTE_CONCORRENCIA_POR_HOST
+    ativas = Counter()
+    maximo = Counter()
+    lock = threading.Lock()
+
+    def extrair(url):
+        with app.semaforo_do_host(url):
+            host = url.split('/')[2]
+            with lock:
+                ativas[host] += 1
+                maximo[host] = max(maximo[host], ativas[host])
+            time.sleep(0.02)
+            with lock:
+                ativas[host] -= 1
+
+    # Vários acessos simultâneos ao mesmo host e muitos hosts acessados uma vez
+    urls = ['http://mesmo.exemplo/pagina'] * (limite * 4) + [f'http://host{n}.exemplo/' for n in range(50)]
+    threads = [threading.Thread(target=extrair, args=(url,)) for url in urls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert maximo['mesmo.exemplo'] == limite
+    # Sem extrações em andamento, nenhum host fica no dicionário
+    assert app.semaforos_por_host == {}
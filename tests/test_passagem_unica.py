@@ -0,0 +1,49 @@
+import os
+import re
+
+import pytest
+
+import app
+
+DIRETORIO_CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'corpus')
+PAGINAS = sorted(nome for nome in os.listdir(DIRETORIO_CORPUS) if nome.endswith('.html'))
+
+def blocos(html, motor_dom):
+    _, _, conteudos_extraidos = app.extrair_blocos_html(html, motor_dom)
+    return conteudos_extraidos
+
+def palavras(conteudos_extraidos):
+    return set(re.findall(r'\w+', ' '.join(texto for _, texto in conteudos_extraidos).lower()))
+
+@pytest.fixture(scope='module', params=PAGINAS)
+def html_corpus(request):
+    with open(os.path.join(DIRETORIO_CORPUS, request.param), 'rb') as f:
+        corpo = f.read()
+    encoding, _ = app.resolver_charset(corpo, 'text/html')
+    app.carregar_bs4()
+    return corpo.decode(encoding, errors='replace')
+
+def test_mesmas_palavras_que_as_estrategias(html_corpus):
+    estrategias = blocos(html_corpus, 'estrategias')
+    passagem_unica = blocos(html_corpus, 'passagem_unica')
+
+    # As estratégias usam get_text(strip=True) sem separador em p, div, headers, spans e
+    # links, o que cola palavras de nós vizinhos ("Nota" + "com" -> "notacom"); só contam
+    # as palavras que existem no documento
+    documento = palavras([('body', app.BeautifulSoup(html_corpus, 'html.parser').get_text(' '))])
+    faltando = (palavras(estrategias) & documento) - palavras(passagem_unica)
+    assert not faltando
+
+def test_mesmos_tipos_de_bloco(html_corpus):
+    estrategias = {tipo for tipo, _ in blocos(html_corpus, 'estrategias')}
+    passagem_unica = {tipo for tipo, _ in blocos(html_corpus, 'passagem_unica')}
+    # Sem blocos suficientes tudo viraria um único body_completo
+    assert 'body_completo' not in passagem_unica or 'body_completo' in estrategias
+    assert estrategias & {'span', 'link'} <= passagem_unica
+
+def test_texto_curto_volta_para_o_bloco_pai():
+    app.carregar_bs4()
+    html = ('<html><body><div class="produto"><h3>TV</h3><span>R$ 10</span>'
+            '<div>Marca 7</div><p>ok</p></div></body></html>')
+    conteudos_extraidos = blocos(html, 'passagem_unica')
+    assert ('div_conteudo', 'TV R$ 10 Marca 7 ok') in conteudos_extraidos
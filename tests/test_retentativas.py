@@ -0,0 +1,127 @@
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import app
+
+PAGINA = ('<html><head><title>Página</title></head><body><main><p>'
+          + 'Texto suficiente para a extração. ' * 20 + '</p></main></body></html>').encode('utf-8')
+
+@pytest.fixture
+def servidor_roteirizado():
+    """Servidor cujas respostas seguem um roteiro: cada GET consome a próxima ação"""
+    servidores = []
+
+    def iniciar(roteiro):
+        roteiro = list(roteiro)
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                acao = roteiro.pop(0) if len(roteiro) > 1 else roteiro[0]
+                if acao == '429':
+                    self.send_response(429)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(PAGINA)))
+                self.end_headers()
+                if acao == 'corta':
+                    # Metade do corpo e a conexão cai
+                    self.wfile.write(PAGINA[:len(PAGINA) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                if acao == 'trava':
+                    self.wfile.write(PAGINA[:100])
+                    self.wfile.flush()
+                    time.sleep(1.5)
+                    return
+                self.wfile.write(PAGINA)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        servidores.append(servidor)
+        return f'http://127.0.0.1:{servidor.server_address[1]}/pagina'
+
+    yield iniciar
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+@pytest.fixture
+def timeout_curto(monkeypatch):
+    """Timeout de leitura de 0,3 s em vez dos (5, 10) s da primeira tentativa"""
+    get_original = app.cliente_http.get
+
+    def get(url, **kwargs):
+        kwargs['timeout'] = (1, 0.3)
+        return get_original(url, **kwargs)
+
+    monkeypatch.setattr(app.cliente_http, 'get', get)
+
+@pytest.mark.parametrize('acao', ['corta', 'trava'])
+def test_falha_ao_ler_o_corpo_e_transitoria(servidor_roteirizado, timeout_curto, acao):
+    url = servidor_roteirizado([acao])
+    with pytest.raises(app.FalhaTransitoria):
+        app.extrair_com_requests(url, 'estrategias')
+
+def test_extrair_repete_falhas_transitorias(servidor_roteirizado):
+    url = servidor_roteirizado(['429', 'corta', 'ok'])
+    resposta = app.app.test_client().post('/extrair', json={'url': url, 'sem_cache': True}).get_json()
+    assert resposta['sucesso']
+    assert resposta['retentativas'] == 2
+
+def test_extrair_devolve_tentar_apos_quando_o_orcamento_acaba(servidor_roteirizado, monkeypatch):
+    monkeypatch.setattr(app, 'RETENTATIVA_SINCRONA_ESPERA_MAX', 0.0)
+    monkeypatch.setattr(app, 'atraso_retentativa', lambda tentativa: 0.5)
+    url = servidor_roteirizado(['corta'])
+    resposta = app.app.test_client().post('/extrair', json={'url': url, 'sem_cache': True}).get_json()
+    assert not resposta['sucesso']
+    assert resposta['tentar_apos'] == 0.5
+    assert resposta['retentativas'] == 0
+
+def test_lote_repete_falhas_transitorias(servidor_roteirizado):
+    url = servidor_roteirizado(['429', 'corta', 'ok'])
+    resposta = app.app.test_client().post('/extrair/lote', json={'urls': [url], 'sem_cache': True}).get_json()
+    assert resposta['sucessos'] == 1
+    assert resposta['resultados'][0]['retentativas'] == 2
+
+def test_lote_nao_segura_vagas_durante_a_espera(servidor_roteirizado, monkeypatch):
+    monkeypatch.setattr(app, 'semaforo_lote', threading.BoundedSemaphore(1))
+    monkeypatch.setattr(app, 'atraso_retentativa', lambda tentativa: 0.6)
+    url = servidor_roteirizado(['corta', 'ok'])
+    resultados = []
+    lote = threading.Thread(target=lambda: resultados.extend(app.processar_lote([(url, None)], usar_cache=False)))
+    lote.start()
+    time.sleep(0.3)
+    # No meio da espera pela retentativa: vaga global livre e nenhum semáforo de host em uso
+    assert app.semaforo_lote.acquire(blocking=False)
+    app.semaforo_lote.release()
+    assert app.semaforos_por_host == {}
+    lote.join(timeout=10)
+    assert resultados[0]['sucesso']
+    assert resultados[0]['retentativas'] == 1
+    assert resultados[0]['duracao'] >= 0.6
+
+def test_reserva_antecipada_e_usada_ou_devolvida():
+    controle = app.ControleHosts(taxa=0.5, rajada=1, espera_max=5, falhas_abertura=5, tempo_aberto=30)
+    url = 'http://reserva.exemplo/pagina'
+    with controle.reserva_antecipada(url):
+        pass
+    # Reserva não usada: a ficha volta e a próxima reserva não espera
+    inicio = time.perf_counter()
+    with controle.reserva_antecipada(url):
+        controle.reservar(url)
+    assert time.perf_counter() - inicio < 0.2
+    assert controle.estatisticas()['hosts']['reserva.exemplo']['requisicoes'] == 1